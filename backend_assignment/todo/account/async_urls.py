@@ -0,0 +1,9 @@
+from django.urls import path
+from .async_views import AsyncAccountView
+
+
+app_name = "async-account"
+
+urlpatterns = [
+    path("profile/", AsyncAccountView.as_view(), name="profile"),
+]
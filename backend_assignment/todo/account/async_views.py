@@ -0,0 +1,74 @@
+import json
+
+from django.http import JsonResponse
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+
+from .authentication import StatelessJWTAuthentication
+from .models import Account
+from .serializers import AccountSerializer
+
+
+class AsyncAPIView(View):
+    """
+    base class for the async views served under ASGI
+
+    DRF's APIView only runs synchronously, so this covers the parts of it
+    the async views need: JWT authentication, JSON request bodies and JSON
+    error responses. handlers receive a DRF Request so that serializers and
+    paginators work unchanged
+    """
+
+    authentication_class = StatelessJWTAuthentication
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # bearer tokens are not sent by browsers on their own, so like DRF's
+        # APIView the views need no CSRF check
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            authenticated = await self.authentication_class().aauthenticate(request)
+        except exceptions.APIException as exc:
+            return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+
+        if authenticated is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+
+        request.user = authenticated[0]
+        drf_request = Request(request)
+        drf_request.user = request.user
+
+        try:
+            return await super().dispatch(drf_request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return JsonResponse({"detail": exc.detail}, status=exc.status_code)
+
+    @staticmethod
+    def get_json(request):
+        """
+        returns the parsed JSON body of the request
+        """
+
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            raise exceptions.ParseError()
+
+
+class AsyncAccountView(AsyncAPIView):
+
+    async def get(self, request):
+        """
+        returns the user account details
+        """
+
+        # the request user only carries the token claims, so load the rest
+        account = await Account.objects.aget(id=request.user.id)
+        return JsonResponse(AccountSerializer(account).data, status=status.HTTP_200_OK)
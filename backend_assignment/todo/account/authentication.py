@@ -0,0 +1,149 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import Account
+
+
+# account fields that make up the request user without loading the Account row
+PRINCIPAL_FIELDS = ["id", "firstname", "lastname", "email", "is_active"]
+
+# token claims carrying the principal, see AccountLoginSerializer.get_token
+PRINCIPAL_CLAIMS = ["firstname", "lastname", "email"]
+
+
+def principal_cache_key(user_id):
+    return f"account:principal:{user_id}"
+
+
+def status_cache_key(user_id):
+    return f"account:active:{user_id}"
+
+
+def get_cached_principal(user_id):
+    """
+    returns the principal fields of an account, querying the database only
+    when they are not cached yet
+    """
+
+    principal = cache.get(principal_cache_key(user_id))
+    if principal is None:
+        principal = Account.objects.filter(id=user_id).values(*PRINCIPAL_FIELDS).first()
+        if principal is not None:
+            cache.set(principal_cache_key(user_id), principal, settings.ACCOUNT_PRINCIPAL_CACHE_TIMEOUT)
+
+    return principal
+
+
+def is_account_active(user_id):
+    """
+    returns whether an account exists and is active, reading it from the
+    database whenever the cached answer has expired or been evicted
+
+    a missing cache entry never lets a token through, and a stale one lives
+    at most ACCOUNT_PRINCIPAL_CACHE_TIMEOUT seconds in processes that did not
+    see the account change
+    """
+
+    active = cache.get(status_cache_key(user_id))
+    if active is None:
+        active = Account.objects.filter(id=user_id, is_active=True).exists()
+        cache.set(status_cache_key(user_id), active, settings.ACCOUNT_PRINCIPAL_CACHE_TIMEOUT)
+
+    return active
+
+
+def invalidate_principal(account):
+    """
+    drops the cached principal and status of an account, so that this
+    process reads them from the database again on the next request
+    """
+
+    cache.delete_many([principal_cache_key(account.id), status_cache_key(account.id)])
+
+
+def build_principal(values):
+    """
+    builds an Account from the principal fields, leaving every other field
+    deferred so that it is only loaded if a view actually reads it
+    """
+
+    # from_db expects the loaded values in the model's field order
+    field_names = [field.attname for field in Account._meta.concrete_fields if field.attname in values]
+    return Account.from_db(DEFAULT_DB_ALIAS, field_names, [values[name] for name in field_names])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    authenticates requests from the access token claims instead of loading
+    the Account row on every request
+
+    tokens issued without the principal claims fall back to a TTL'd cache of
+    the account. whether the account is still active is checked on every
+    request against a short-lived cached read of the database, so an evicted
+    entry fails closed and a deactivation reaches every process within
+    ACCOUNT_PRINCIPAL_CACHE_TIMEOUT seconds
+    """
+
+    def get_user(self, validated_token):
+        user_id, values = self.get_claimed_principal(validated_token)
+        if values is None:
+            values = get_cached_principal(user_id)
+        else:
+            values["is_active"] = is_account_active(user_id)
+
+        return self.build_user(values)
+
+    async def aauthenticate(self, request):
+        """
+        async variant of authenticate, for views running under ASGI
+        """
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user_id, values = self.get_claimed_principal(validated_token)
+        if values is None:
+            values = await sync_to_async(get_cached_principal)(user_id)
+        else:
+            values["is_active"] = await sync_to_async(is_account_active)(user_id)
+
+        return self.build_user(values), validated_token
+
+    def get_claimed_principal(self, validated_token):
+        """
+        returns the token's user id, and its principal fields when the token
+        carries all of them
+        """
+
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not all(claim in validated_token for claim in PRINCIPAL_CLAIMS):
+            return user_id, None
+
+        values = {"id": user_id}
+        values.update((claim, validated_token[claim]) for claim in PRINCIPAL_CLAIMS)
+        return user_id, values
+
+    def build_user(self, values):
+        if values is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not values["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return build_principal(values)
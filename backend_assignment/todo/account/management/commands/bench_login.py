@@ -0,0 +1,94 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import base_user
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from account.models import Account
+from account.serializers import AccountLoginSerializer
+from account.views import AccountLoginView
+from todo.benchmarks import benchmark_database, stopwatch, summarize, write_report
+
+
+def legacy_login(view, request, *args, **kwargs):
+    """
+    the login flow before it verified the password once and wrote only
+    last_login: the credentials were validated by the serializer and again by
+    TokenObtainPairView, then the account was loaded and saved in full
+    """
+
+    serializer = AccountLoginSerializer(data=request.data)
+    response = TokenObtainPairView.post(view, request, *args, **kwargs)
+
+    if serializer.is_valid() and response.status_code == status.HTTP_200_OK:
+        user = Account.objects.get(email=request.data["email"])
+        response.set_cookie(key="refresh_token", value=response.data["refresh"], httponly=True, samesite="None", secure=True)
+        response.set_cookie(key="access_token", value=response.data["access"], httponly=True, samesite="None", secure=True)
+
+        user.last_login = timezone.now()
+        user.save()
+    else:
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    return response
+
+
+class Command(BaseCommand):
+    help = "measures logins/sec, password hash verifications and queries per login"
+
+    email = "bench.login@example.com"
+    password = "BenchPASS1!"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=100, help="number of logins to time")
+        parser.add_argument(
+            "--legacy", action="store_true",
+            help="time the previous login flow, with its second verification and full save(), as a baseline"
+        )
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            if options["legacy"]:
+                with mock.patch.object(AccountLoginView, "post", legacy_login):
+                    report = {"legacy_login": self.run(options["logins"])["login"]}
+            else:
+                report = self.run(options["logins"])
+
+        write_report(self.stdout, report)
+
+    def run(self, logins):
+        Account.objects.create_user("Bench", "Login", self.email, self.password)
+        client = APIClient()
+        credentials = {"email": self.email, "password": self.password}
+
+        verifications = 0
+        real_check_password = base_user.check_password
+
+        def counting_check_password(*args, **kwargs):
+            nonlocal verifications
+            verifications += 1
+            return real_check_password(*args, **kwargs)
+
+        samples = []
+        with mock.patch.object(base_user, "check_password", counting_check_password), \
+                CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(logins):
+                with stopwatch(samples):
+                    response = client.post(reverse("login"), credentials, format="json")
+                if response.status_code != 200:
+                    raise RuntimeError(f"login failed with {response.status_code}: {response.content!r}")
+            elapsed = time.perf_counter() - start
+
+        report = summarize(samples, elapsed)
+        report["hash_verifications_per_login"] = verifications / logins
+        report["queries_per_login"] = len(queries) / logins
+        return {"login": report}
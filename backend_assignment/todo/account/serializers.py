@@ -1,3 +1,4 @@
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import Account
@@ -24,6 +25,10 @@ class AccountRegistrationSerializer(serializers.ModelSerializer):
             "id", "firstname", "lastname", "email", "password", 
             "confirm_password", "last_login"
         ]
+        extra_kwargs = {
+            # the unique index on email is checked by the insert in save(), not by a query up front
+            "email": {"validators": []},
+        }
     
     def validate_firstname(self, value):
         if not value.isalpha():
@@ -41,9 +46,6 @@ class AccountRegistrationSerializer(serializers.ModelSerializer):
         if not re.match(EMAIL_REGEX, value):
             raise serializers.ValidationError("Invalid email address")
         
-        if Account.objects.filter(email=value).exists():
-            raise serializers.ValidationError("An account with this email already exists!")
-        
         return value
     
     def validate_password(self, value):
@@ -75,8 +77,16 @@ class AccountRegistrationSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Passwords do not match!")
         else:
             user_account.set_password(password)
-            user_account.save()
-            return user_account        
+            try:
+                # concurrent registrations of one email race to this insert, and
+                # the unique index lets exactly one of them through
+                with transaction.atomic():
+                    user_account.save()
+            except IntegrityError:
+                if Account.objects.filter(email=user_account.email).exists():
+                    raise serializers.ValidationError({"email": ["An account with this email already exists!"]})
+                raise
+            return user_account
 
 
 class AccountSerializer(serializers.ModelSerializer):
@@ -125,9 +135,11 @@ class AccountLoginSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
 
-        # add user's firstname, lastname and role to token payload
+        # add user's firstname, lastname and email to token payload, so that
+        # StatelessJWTAuthentication can build the request user from it
         token["firstname"] = user.firstname
         token["lastname"] = user.lastname
+        token["email"] = user.email
         return token
     
     def validate_email(self, value):
@@ -143,21 +155,26 @@ class AccountLoginSerializer(TokenObtainPairSerializer):
         raise serializers.ValidationError("Password does not match required format. Password must contain at least 2 uppercase letters, 2 lowercase letters, 1 digit and 1 special character. Minimum length is 8 characters.")
     
     def validate(self, attrs):
+        """
+        authenticates the user with a single lookup and a single password
+        hash verification, and issues the token pair
+        """
+
         email = attrs.get("email")
         password = attrs.get("password")
 
-        user = Account.objects.get(email=email)
-        if user is None:
+        self.user = Account.objects.filter(email=email).first()
+        if self.user is None:
             raise serializers.ValidationError("No user found with this email!")
         
-        if not user.check_password(password):
+        if not self.user.check_password(password):
             raise serializers.ValidationError("Incorrect password!")
         
-        if not user.is_active:
+        if not self.user.is_active:
             raise serializers.ValidationError("Account is disabled!")
         
-        token = self.get_token(user)
-        user_data = AccountSerializer(user).data
+        token = self.get_token(self.user)
+        user_data = AccountSerializer(self.user).data
         user_data["refresh_token"] = str(token)
         user_data["access_token"] = str(token.access_token)
         return user_data
\ No newline at end of file
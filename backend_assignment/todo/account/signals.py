@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_principal
+from .models import Account
+
+
+@receiver(post_save, sender=Account)
+def invalidate_saved_principal(sender, instance, update_fields=None, **kwargs):
+    """
+    drops the cached principal whenever an account changes; QuerySet.update()
+    does not send this signal, so its changes are only seen once the cached
+    entries expire
+    """
+
+    # logins only touch last_login, which is not part of the principal
+    if update_fields is not None and set(update_fields) == {"last_login"}:
+        return
+
+    invalidate_principal(instance)
+
+
+@receiver(post_delete, sender=Account)
+def invalidate_deleted_principal(sender, instance, **kwargs):
+    invalidate_principal(instance)
@@ -1,3 +1,177 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import base_user
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .models import Account
+
+
+REGISTRATION = {
+    "firstname": "Jane", "lastname": "Doe", "email": "jane@example.com",
+    "password": "PassWORD1!", "confirm_password": "PassWORD1!",
+}
+
+
+class AccountRegistrationTests(APITestCase):
+
+    def test_registration_inserts_without_checking_the_email_first(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse("register"), REGISTRATION, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse([query for query in queries if query["sql"].startswith("SELECT")])
+
+    def test_duplicate_email_is_rejected(self):
+        self.client.post(reverse("register"), REGISTRATION, format="json")
+        response = self.client.post(reverse("register"), REGISTRATION, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("email", response.data)
+        self.assertEqual(Account.objects.filter(email=REGISTRATION["email"]).count(), 1)
+
+
+class ConcurrentRegistrationTests(APITransactionTestCase):
+
+    def test_parallel_duplicate_registrations_create_one_account(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("in-memory SQLite fails concurrent writers instead of making them wait")
+
+        workers = 8
+        barrier = threading.Barrier(workers)
+        statuses = []
+
+        def register():
+            try:
+                client = APIClient()
+                barrier.wait()
+                statuses.append(client.post(reverse("register"), REGISTRATION, format="json").status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=register) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(statuses), [201] + [400] * (workers - 1))
+        self.assertEqual(Account.objects.filter(email=REGISTRATION["email"]).count(), 1)
+
+
+class AccountLoginTests(APITestCase):
+
+    def setUp(self):
+        self.user = Account.objects.create_user("Jane", "Doe", "jane@example.com", "PassWORD1!")
+        self.credentials = {"email": "jane@example.com", "password": "PassWORD1!"}
+
+    def test_login_verifies_the_password_once(self):
+        with mock.patch.object(base_user, "check_password", wraps=base_user.check_password) as check_password:
+            response = self.client.post(reverse("login"), self.credentials, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(check_password.call_count, 1)
+        self.assertIn("access", response.data)
+        self.assertEqual(response.cookies["access_token"].value, response.data["access"])
+
+    def test_login_updates_last_login(self):
+        self.client.post(reverse("login"), self.credentials, format="json")
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_login_rejects_a_wrong_password(self):
+        credentials = {**self.credentials, "password": "WrongPASS1!"}
+        response = self.client.post(reverse("login"), credentials, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_login_rejects_an_unknown_email(self):
+        credentials = {**self.credentials, "email": "nobody@example.com"}
+        response = self.client.post(reverse("login"), credentials, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class StatelessJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.TODO_RESPONSE_CACHE].clear()
+        self.user = Account.objects.create_user("Jane", "Doe", "jane@example.com", "PassWORD1!")
+        credentials = {"email": "jane@example.com", "password": "PassWORD1!"}
+        self.token = self.client.post(reverse("login"), credentials, format="json").data["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.token}")
+
+    def test_requests_do_not_load_the_account(self):
+        # the first request caches whether the account is active
+        with self.assertNumQueries(2):
+            self.client.get(reverse("list"))
+        # the only query left is the ToDo page itself
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("list") + "?page_size=10")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_profile_reads_the_remaining_fields_lazily(self):
+        response = self.client.get(reverse("profile"))
+
+        self.assertEqual(response.data["email"], "jane@example.com")
+        self.assertIsNotNone(response.data["last_login"])
+
+    def test_tokens_without_principal_claims_use_the_cached_account(self):
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        with self.assertNumQueries(2):
+            self.client.get(reverse("list"))
+        # a different page size, so the list is not served from the response cache
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("list") + "?page_size=10")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deactivated_accounts_are_refused(self):
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse("list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+
+        response = self.client.get(reverse("list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_evicted_status_is_read_from_the_database(self):
+        self.client.get(reverse("list"))
+        # deactivated without the signal, as another process would, then evicted
+        Account.objects.filter(id=self.user.id).update(is_active=False)
+        cache.clear()
+
+        response = self.client.get(reverse("list") + "?page_size=10")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(ACCOUNT_PRINCIPAL_CACHE_TIMEOUT=0)
+    def test_deactivation_in_another_process_is_seen_once_the_status_expires(self):
+        self.client.get(reverse("list"))
+        Account.objects.filter(id=self.user.id).update(is_active=False)
+
+        response = self.client.get(reverse("list") + "?page_size=10")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_accounts_are_refused(self):
+        self.client.get(reverse("list"))
+        self.user.delete()
+
+        response = self.client.get(reverse("list") + "?page_size=10")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
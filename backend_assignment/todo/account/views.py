@@ -4,9 +4,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework_simplejwt.tokens import RefreshToken, AccessToken, TokenError
-from django.utils import timezone
+from django.contrib.auth.models import update_last_login
 
-from .models import Account
 from .serializers import AccountRegistrationSerializer, AccountLoginSerializer, AccountSerializer
 
 
@@ -31,35 +30,36 @@ class AccountLoginView(TokenObtainPairView):
     permission_classes = [AllowAny]
 
     def post(self, request, *args, **kwargs):
-        serializer = AccountLoginSerializer(data=request.data)
-        response = super().post(request, *args, **kwargs)
-        
-        if serializer.is_valid() and response.status_code == status.HTTP_200_OK:
-            user = Account.objects.get(email=request.data["email"]) # type: ignore
-            if not user.is_active:
-                return Response({"error": "Account is disabled. Contact admin!"}, status=status.HTTP_400_BAD_REQUEST)
-            
-            response.set_cookie(
-                key="refresh_token",
-                value=response.data["refresh"], # type: ignore
-                httponly=True,
-                samesite="None",
-                secure=True
-            )
-            response.set_cookie(
-                key="access_token",
-                value=response.data["access"], # type: ignore
-                httponly=True,
-                samesite="None",
-                secure=True
-            )
+        """
+        logs in the user, verifying the password hash exactly once
+        """
 
-            # update user last login
-            user.last_login = timezone.now()
-            user.save()
-        else:
+        serializer = AccountLoginSerializer(data=request.data)
+        if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        
+
+        tokens = serializer.validated_data
+        response = Response(
+            {"refresh": tokens["refresh_token"], "access": tokens["access_token"]},
+            status=status.HTTP_200_OK
+        )
+        response.set_cookie(
+            key="refresh_token",
+            value=tokens["refresh_token"],
+            httponly=True,
+            samesite="None",
+            secure=True
+        )
+        response.set_cookie(
+            key="access_token",
+            value=tokens["access_token"],
+            httponly=True,
+            samesite="None",
+            secure=True
+        )
+
+        # update user last login, writing only that column
+        update_last_login(None, serializer.user)
         return response
     
 
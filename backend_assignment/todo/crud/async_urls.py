@@ -0,0 +1,17 @@
+from django.urls import path
+from .async_views import (
+    AsyncAddToDoView, AsyncToDoListView, AsyncRetrieveToDoView,
+    AsyncMarkToDoAsCompletedView, AsyncUpdateToDoView, AsyncDeleteToDoView
+)
+
+
+app_name = "async-todo"
+
+urlpatterns = [
+    path("add/", AsyncAddToDoView.as_view(), name="add"),
+    path("get/", AsyncToDoListView.as_view(), name="list"),
+    path("get/<int:todo_id>/", AsyncRetrieveToDoView.as_view(), name="retrieve"),
+    path("update/<int:todo_id>/", AsyncUpdateToDoView.as_view(), name="update"),
+    path("complete/<int:todo_id>/", AsyncMarkToDoAsCompletedView.as_view(), name="complete"),
+    path("delete/<int:todo_id>/", AsyncDeleteToDoView.as_view(), name="delete"),
+]
@@ -0,0 +1,106 @@
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from rest_framework import status
+
+from account.async_views import AsyncAPIView
+from .conditional import get_etag
+from .models import ToDo
+from .pagination import ToDoCursorPagination
+from .serializers import FastToDoSerializer, ToDoSerializer, UPDATABLE_FIELDS
+from .views import conditional_update
+
+
+class AsyncAddToDoView(AsyncAPIView):
+    """
+    add a new ToDo
+    """
+
+    async def post(self, request):
+        serializer = ToDoSerializer(data=self.get_json(request), context={"request": request})
+        if serializer.is_valid():
+            todo = await ToDo.objects.acreate(user=request.user, **serializer.validated_data)
+            data = ToDoSerializer(todo, context={"request": request}).data
+            return JsonResponse(data, status=status.HTTP_201_CREATED)
+        else:
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncToDoListView(AsyncAPIView):
+    """
+    list all ToDos for the authenticated user, one cursor page at a time
+    """
+
+    async def get(self, request):
+        queryset = ToDo.objects.filter(user=request.user).values(*FastToDoSerializer.values_fields())
+        paginator = ToDoCursorPagination()
+        page = await paginator.apaginate_queryset(queryset, request)
+        data = FastToDoSerializer(page, many=True, context={"request": request}).data
+        return JsonResponse(paginator.get_paginated_data(data), status=status.HTTP_200_OK)
+
+
+class AsyncRetrieveToDoView(AsyncAPIView):
+    """
+    retrieve details of a ToDo object
+    """
+
+    async def get(self, request, todo_id):
+        try:
+            todo = await ToDo.objects.aget(id=todo_id, user=request.user)
+        except ToDo.DoesNotExist:
+            return JsonResponse({"error": "ToDo does not exist!"}, status=status.HTTP_404_NOT_FOUND)
+
+        response = JsonResponse(ToDoSerializer(todo, context={"request": request}).data, status=status.HTTP_200_OK)
+        response["ETag"] = get_etag(todo)
+        return response
+
+
+class AsyncConditionalUpdateMixin:
+    """
+    answers ToDo updates through conditional_update, whose UPDATE ...
+    RETURNING statement has no async ORM counterpart
+    """
+
+    async def update_todo(self, request, todo_id, **values):
+        status_code, body, etag = await sync_to_async(conditional_update)(request, todo_id, **values)
+        response = JsonResponse(body, status=status_code)
+        if etag:
+            response["ETag"] = etag
+        return response
+
+
+class AsyncUpdateToDoView(AsyncConditionalUpdateMixin, AsyncAPIView):
+    """
+    update a ToDo object
+    """
+
+    async def patch(self, request, todo_id):
+        serializer = ToDoSerializer(data=self.get_json(request), context={"request": request}, partial=True)
+        if serializer.is_valid():
+            values = {
+                field: value for field, value in serializer.validated_data.items() if field in UPDATABLE_FIELDS
+            }
+            return await self.update_todo(request, todo_id, **values)
+        else:
+            return JsonResponse(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class AsyncMarkToDoAsCompletedView(AsyncConditionalUpdateMixin, AsyncAPIView):
+    """
+    mark a ToDo as completed
+    """
+
+    async def patch(self, request, todo_id):
+        return await self.update_todo(request, todo_id, completed=True)
+
+
+class AsyncDeleteToDoView(AsyncAPIView):
+    """
+    delete a ToDo object
+    """
+
+    async def delete(self, request, todo_id):
+        deleted = await sync_to_async(ToDo.objects.filter(id=todo_id, user=request.user).delete_with_tombstones)()
+        if not deleted:
+            return JsonResponse({"error": "ToDo does not exist!"}, status=status.HTTP_404_NOT_FOUND)
+
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
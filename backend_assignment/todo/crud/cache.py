@@ -0,0 +1,124 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def get_cache():
+    return caches[settings.TODO_RESPONSE_CACHE]
+
+
+def state_key(user_id):
+    return f"todo:state:{user_id}"
+
+
+def response_key(user_id, generation, request):
+    # the full URL, so that every page and page size is cached separately
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f"todo:response:{user_id}:{generation}:{url}"
+
+
+def new_state():
+    return {"generation": uuid.uuid4().hex, "modified": time.time()}
+
+
+def get_state(user_id):
+    """
+    returns the generation of a user's cached responses and the time their
+    ToDos last changed
+
+    every cached response is keyed by the user's generation, so starting a
+    new one invalidates all of them at once
+    """
+
+    cache = get_cache()
+    state = cache.get(state_key(user_id))
+    if state is None:
+        # add() keeps the state of an invalidation that raced this request
+        cache.add(state_key(user_id), new_state(), None)
+        state = cache.get(state_key(user_id)) or new_state()
+
+    return state
+
+
+def invalidate(user_id):
+    """
+    drops every cached response of a user
+
+    inside a transaction the responses are dropped again once it commits,
+    so a read racing the transaction cannot cache the old rows for good
+    """
+
+    get_cache().set(state_key(user_id), new_state(), None)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: get_cache().set(state_key(user_id), new_state(), None))
+
+
+class CachedResponseMixin:
+    """
+    serves GET requests from a per-user cache of their rendered JSON, and
+    answers unchanged polls with 304 Not Modified without a database query
+
+    the cache is invalidated whenever one of the user's ToDos is written,
+    see crud.signals and the set-based writes in crud.views
+    """
+
+    def cached(self, request, handler, *args, **kwargs):
+        """
+        returns the cached response of the request, calling handler to
+        build it on a miss; only successful JSON responses are cached
+        """
+
+        if request.accepted_renderer.format != "json":
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        state = get_state(request.user.id)
+        key = response_key(request.user.id, state["generation"], request)
+
+        entry = cache.get(key)
+        if entry is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            entry = self.render_entry(request, response)
+            cache.set(key, entry)
+
+        return self.build_response(request, entry, state["modified"])
+
+    def render_entry(self, request, response):
+        body = request.accepted_renderer.render(
+            response.data, request.accepted_media_type, self.get_renderer_context()
+        )
+        return {
+            "body": body,
+            "content_type": f"{request.accepted_media_type}; charset=utf-8",
+            "etag": response.get("ETag") or quote_etag(hashlib.md5(body).hexdigest()),
+        }
+
+    def build_response(self, request, entry, modified):
+        response = HttpResponse(entry["body"], content_type=entry["content_type"])
+        response["ETag"] = entry["etag"]
+
+        # Last-Modified is in whole seconds, so it is only sent once the second the ToDos
+        # changed in is over; a write later in that second would otherwise keep the same
+        # date, and polls by date would get a stale 304
+        if int(time.time()) > int(modified):
+            response["Last-Modified"] = http_date(modified)
+        else:
+            modified = None
+
+        # the response is per user, and clients must revalidate before reusing it
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ["Authorization", "Cookie"])
+
+        return get_conditional_response(
+            request, etag=entry["etag"], last_modified=modified, response=response
+        )
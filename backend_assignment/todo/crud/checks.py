@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core import checks
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from .models import ToDo
+from .search import SEARCH_INDEX, SEARCH_TABLE, SEARCH_TRIGGERS, SEARCH_VECTOR
+
+
+# the migration that creates the text search index
+SEARCH_MIGRATION = ("crud", "0009_todo_search")
+
+
+def missing_search_objects(connection):
+    """
+    returns the names of the text search schema objects missing from a
+    database, on the databases search has an index on
+    """
+
+    table = ToDo._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            columns = [column.name for column in connection.introspection.get_table_description(cursor, table)]
+            constraints = connection.introspection.get_constraints(cursor, table)
+            expected = {f"{table}.{SEARCH_VECTOR}": SEARCH_VECTOR in columns, SEARCH_INDEX: SEARCH_INDEX in constraints}
+        elif connection.vendor == "sqlite":
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+            names = {name for name, in cursor.fetchall()}
+            expected = {name: name in names for name in [SEARCH_TABLE, *SEARCH_TRIGGERS]}
+        else:
+            return []
+
+    return [name for name, exists in expected.items() if not exists]
+
+
+@checks.register(checks.Tags.database)
+def check_search_index(app_configs=None, databases=None, **kwargs):
+    """
+    warns when the text search index is incomplete, e.g. when a migration made
+    SQLite rebuild crud_todo, which drops the triggers keeping the index in sync
+    """
+
+    warnings = []
+    for alias in databases or []:
+        connection = connections[alias]
+        if SEARCH_MIGRATION not in MigrationRecorder(connection).applied_migrations():
+            continue
+
+        missing = missing_search_objects(connection)
+        if missing:
+            warnings.append(checks.Warning(
+                f"The text search index of database '{alias}' is missing {', '.join(missing)}.",
+                hint="Create them again in a migration, see crud/migrations/0009_todo_search.py.",
+                id="crud.W001",
+            ))
+
+    return warnings
+
+
+@checks.register(checks.Tags.caches)
+def check_response_cache_is_shared(app_configs=None, **kwargs):
+    """
+    warns when the ToDo response cache is kept in process memory outside of
+    DEBUG, where each server process would keep its own generations and
+    serve lists that a write in another process has changed
+    """
+
+    backend = settings.CACHES[settings.TODO_RESPONSE_CACHE]["BACKEND"]
+    if settings.DEBUG or not backend.endswith("LocMemCache"):
+        return []
+
+    return [checks.Warning(
+        "The ToDo response cache is kept in process memory, so a ToDo written through one server process "
+        "does not invalidate the cached responses of the others.",
+        hint="Set TODO_CACHE_BACKEND to a cache shared by all processes, e.g. FileBasedCache or RedisCache, "
+             "or run a single process.",
+        id="crud.W002",
+    )]
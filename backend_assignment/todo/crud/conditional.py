@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from django.utils.http import parse_etags, quote_etag
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def get_etag(todo):
+    """
+    returns the ETag of a ToDo, which changes every time the ToDo is updated
+
+    the tag encodes updated_at in microseconds, so an If-Match header can be
+    turned back into an updated_at precondition without reading the row
+    """
+
+    delta = todo.updated_at - EPOCH
+    microseconds = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return quote_etag(f"{todo.id}-{microseconds}")
+
+
+def parse_if_match(request, todo_id):
+    """
+    returns the updated_at values the request's If-Match header allows the
+    ToDo to have, or None when the request is unconditional
+    """
+
+    header = request.headers.get("If-Match")
+    if header is None:
+        return None
+
+    etags = parse_etags(header)
+    if etags == ["*"]:
+        return None
+
+    versions = []
+    for etag in etags:
+        # If-Match uses the strong comparison, so weak tags never match
+        if not etag.startswith('"'):
+            continue
+
+        tag_id, _, microseconds = etag.strip('"').partition("-")
+        if tag_id == str(todo_id) and microseconds.isdigit():
+            versions.append(EPOCH + timedelta(microseconds=int(microseconds)))
+
+    return versions
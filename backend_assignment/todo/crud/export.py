@@ -0,0 +1,66 @@
+import csv
+import json
+
+from .serializers import FastToDoSerializer, ToDoSerializer
+
+
+# columns of an export, the owner is implied by who exports
+EXPORT_FIELDS = [field for field in ToDoSerializer.Meta.fields if field != "user"]
+
+
+class Echo:
+    """
+    a file-like object whose write() returns the written line, so csv.writer
+    can format rows one at a time without buffering them
+    """
+
+    def write(self, value):
+        return value
+
+
+def export_rows(request, queryset, chunk_size):
+    """
+    yields the serialized ToDos of the queryset, reading them from the
+    database chunk_size rows at a time through a server-side cursor
+    """
+
+    serializer = FastToDoSerializer(context={"request": request}, fields=EXPORT_FIELDS)
+    rows = queryset.values(*FastToDoSerializer.values_fields(EXPORT_FIELDS))
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield serializer.to_representation(row)
+
+
+def batched(lines, size):
+    """
+    joins lines into batches of size, so the response is not written to
+    the client one tiny chunk per row
+    """
+
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= size:
+            yield "".join(batch)
+            batch.clear()
+
+    if batch:
+        yield "".join(batch)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row) + "\n"
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([row[field] for field in EXPORT_FIELDS])
+
+
+# export format: (content type, line formatter)
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", ndjson_lines),
+    "csv": ("text/csv", csv_lines),
+}
@@ -0,0 +1,176 @@
+import csv
+import io
+import json
+
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .cache import invalidate
+from .models import ToDo
+from .serializers import ToDoSerializer
+
+
+def decode_lines(stream, invalid_lines):
+    """
+    decodes a binary stream line by line, without reading it all at once,
+    adding the numbers of the lines that are not UTF-8 to invalid_lines
+    """
+
+    for number, line in enumerate(stream, start=1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError:
+                # decoded anyway, so that the lines after it are still parsed
+                line = line.decode("utf-8", "replace")
+                invalid_lines.add(number)
+        # spreadsheet exports often start with a byte order mark
+        yield line.lstrip("\ufeff") if number == 1 else line
+
+
+def parse_ndjson(stream):
+    """
+    yields (row, data, error) for every non-blank line of an NDJSON stream
+    """
+
+    invalid_lines = set()
+    for row, line in enumerate(decode_lines(stream, invalid_lines), start=1):
+        if row in invalid_lines:
+            yield row, None, "Invalid UTF-8!"
+            continue
+
+        if not line.strip():
+            continue
+
+        try:
+            data = json.loads(line)
+        except ValueError:
+            yield row, None, "Invalid JSON!"
+            continue
+
+        if not isinstance(data, dict):
+            yield row, None, "Expected a ToDo object!"
+            continue
+
+        yield row, data, None
+
+
+def parse_csv(stream):
+    """
+    yields (row, data, error) for every record of a CSV stream with a header
+    line, leaving out empty cells so that the model defaults apply to them
+    """
+
+    invalid_lines = set()
+    reader = csv.DictReader(decode_lines(stream, invalid_lines))
+    # the header line, a record may span several lines when a cell has line breaks
+    last_line = 1
+    for row, record in enumerate(reader, start=1):
+        lines = range(last_line + 1, reader.line_num + 1)
+        last_line = reader.line_num
+        if any(line in invalid_lines for line in lines):
+            yield row, None, "Invalid UTF-8!"
+            continue
+
+        yield row, {key: value for key, value in record.items() if key is not None and value != ""}, None
+
+
+# import format: stream parser
+IMPORT_FORMATS = {
+    "ndjson": parse_ndjson,
+    "csv": parse_csv,
+}
+
+
+class ToDoImporter:
+    """
+    imports parsed rows as ToDos of a user, validating every row with the
+    rules of ToDoSerializer and inserting the valid ones in chunks, with
+    COPY on PostgreSQL and bulk_create elsewhere
+
+    run() returns a report of the number of ToDos created and the errors of
+    the rejected rows, of which at most max_errors are listed
+    """
+
+    def __init__(self, user, batch_size=1000, max_errors=1000, using=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.using = using or router.db_for_write(ToDo)
+
+    def run(self, rows):
+        self.created, self.error_count, self.errors = 0, 0, []
+
+        batch = []
+        for row, data, error in rows:
+            if error is None:
+                serializer = ToDoSerializer(data=data)
+                if serializer.is_valid():
+                    batch.append(ToDo(user=self.user, **serializer.validated_data))
+                else:
+                    error = serializer.errors
+
+            if error is not None:
+                self.add_error(row, error)
+
+            if len(batch) >= self.batch_size:
+                self.insert(batch)
+                batch = []
+
+        if batch:
+            self.insert(batch)
+
+        return {
+            "created": self.created,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+    def add_error(self, row, error):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"row": row, "errors": error})
+
+    def insert(self, todos):
+        with transaction.atomic(using=self.using):
+            if connections[self.using].vendor == "postgresql":
+                self.copy(todos)
+            else:
+                ToDo.objects.using(self.using).bulk_create(todos)
+
+        # bulk inserts do not send post_save, so the cached responses are dropped here
+        invalidate(self.user.id)
+        self.created += len(todos)
+
+    def copy(self, todos):
+        """
+        inserts the ToDos with a single COPY ... FROM STDIN, which skips the
+        per-row parse and plan work of INSERT statements
+        """
+
+        connection = connections[self.using]
+        fields = [field for field in ToDo._meta.concrete_fields if not field.primary_key]
+        now = timezone.now()
+
+        buffer = io.StringIO()
+        for todo in todos:
+            todo.created_at = todo.updated_at = now
+            values = [field.get_db_prep_save(getattr(todo, field.attname), connection) for field in fields]
+            # unquoted empty values are NULL in the csv format, quoted ones are empty strings
+            buffer.write(",".join(
+                "" if value is None else '"' + str(value).replace('"', '""') + '"' for value in values
+            ) + "\n")
+
+        table = connection.ops.quote_name(ToDo._meta.db_table)
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        sql = f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)"
+
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, "copy_expert"):
+                # psycopg2
+                buffer.seek(0)
+                cursor.cursor.copy_expert(sql, buffer)
+            else:
+                # psycopg 3
+                with cursor.cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
@@ -0,0 +1,138 @@
+import asyncio
+import io
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management.base import BaseCommand
+from django.db.backends.signals import connection_created
+from django.urls import reverse
+
+from account.models import Account
+from account.serializers import AccountLoginSerializer
+from crud.models import ToDo
+from todo.asgi import application as asgi_application
+from todo.benchmarks import benchmark_database, summarize, write_report
+from todo.wsgi import application as wsgi_application
+
+
+class Command(BaseCommand):
+    help = (
+        "compares how list request throughput scales with concurrency in one process, "
+        "for the WSGI app on a fixed thread pool and the async views under ASGI"
+    )
+
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="requests per concurrency level")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+        parser.add_argument("--threads", type=int, default=8, help="WSGI worker threads, as in a gthread worker")
+        parser.add_argument("--todos", type=int, default=50, help="ToDos owned by the benchmark user")
+        parser.add_argument(
+            "--db-latency-ms", type=float, default=2.0,
+            help="simulated network round trip added to every query, since the test database is local"
+        )
+
+    def handle(self, *args, **options):
+        latency = options["db_latency_ms"] / 1000
+
+        def add_latency(execute, sql, params, many, context):
+            time.sleep(latency)
+            return execute(sql, params, many, context)
+
+        def install_latency(sender, connection, **kwargs):
+            connection.execute_wrappers.append(add_latency)
+
+        # the WSGI list caches responses by URL and the async one does not, so every
+        # request of the run asks for a distinct URL to keep both paths on the database
+        self.request_ids = itertools.count()
+
+        with benchmark_database():
+            token = self.seed(options["todos"])
+            connection_created.connect(install_latency)
+            try:
+                report = {}
+                for concurrency in options["concurrency"]:
+                    report[f"concurrency_{concurrency}"] = {
+                        "wsgi": self.run_wsgi(token, options["requests"], concurrency, options["threads"]),
+                        "asgi": asyncio.run(self.run_asgi(token, options["requests"], concurrency)),
+                    }
+            finally:
+                connection_created.disconnect(install_latency)
+
+        write_report(self.stdout, report)
+
+    def seed(self, todos):
+        user = Account.objects.create_user("Bench", "User", "bench.concurrency@example.com", "BenchPASS1!")
+        ToDo.objects.bulk_create(
+            ToDo(user=user, title=f"todo {i}", due_date="2030-01-01", time="09:00") for i in range(todos)
+        )
+        return str(AccountLoginSerializer.get_token(user).access_token)
+
+    def query_string(self):
+        return f"request={next(self.request_ids)}"
+
+    def run_wsgi(self, token, requests, concurrency, threads):
+        path = reverse("list")
+
+        def call(_):
+            environ = {
+                "PATH_INFO": path, "QUERY_STRING": self.query_string(),
+                "HTTP_AUTHORIZATION": f"Bearer {token}", "SERVER_NAME": "testserver",
+            }
+            setup_testing_defaults(environ)
+            environ["wsgi.input"] = io.BytesIO()
+            statuses = []
+
+            start = time.perf_counter()
+            body = b"".join(wsgi_application(environ, lambda status, headers: statuses.append(status)))
+            elapsed = time.perf_counter() - start
+            if not statuses[0].startswith("200"):
+                raise RuntimeError(f"WSGI request failed with {statuses[0]}: {body[:200]!r}")
+            return elapsed
+
+        # requests beyond the worker threads queue up, as they would in the server
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(threads, concurrency)) as executor:
+            samples = list(executor.map(call, range(requests)))
+        return summarize(samples, time.perf_counter() - start)
+
+    async def run_asgi(self, token, requests, concurrency):
+        path = reverse("async-todo:list")
+        slots = asyncio.Semaphore(concurrency)
+
+        async def call():
+            scope = {
+                "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+                "method": "GET", "scheme": "http", "path": path, "raw_path": path.encode(),
+                "query_string": self.query_string().encode(), "root_path": "",
+                "headers": [(b"host", b"testserver"), (b"authorization", f"Bearer {token}".encode())],
+                "client": ("127.0.0.1", 0), "server": ("testserver", 80),
+            }
+            received = False
+            messages = []
+
+            async def receive():
+                nonlocal received
+                if received:
+                    # the client never disconnects
+                    await asyncio.Future()
+                received = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                messages.append(message)
+
+            async with slots:
+                start = time.perf_counter()
+                await asgi_application(scope, receive, send)
+                elapsed = time.perf_counter() - start
+
+            if messages[0]["status"] != 200:
+                raise RuntimeError(f"ASGI request failed with {messages[0]['status']}")
+            return elapsed
+
+        start = time.perf_counter()
+        samples = await asyncio.gather(*(call() for _ in range(requests)))
+        return summarize(samples, time.perf_counter() - start)
@@ -0,0 +1,94 @@
+import queue
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from todo.benchmarks import benchmark_database, stopwatch, summarize, write_report
+from todo.pooled_postgresql.base import close_pools, get_pool
+
+
+# database settings overrides for each connection handling strategy
+MODES = {
+    "direct": {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 0},
+    "persistent": {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 60},
+    "pooled": {"ENGINE": "todo.pooled_postgresql", "CONN_MAX_AGE": 0},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "load tests a PostgreSQL database with concurrent request-shaped workloads, "
+        "comparing new, persistent and pooled connections"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=32, help="number of concurrent workers")
+        parser.add_argument("--requests", type=int, default=2000, help="requests per mode")
+        parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+
+    def handle(self, *args, **options):
+        if connections["default"].vendor != "postgresql":
+            raise CommandError("the connection benchmark needs a PostgreSQL database")
+
+        with benchmark_database():
+            report = {
+                mode: self.run_mode(mode, options["concurrency"], options["requests"])
+                for mode in options["modes"]
+            }
+
+        write_report(self.stdout, report)
+
+    def run_mode(self, mode, concurrency, requests):
+        alias = f"bench_{mode}"
+        connections.settings[alias] = {**connections.settings["default"], **MODES[mode]}
+
+        jobs = queue.Queue()
+        for _ in range(requests):
+            jobs.put(None)
+
+        samples, samples_lock = [], threading.Lock()
+
+        def worker():
+            timings = []
+            try:
+                while True:
+                    try:
+                        jobs.get_nowait()
+                    except queue.Empty:
+                        break
+                    with stopwatch(timings):
+                        self.handle_request(alias)
+            finally:
+                connections[alias].close()
+                with samples_lock:
+                    samples.extend(timings)
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        report = summarize(samples, elapsed)
+        if mode == "pooled":
+            report["pool"] = get_pool(connections.settings[alias]).stats()
+            close_pools(connections.settings[alias]["NAME"])
+
+        return report
+
+    @staticmethod
+    def handle_request(alias):
+        """
+        mirrors what a request does with its connection: Django checks it on
+        request_started, the view queries, and request_finished releases it
+        """
+
+        connection = connections[alias]
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        connection.close_if_unusable_or_obsolete()
@@ -0,0 +1,82 @@
+import io
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from account.models import Account
+from crud.models import PriorityLevel, ToDo
+from crud.serializers import FastToDoSerializer
+from todo import fast_json
+from todo.benchmarks import benchmark_database, stopwatch, summarize, write_report
+
+
+class Command(BaseCommand):
+    help = "compares encode and parse times and response sizes of DRF's JSON renderer and todo.fast_json"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="ToDos in the list")
+        parser.add_argument("--repeat", type=int, default=20, help="times each path encodes the list")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            report = self.run(options["rows"], options["repeat"])
+
+        write_report(self.stdout, report)
+
+    def run(self, rows, repeat):
+        user = Account.objects.create_user("Bench", "JSON", "bench.json@example.com", "BenchPASS1!")
+        priorities = [value for value, _ in PriorityLevel.choices]
+        ToDo.objects.bulk_create(
+            ToDo(
+                user=user, title=f"todo {i}", description="benchmark" if i % 2 else None,
+                priority=priorities[i % len(priorities)], due_date=date.today() + timedelta(days=i % 365),
+                time=time(i % 24, i % 60),
+            )
+            for i in range(rows)
+        )
+
+        context = {"request": SimpleNamespace(user=user)}
+        values = list(ToDo.objects.filter(user=user).values(*FastToDoSerializer.values_fields()))
+        converted = {"results": FastToDoSerializer(values, many=True, context=context).data}
+        native = {"results": FastToDoSerializer(values, many=True, context=context, native_temporal=True).data}
+
+        def without_orjson(render):
+            def run():
+                with mock.patch.object(fast_json, "orjson", None):
+                    return render()
+            return run
+
+        encoders = {
+            "drf": lambda: JSONRenderer().render(converted),
+            "fast_stdlib": without_orjson(lambda: fast_json.FastJSONRenderer().render(native)),
+        }
+        if fast_json.orjson is not None:
+            encoders["fast_orjson"] = lambda: fast_json.FastJSONRenderer().render(native)
+
+        report = {"encode": {}, "parse": {}}
+        body = b""
+        for name, encode in encoders.items():
+            samples = []
+            for _ in range(repeat):
+                with stopwatch(samples):
+                    body = encode()
+
+            summary = summarize(samples)
+            summary["rows_per_sec"] = round(rows * len(samples) / sum(samples), 1)
+            summary["bytes"] = len(body)
+            report["encode"][name] = summary
+
+        parsers = {"drf": JSONParser(), "fast": fast_json.FastJSONParser()}
+        for name, parser in parsers.items():
+            samples = []
+            for _ in range(repeat):
+                with stopwatch(samples):
+                    parser.parse(io.BytesIO(body))
+
+            report["parse"][name] = summarize(samples)
+
+        return report
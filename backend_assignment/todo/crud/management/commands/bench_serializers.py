@@ -0,0 +1,60 @@
+from datetime import date, time as clock, timedelta
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from account.models import Account
+from crud.models import PriorityLevel, ToDo
+from crud.serializers import FastToDoSerializer, ToDoSerializer
+from todo.benchmarks import benchmark_database, stopwatch, summarize, write_report
+
+
+class Command(BaseCommand):
+    help = "measures rows/sec of ToDoSerializer and FastToDoSerializer on large ToDo lists"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10000, help="ToDos in the list")
+        parser.add_argument("--repeat", type=int, default=5, help="times each path serializes the list")
+
+    def handle(self, *args, **options):
+        with benchmark_database():
+            report = self.run(options["rows"], options["repeat"])
+
+        write_report(self.stdout, report)
+
+    def run(self, rows, repeat):
+        user = Account.objects.create_user("Bench", "Serializer", "bench.serializer@example.com", "BenchPASS1!")
+        priorities = [value for value, _ in PriorityLevel.choices]
+        ToDo.objects.bulk_create(
+            ToDo(
+                user=user, title=f"todo {i}", description="benchmark" if i % 2 else None,
+                priority=priorities[i % len(priorities)], due_date=date.today() + timedelta(days=i % 365),
+                time=clock(i % 24, i % 60),
+            )
+            for i in range(rows)
+        )
+
+        context = {"request": SimpleNamespace(user=user)}
+        todos = ToDo.objects.filter(user=user)
+        paths = {
+            "model_serializer": lambda: ToDoSerializer(
+                list(todos.only(*ToDoSerializer.Meta.fields)), many=True, context=context
+            ).data,
+            "fast_serializer": lambda: FastToDoSerializer(
+                list(todos.values(*FastToDoSerializer.values_fields())), many=True, context=context
+            ).data,
+        }
+
+        report = {}
+        for name, serialize in paths.items():
+            samples = []
+            for _ in range(repeat):
+                with stopwatch(samples):
+                    serialize()
+
+            summary = summarize(samples)
+            summary["rows_per_sec"] = round(rows * len(samples) / sum(samples), 1)
+            report[name] = summary
+
+        report["speedup"] = round(report["fast_serializer"]["rows_per_sec"] / report["model_serializer"]["rows_per_sec"], 2)
+        return report
@@ -0,0 +1,34 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from account.models import Account
+from crud.importers import IMPORT_FORMATS, ToDoImporter
+
+
+class Command(BaseCommand):
+    help = "imports ToDos for a user from an NDJSON or CSV file, reporting the rows that were rejected"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="file to import")
+        parser.add_argument("--email", required=True, help="email of the user who owns the imported ToDos")
+        parser.add_argument(
+            "--format", choices=list(IMPORT_FORMATS), help="file format, guessed from the extension by default"
+        )
+        parser.add_argument("--batch-size", type=int, default=1000, help="ToDos inserted per statement")
+
+    def handle(self, *args, **options):
+        import_format = options["format"] or os.path.splitext(options["path"])[1].lstrip(".").lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f"cannot tell the format of {options['path']}, pass --format")
+
+        try:
+            user = Account.objects.get(email=options["email"])
+        except Account.DoesNotExist:
+            raise CommandError(f"no user with the email {options['email']}")
+
+        with open(options["path"], "rb") as stream:
+            report = ToDoImporter(user, batch_size=options["batch_size"]).run(IMPORT_FORMATS[import_format](stream))
+
+        self.stdout.write(json.dumps(report, indent=2))
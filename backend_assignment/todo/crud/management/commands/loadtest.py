@@ -0,0 +1,221 @@
+import http.client
+import json
+import random
+import subprocess
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from crud.seeding import SEED_PASSWORD, WORDS, seed, seed_email
+from todo.benchmarks import benchmark_database, summarize, write_report
+
+
+# endpoints in the order a virtual user calls them
+ENDPOINTS = ["register", "login", "add", "list", "update", "complete", "delete"]
+
+
+class TestClientDriver:
+    """
+    sends requests to the app in process, through Django's test client
+    """
+
+    target = "test-client"
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        if not hasattr(self.local, "client"):
+            self.local.client = Client()
+
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = self.local.client.generic(
+            method, path, json.dumps(body) if body is not None else "",
+            content_type="application/json", headers=headers,
+        )
+        return response.status_code, response.content
+
+
+class HTTPDriver:
+    """
+    sends requests to a running server, on a new connection per request or
+    over one keep-alive connection per worker thread
+    """
+
+    def __init__(self, url, keep_alive=False):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise CommandError(f"Invalid server URL {url!r}!")
+
+        self.target = url
+        self.connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host, self.port, self.prefix = parts.hostname, parts.port, parts.path.rstrip("/")
+        self.keep_alive = keep_alive
+        self.local = threading.local()
+
+    def request(self, method, path, body=None, token=None):
+        headers = {"Accept": "application/json"}
+        if not self.keep_alive:
+            headers["Connection"] = "close"
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        payload = json.dumps(body).encode() if body is not None else None
+
+        for attempt in range(2):
+            if not hasattr(self.local, "connection"):
+                self.local.connection = self.connection_class(self.host, self.port, timeout=30)
+            try:
+                self.local.connection.request(method, self.prefix + path, payload, headers)
+                response = self.local.connection.getresponse()
+                content = response.read()
+                if not self.keep_alive:
+                    self.local.connection.close()
+                return response.status, content
+            except (ConnectionError, http.client.HTTPException):
+                # the server closed the kept-alive connection, retry once on a new one
+                self.local.connection.close()
+                del self.local.connection
+                if attempt:
+                    raise
+
+
+def git_commit():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+    return result.stdout.strip() or None
+
+
+class Command(BaseCommand):
+    help = (
+        "seeds users with ToDos and has one virtual user per seeded account register, log in, then add, "
+        "list, update, complete and delete ToDos, reporting throughput and latency percentiles per endpoint; "
+        "runs in process against a throwaway test database, or against a server seeded with seed_todos "
+        "when --url is given"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20, help="seeded accounts, one virtual user each")
+        parser.add_argument("--todos", type=int, default=100, help="seeded ToDos per user")
+        parser.add_argument("--operations", type=int, default=5, help="add, list, update, complete and delete rounds per user")
+        parser.add_argument(
+            "--concurrency", type=int, default=1,
+            help="virtual users running at once; in process, use a database that allows concurrent writers",
+        )
+        parser.add_argument("--seed", type=int, default=0, help="random seed, the same seed replays the same run")
+        parser.add_argument("--url", help="base URL of a running server seeded with seed_todos, e.g. http://127.0.0.1:8000")
+        parser.add_argument("--password", default=SEED_PASSWORD, help="password of the seeded accounts")
+        parser.add_argument(
+            "--keep-alive", action="store_true",
+            help="reuse connections with --url; runserver stalls ~40 ms per kept-alive request on delayed ACKs",
+        )
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            report = self.run(HTTPDriver(options["url"], options["keep_alive"]), options)
+        else:
+            with benchmark_database():
+                seed(options["users"], options["todos"], password=options["password"], seed=options["seed"])
+                report = self.run(TestClientDriver(), options)
+
+        write_report(self.stdout, report)
+
+    def run(self, driver, options):
+        run_id = uuid.uuid4().hex[:8]
+
+        def run_user(index):
+            return self.run_user(driver, index, run_id, options)
+
+        start = time.perf_counter()
+        if options["concurrency"] > 1:
+            with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+                results = list(executor.map(run_user, range(options["users"])))
+        else:
+            results = [run_user(index) for index in range(options["users"])]
+        elapsed = time.perf_counter() - start
+
+        samples, errors = defaultdict(list), Counter()
+        for user_samples, user_errors in results:
+            for endpoint, durations in user_samples.items():
+                samples[endpoint].extend(durations)
+            errors.update(user_errors)
+
+        endpoints = {}
+        for endpoint in ENDPOINTS:
+            endpoints[endpoint] = summarize(samples[endpoint], elapsed)
+            endpoints[endpoint]["errors"] = errors[endpoint]
+
+        total = summarize([duration for durations in samples.values() for duration in durations], elapsed)
+        total["errors"] = sum(errors.values())
+
+        return {
+            "target": driver.target,
+            "commit": git_commit(),
+            "options": {name: options[name] for name in ("users", "todos", "operations", "concurrency", "seed")},
+            "elapsed_s": round(elapsed, 3),
+            "endpoints": endpoints,
+            "total": total,
+        }
+
+    def run_user(self, driver, index, run_id, options):
+        """
+        runs the scenario of one virtual user, returning the durations of its
+        successful requests and the number of failed ones, per endpoint
+        """
+
+        rng = random.Random(f"{options['seed']}:{index}")
+        samples, errors = defaultdict(list), Counter()
+
+        def call(endpoint, expected_status, method, path, body=None, token=None):
+            start = time.perf_counter()
+            status_code, content = driver.request(method, path, body, token)
+            elapsed = time.perf_counter() - start
+            if status_code != expected_status:
+                errors[endpoint] += 1
+                return None
+
+            samples[endpoint].append(elapsed)
+            return json.loads(content) if content else {}
+
+        call("register", 201, "POST", reverse("register"), {
+            "firstname": "Load", "lastname": "Test", "email": f"loadtest.{run_id}.{index}@example.com",
+            "password": options["password"], "confirm_password": options["password"],
+        })
+
+        tokens = call("login", 200, "POST", reverse("login"), {"email": seed_email(index), "password": options["password"]})
+        if tokens is None:
+            return samples, errors
+        token = tokens["access"]
+
+        today = timezone.localdate()
+        for _ in range(options["operations"]):
+            todo = call("add", 201, "POST", reverse("add"), {
+                "title": " ".join(rng.sample(WORDS, 3)).capitalize(),
+                "due_date": (today + timedelta(days=rng.randint(0, 30))).isoformat(),
+                "time": f"{rng.randint(8, 18):02d}:00",
+            }, token)
+            call("list", 200, "GET", reverse("list"), token=token)
+            if todo is None:
+                continue
+
+            call("update", 200, "PATCH", reverse("update", args=[todo["id"]]), {"title": "Updated"}, token)
+            call("complete", 200, "PATCH", reverse("complete", args=[todo["id"]]), token=token)
+            call("delete", 204, "DELETE", reverse("delete", args=[todo["id"]]), token=token)
+
+        return samples, errors
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from crud.models import ToDoTombstone
+from crud.sync import tombstone_cutoff
+
+
+class Command(BaseCommand):
+    help = "removes the tombstones of ToDos deleted more than TODO_TOMBSTONE_RETENTION_DAYS ago"
+
+    def handle(self, *args, **options):
+        count, _ = ToDoTombstone.objects.filter(deleted_at__lt=tombstone_cutoff()).delete()
+        self.stdout.write(f"Removed {count} tombstones.")
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from account.models import Account
+from crud.seeding import SEED_PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "creates seed.user<i>@example.com accounts with generated ToDos in the configured database, "
+        "for loadtest --url runs against a local server"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--todos", type=int, default=100, help="ToDos per user")
+        parser.add_argument("--password", default=SEED_PASSWORD)
+        parser.add_argument("--seed", type=int, default=0, help="random seed, the same seed generates the same data")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        if Account.objects.filter(email__startswith="seed.user").exists():
+            raise CommandError("The database is already seeded, delete the seed.user accounts first!")
+
+        accounts = seed(
+            options["users"], options["todos"], password=options["password"],
+            seed=options["seed"], batch_size=options["batch_size"],
+        )
+        self.stdout.write(f"Created {len(accounts)} accounts with {options['todos']} ToDos each.")
@@ -0,0 +1,30 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from crud.reminders import ReminderScanner, get_sink
+
+
+class Command(BaseCommand):
+    help = "sends the reminders and overdue notices of ToDos that came due since the last run"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="keep running, scanning every --interval seconds")
+        parser.add_argument("--interval", type=float, default=60)
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--workers", type=int, default=8, help="threads sending notifications")
+        parser.add_argument("--sink", help="dotted path of the sink class, REMINDER_SINK by default")
+
+    def handle(self, *args, **options):
+        scanner = ReminderScanner(get_sink(options["sink"]), options["batch_size"], options["workers"])
+
+        while True:
+            self.stdout.write(json.dumps(scanner.run()))
+            if not options["loop"]:
+                break
+
+            try:
+                time.sleep(options["interval"])
+            except KeyboardInterrupt:
+                break
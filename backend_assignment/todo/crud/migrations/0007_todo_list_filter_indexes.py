@@ -0,0 +1,31 @@
+# Generated by Django 5.0.2 on 2026-10-18 08:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0006_todo_tombstone_sync'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['user', '-created_at', '-id'], name='crud_todo_user_open_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed', True)), fields=['user', '-created_at', '-id'], name='crud_todo_user_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'priority', '-created_at', '-id'], name='crud_todo_user_priority_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(fields=['user', 'due_date', 'id'], name='crud_todo_user_due_idx'),
+        ),
+    ]
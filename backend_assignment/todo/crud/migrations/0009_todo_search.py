@@ -0,0 +1,79 @@
+from django.db import migrations
+
+
+# title matches weigh more than description matches, see crud/search.py
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE crud_todo ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX crud_todo_search_idx ON crud_todo USING GIN (search_vector)",
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX crud_todo_search_idx",
+    "ALTER TABLE crud_todo DROP COLUMN search_vector",
+]
+
+# an external content table over crud_todo, kept in sync by triggers so that bulk inserts,
+# UPDATE ... RETURNING and queryset deletes are indexed too; crud.checks warns when a
+# later migration made SQLite rebuild crud_todo, which drops these triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE crud_todo_search USING fts5(
+        title, description, content='crud_todo', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER crud_todo_search_insert AFTER INSERT ON crud_todo BEGIN
+        INSERT INTO crud_todo_search(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER crud_todo_search_delete AFTER DELETE ON crud_todo BEGIN
+        INSERT INTO crud_todo_search(crud_todo_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER crud_todo_search_update AFTER UPDATE OF title, description ON crud_todo BEGIN
+        INSERT INTO crud_todo_search(crud_todo_search, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO crud_todo_search(rowid, title, description) VALUES (new.id, new.title, new.description);
+    END
+    """,
+    # index the existing ToDos
+    "INSERT INTO crud_todo_search(crud_todo_search) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER crud_todo_search_update",
+    "DROP TRIGGER crud_todo_search_delete",
+    "DROP TRIGGER crud_todo_search_insert",
+    "DROP TABLE crud_todo_search",
+]
+
+
+def run(statements_by_vendor):
+    def operation(apps, schema_editor):
+        # other databases have no text index, search falls back to substring matching there
+        for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0008_reminder_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({"postgresql": POSTGRESQL_FORWARD, "sqlite": SQLITE_FORWARD}),
+            run({"postgresql": POSTGRESQL_BACKWARD, "sqlite": SQLITE_BACKWARD}),
+        ),
+    ]
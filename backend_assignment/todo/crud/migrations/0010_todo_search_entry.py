@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0009_todo_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ToDoSearchEntry',
+            fields=[
+                ('todo', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='crud.todo')),
+                ('document', models.TextField(db_column='crud_todo_search')),
+            ],
+            options={
+                'db_table': 'crud_todo_search',
+                'managed': False,
+            },
+        ),
+    ]
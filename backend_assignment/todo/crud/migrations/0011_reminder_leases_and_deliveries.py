@@ -0,0 +1,54 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0010_todo_search_entry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderDelivery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('due_date', models.DateField()),
+                ('time', models.TimeField()),
+                ('sent_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='remindercheckpoint',
+            name='lease_owner',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='remindercheckpoint',
+            name='leased_until',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddField(
+            model_name='remindercheckpoint',
+            name='scanned_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.AddIndex(
+            model_name='todo',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['updated_at', 'id'], name='crud_todo_open_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='reminderdelivery',
+            name='todo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reminder_deliveries', to='crud.todo'),
+        ),
+        migrations.AddConstraint(
+            model_name='reminderdelivery',
+            constraint=models.UniqueConstraint(fields=('todo', 'kind', 'due_date', 'time'), name='crud_reminder_delivery_unique'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.2 on 2026-10-18 09:32
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crud', '0011_reminder_leases_and_deliveries'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='todo',
+            name='crud_todo_user_open_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='todo',
+            name='crud_todo_user_done_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='todo',
+            name='crud_todo_user_due_idx',
+        ),
+    ]
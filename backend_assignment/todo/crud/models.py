@@ -1,8 +1,12 @@
-from django.db import models
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
+from django.db.models.sql import UpdateQuery
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from account.models import Account
 
+
 class PriorityLevel(models.TextChoices):
     """
     defines the priority levels for a ToDo object
@@ -13,6 +17,51 @@ class PriorityLevel(models.TextChoices):
     LOW = 'low', _('low')
 
 
+class ToDoQuerySet(models.QuerySet):
+
+    def update_returning(self, **values):
+        """
+        applies values to the matched ToDos and returns the updated rows, in
+        a single UPDATE ... RETURNING statement where the backend supports it
+        """
+
+        connection = connections[self.db]
+        if not connection.features.can_return_columns_from_insert:
+            with transaction.atomic(using=self.db):
+                ids = list(self.select_for_update().values_list("id", flat=True))
+                self.model._base_manager.using(self.db).filter(id__in=ids).update(**values)
+                return list(self.model._base_manager.using(self.db).filter(id__in=ids))
+
+        query = self.query.chain(UpdateQuery)
+        query.add_update_values(values)
+        compiler = query.get_compiler(self.db)
+        compiler.pre_sql_setup()
+        try:
+            sql, params = compiler.as_sql()
+        except EmptyResultSet:
+            return []
+
+        columns = ", ".join(
+            connection.ops.quote_name(field.column) for field in self.model._meta.concrete_fields
+        )
+        return list(self.model._base_manager.using(self.db).raw(f"{sql} RETURNING {columns}", params))
+
+    def delete_with_tombstones(self):
+        """
+        deletes the matched ToDos and records a tombstone for each of them, so
+        that delta syncs can report the deletion; returns the deleted ids
+        """
+
+        with transaction.atomic(using=self.db):
+            rows = list(self.select_for_update().values_list("id", "user_id"))
+            ToDoTombstone.objects.using(self.db).bulk_create(
+                ToDoTombstone(todo_id=todo_id, user_id=user_id) for todo_id, user_id in rows
+            )
+            self.model._base_manager.using(self.db).filter(id__in=[todo_id for todo_id, _ in rows]).delete()
+
+        return [todo_id for todo_id, _ in rows]
+
+
 class ToDo(models.Model):
     """
     defines attributes for a ToDo object
@@ -39,8 +88,139 @@ class ToDo(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = ToDoQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            # the list page of a user's ToDos in the default -created_at order, seeking to its
+            # keyset cursor; pages filtered on completion or sorted on due date also walk it
+            # and filter or sort one user's rows rather than keep an index each
+            models.Index(fields=["user", "-created_at", "-id"], name="crud_todo_user_created_idx"),
+            # a user's ToDos changed since a delta sync watermark, in (updated_at, id) order
+            models.Index(fields=["user", "updated_at", "id"], name="crud_todo_user_updated_idx"),
+            # list pages filtered on priority, in the default order
+            models.Index(fields=["user", "priority", "-created_at", "-id"], name="crud_todo_user_priority_idx"),
+            # a user's open ToDos due before a date, in due order, partial so completed rows cost nothing
+            models.Index(
+                fields=["user", "due_date", "time"], condition=models.Q(completed=False),
+                name="crud_todo_user_open_due_idx",
+            ),
+            # the reminder scan walk over all users' open ToDos, in (due_date, time, id) order
+            models.Index(
+                fields=["due_date", "time", "id"], condition=models.Q(completed=False),
+                name="crud_todo_open_due_idx",
+            ),
+            # the reminder catch-up of open ToDos added or changed since the last scan
+            models.Index(
+                fields=["updated_at", "id"], condition=models.Q(completed=False),
+                name="crud_todo_open_updated_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"User: {self.user.firstname} {self.user.lastname}: {self.title}"
+
+
+class ToDoTombstone(models.Model):
+    """
+    records a deleted ToDo, so that delta syncs can report the deletion
+
+    Attributes:
+        - user (ForeignKey): user who owned the deleted ToDo
+        - todo_id (BigIntegerField): id of the deleted ToDo
+        - deleted_at (DateTimeField): date and time the ToDo was deleted
+    """
+
+    user = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="deleted_todos")
+    todo_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # a user's deletions since a delta sync watermark
+            models.Index(fields=["user", "deleted_at", "id"], name="crud_tombstone_user_del_idx"),
+        ]
+
+    def __str__(self):
+        return f"ToDo {self.todo_id} deleted at {self.deleted_at}"
+
+
+class ReminderCheckpoint(models.Model):
+    """
+    records how far the reminder scanner got, so that a restarted scanner
+    resumes after the last ToDo it notified
+
+    Attributes:
+        - kind (CharField): kind of notification the scan sends, e.g. reminder or overdue
+        - due_date (DateField): due date of the last ToDo notified
+        - time (TimeField): due time of the last ToDo notified
+        - todo_id (BigIntegerField): id of the last ToDo notified
+        - scanned_at (DateTimeField): start of the last scan that completed, ToDos
+            changed since are checked for due times behind the checkpoint
+        - lease_owner (CharField): scanner currently sending notifications of this kind
+        - leased_until (DateTimeField): time the lease of a scanner that died runs out
+        - updated_at (DateTimeField): date and time the checkpoint last moved
+    """
+
+    kind = models.CharField(max_length=20, unique=True)
+    due_date = models.DateField()
+    time = models.TimeField()
+    todo_id = models.BigIntegerField(default=0)
+    scanned_at = models.DateTimeField(null=True)
+    lease_owner = models.CharField(max_length=32, blank=True)
+    leased_until = models.DateTimeField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.kind} scanned up to {self.due_date} {self.time} (ToDo {self.todo_id})"
+
+
+class ReminderDelivery(models.Model):
+    """
+    records a notification sent for a ToDo, so that a ToDo changed after it
+    was notified is not notified again for the same due time
+
+    Attributes:
+        - todo (ForeignKey): ToDo the notification was about
+        - kind (CharField): kind of notification sent, e.g. reminder or overdue
+        - due_date (DateField): due date the ToDo had when it was notified
+        - time (TimeField): due time the ToDo had when it was notified
+        - sent_at (DateTimeField): date and time the notification was sent
+    """
+
+    todo = models.ForeignKey(ToDo, on_delete=models.CASCADE, related_name="reminder_deliveries")
+    kind = models.CharField(max_length=20)
+    due_date = models.DateField()
+    time = models.TimeField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
     class Meta:
-        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(fields=["todo", "kind", "due_date", "time"], name="crud_reminder_delivery_unique"),
+        ]
 
     def __str__(self):
-        return f"User: {self.user.firstname} {self.user.lastname}: {self.title}"
\ No newline at end of file
+        return f"{self.kind} of ToDo {self.todo_id} due {self.due_date} {self.time}"
+
+
+class ToDoSearchEntry(models.Model):
+    """
+    a row of the crud_todo_search FTS5 table that indexes ToDo titles and
+    descriptions on SQLite, see migration 0009 and crud.search; the table is
+    created by the migration, and does not exist on other databases
+
+    Attributes:
+        - todo (OneToOneField): indexed ToDo, stored as the row's rowid
+        - document (TextField): FTS5's hidden column named after the table,
+            which full-text queries and ranking functions are applied to
+    """
+
+    todo = models.OneToOneField(
+        ToDo, on_delete=models.DO_NOTHING, primary_key=True, db_column="rowid", related_name="search_entry"
+    )
+    document = models.TextField(db_column="crud_todo_search")
+
+    class Meta:
+        managed = False
+        db_table = "crud_todo_search"
@@ -0,0 +1,188 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    paginates a queryset on a unique (field, id) key so that every page is
+    a single index range scan, no matter how deep the client has scrolled
+
+    the cursors handed out in the next/previous links are opaque, base64
+    encoded positions of the last/first row of the current page
+    """
+
+    cursor_query_param = "cursor"
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = ("-created_at", "-id")
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.paginate_rows(list(self.prepare(queryset, request, view)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        async variant of paginate_queryset, for views running under ASGI
+        """
+
+        return self.paginate_rows([row async for row in self.prepare(queryset, request)])
+
+    def prepare(self, queryset, request, view=None):
+        """
+        reads the page size and cursor from the request and returns the
+        queryset of the rows to fetch, one more than the page size
+        """
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        ordering = self.get_ordering(view)
+        self.field = queryset.model._meta.get_field(ordering[0].lstrip("-"))
+        self.descending = ordering[0].startswith("-")
+        self.cursor = self.decode_cursor(request)
+
+        self.reverse = self.cursor is not None and self.cursor[2]
+        return self.get_page_queryset(queryset, self.reverse)[:self.page_size + 1]
+
+    def paginate_rows(self, rows):
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if self.reverse:
+            # rows were fetched walking backwards from the cursor
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_page_queryset(self, queryset, reverse=False):
+        """
+        orders the queryset on the keyset and filters it to the rows after
+        the current cursor position
+        """
+
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        queryset = queryset.order_by(f"{prefix}{self.field.name}", f"{prefix}id")
+
+        if self.cursor is not None:
+            value, pk, _ = self.cursor
+            lookup = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{self.field.name}__{lookup}": value})
+                | Q(**{self.field.name: value, f"id__{lookup}": pk})
+            )
+
+        return queryset
+
+    def get_ordering(self, view=None):
+        """
+        returns the keyset ordering, which views that let the client choose
+        the sort key provide through a get_ordering() method
+        """
+
+        if view is not None and hasattr(view, "get_ordering"):
+            return view.get_ordering()
+
+        return self.ordering
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+
+        if page_size <= 0:
+            return self.page_size
+
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request):
+        """
+        returns the (value, id, reverse) position encoded in the request's
+        cursor, or None when the first page is requested
+        """
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = urlsafe_b64decode(encoded.encode("ascii")).decode("ascii")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            value = self.field.to_python(tokens["p"][0])
+            pk = int(tokens["i"][0])
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return value, pk, reverse
+
+    def encode_cursor(self, row, reverse=False):
+        if isinstance(row, dict):
+            # a values() row, the keyset columns are all that is needed
+            row = self.field.model(id=row["id"], **{self.field.attname: row[self.field.attname]})
+
+        tokens = {"p": self.field.value_to_string(row), "i": row.pk}
+        if reverse:
+            tokens["r"] = "1"
+
+        querystring = parse.urlencode(tokens, doseq=True)
+        encoded = urlsafe_b64encode(querystring.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        return {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+
+class ToDoCursorPagination(KeysetCursorPagination):
+    """
+    paginates ToDo lists newest first, matching ToDo.Meta.ordering
+    """
+
+    ordering = ("-created_at", "-id")
+
+
+class ToDoSearchPagination(PageNumberPagination):
+    """
+    paginates ranked search results by page number, since a rank is only
+    known once the query has been matched against every candidate anyway
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
@@ -0,0 +1,319 @@
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import router, transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ReminderCheckpoint, ReminderDelivery, ToDo
+
+
+logger = logging.getLogger(__name__)
+
+# ToDo values a notification is built from
+NOTIFICATION_FIELDS = ["id", "user_id", "user__email", "title", "priority", "due_date", "time"]
+
+
+class FileSink:
+    """
+    appends notifications to REMINDER_FILE, one JSON object per line
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.REMINDER_FILE
+        self.lock = threading.Lock()
+
+    def send(self, notification):
+        line = json.dumps(notification) + "\n"
+        with self.lock, open(self.path, "a") as file:
+            file.write(line)
+
+
+class MemorySink:
+    """
+    keeps notifications in memory, for tests and dry runs
+    """
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, notification):
+        with self.lock:
+            self.sent.append(notification)
+
+
+def get_sink(path=None):
+    """
+    returns an instance of the sink class at the dotted path, REMINDER_SINK by default
+    """
+
+    return import_string(path or settings.REMINDER_SINK)()
+
+
+def due_position(moment):
+    """
+    returns the (due_date, time) a moment falls on; due dates and times are
+    stored in the TIME_ZONE setting
+    """
+
+    moment = timezone.localtime(moment)
+    return moment.date(), moment.time()
+
+
+def after_position(due_date, time, todo_id):
+    return Q(due_date__gt=due_date) | Q(due_date=due_date, time__gt=time) | Q(due_date=due_date, time=time, id__gt=todo_id)
+
+
+def until_position(due_date, time):
+    return Q(due_date__lt=due_date) | Q(due_date=due_date, time__lte=time)
+
+
+def build_notification(kind, row):
+    due = f"{row['due_date'].isoformat()}T{row['time'].isoformat()}"
+    return {
+        # sinks can drop repeats by key, a ToDo moved to a new due time gets a new one
+        "key": f"{kind}:{row['id']}:{due}",
+        "kind": kind,
+        "todo_id": row["id"],
+        "user_id": row["user_id"],
+        "email": row["user__email"],
+        "title": row["title"],
+        "priority": row["priority"],
+        "due": due,
+    }
+
+
+class ReminderScanner:
+    """
+    notifies the owners of open ToDos once when they come due within
+    REMINDER_LEAD_MINUTES ("reminder"), and once when they become overdue
+    ("overdue")
+
+    each kind walks the open ToDos in (due_date, time, id) order on the
+    partial crud_todo_open_due_idx index, batch_size rows at a time, from its
+    ReminderCheckpoint up to the current due horizon; reminders skip the
+    ToDos that are overdue already, e.g. after a downtime. ToDos added or moved
+    behind the checkpoint since the last scan are then caught up on the
+    crud_todo_open_updated_idx index, skipping those already notified for
+    their due time, see ReminderDelivery
+
+    a scanner leases a kind's checkpoint in a short transaction, so that
+    concurrent scanners skip it, and sends every batch outside of any
+    transaction on a pool of worker threads. the notifications delivered are
+    then recorded, and the checkpoint moved past them, in a transaction per
+    batch, which also renews the lease; the lease of a scanner that died
+    runs out after REMINDER_LEASE_SECONDS
+
+    a failed delivery stops its kind until the next run, which retries it;
+    a scanner that dies while sending may resend up to one batch, which
+    sinks can recognise by the notification key. the first run starts at
+    the current time
+    """
+
+    def __init__(self, sink, batch_size=500, workers=8, using=None):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.workers = workers
+        self.using = using or router.db_for_write(ReminderCheckpoint)
+        self.owner = uuid.uuid4().hex
+
+    def horizons(self, now):
+        return {
+            "reminder": due_position(now + timedelta(minutes=settings.REMINDER_LEAD_MINUTES)),
+            "overdue": due_position(now),
+        }
+
+    def run(self, now=None):
+        """
+        sends the notifications that came due since the last run, and returns
+        the number sent and failed of each kind
+        """
+
+        now = now or timezone.now()
+        report = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for kind, horizon in self.horizons(now).items():
+                # ToDos that are overdue already get an overdue notice rather than a reminder
+                floor = due_position(now) if kind == "reminder" else None
+                report[kind] = self.scan(kind, horizon, floor, due_position(now), executor)
+
+        return report
+
+    def scan(self, kind, horizon, floor, start, executor):
+        # changes are compared to the clock, not to the moment the scan is for, and writes
+        # still committing as the scan starts are looked at again by the next one
+        scanned_at = timezone.now() - timedelta(seconds=settings.TODO_SYNC_LAG)
+        report = {"sent": 0, "failed": 0}
+        checkpoint = self.lease(kind, start)
+        if checkpoint is None:
+            logger.info("%s notifications are being sent by another scanner", kind)
+            return report
+
+        try:
+            self.send_batches(
+                kind, checkpoint, lambda: self.next_batch(checkpoint, horizon, floor), executor, report,
+                moves_checkpoint=True,
+            )
+            # the first scan starts at the current time, nothing is behind it yet
+            if not report["failed"] and checkpoint.scanned_at is not None:
+                self.send_batches(
+                    kind, checkpoint, lambda: self.next_caught_up_batch(kind, checkpoint, floor), executor, report,
+                )
+        finally:
+            self.release(kind, None if report["failed"] else scanned_at)
+
+        return report
+
+    def send_batches(self, kind, checkpoint, next_batch, executor, report, moves_checkpoint=False):
+        """
+        sends and records batches until one comes up short, a delivery fails
+        or another scanner takes the lease over
+        """
+
+        while True:
+            rows = list(next_batch())
+            if not rows:
+                return
+
+            delivered = self.deliver(kind, rows, executor)
+            report["sent"] += delivered
+            if delivered and not self.record(kind, checkpoint, rows[:delivered], moves_checkpoint):
+                logger.warning("lost the lease on %s notifications", kind)
+                report["failed"] += 1
+                return
+            if delivered < len(rows):
+                report["failed"] += 1
+                return
+            if len(rows) < self.batch_size:
+                return
+
+    def lease(self, kind, start):
+        """
+        returns the checkpoint of a kind once this scanner holds its lease,
+        or None while another scanner holds it
+        """
+
+        due_date, time = start
+        now = timezone.now()
+        with transaction.atomic(using=self.using):
+            checkpoint, _ = ReminderCheckpoint.objects.using(self.using).select_for_update().get_or_create(
+                kind=kind, defaults={"due_date": due_date, "time": time},
+            )
+            if checkpoint.leased_until is not None and checkpoint.leased_until > now:
+                return None
+
+            checkpoint.lease_owner = self.owner
+            checkpoint.leased_until = now + timedelta(seconds=settings.REMINDER_LEASE_SECONDS)
+            checkpoint.save(using=self.using)
+
+        return checkpoint
+
+    def record(self, kind, checkpoint, rows, moves_checkpoint):
+        """
+        records the delivered rows of a batch and renews the lease, moving
+        the checkpoint past them when they came from the due order walk;
+        returns False if another scanner took the lease over
+        """
+
+        now = timezone.now()
+        values = {"leased_until": now + timedelta(seconds=settings.REMINDER_LEASE_SECONDS), "updated_at": now}
+        if moves_checkpoint:
+            last = rows[-1]
+            checkpoint.due_date, checkpoint.time, checkpoint.todo_id = last["due_date"], last["time"], last["id"]
+            values.update(due_date=last["due_date"], time=last["time"], todo_id=last["id"])
+
+        with transaction.atomic(using=self.using):
+            leased = ReminderCheckpoint.objects.using(self.using).filter(
+                kind=kind, lease_owner=self.owner,
+            ).update(**values)
+            if leased:
+                # ToDos deleted since they were sent have nothing to record, the others are
+                # locked so that they cannot be deleted before the deliveries referring to them commit
+                existing = set(
+                    ToDo.objects.using(self.using).select_for_update()
+                    .filter(id__in=[row["id"] for row in rows]).order_by().values_list("id", flat=True)
+                )
+                ReminderDelivery.objects.using(self.using).bulk_create(
+                    [
+                        ReminderDelivery(todo_id=row["id"], kind=kind, due_date=row["due_date"], time=row["time"])
+                        for row in rows if row["id"] in existing
+                    ],
+                    ignore_conflicts=True,
+                )
+
+        return bool(leased)
+
+    def release(self, kind, scanned_at):
+        values = {"lease_owner": "", "leased_until": None}
+        if scanned_at is not None:
+            values["scanned_at"] = scanned_at
+        ReminderCheckpoint.objects.using(self.using).filter(kind=kind, lease_owner=self.owner).update(**values)
+
+    def next_batch(self, checkpoint, horizon, floor=None):
+        """
+        returns the open ToDos after the checkpoint, up to the horizon, in due
+        order; those up to the floor are skipped, e.g. after a downtime
+        """
+
+        due_date, time = horizon
+        start = checkpoint.due_date
+        queryset = (
+            ToDo.objects.using(self.using)
+            .filter(after_position(checkpoint.due_date, checkpoint.time, checkpoint.todo_id))
+            .filter(until_position(due_date, time))
+        )
+        if floor is not None:
+            queryset = queryset.exclude(until_position(*floor))
+            start = max(start, floor[0])
+
+        return (
+            # the outer bounds make the index walk a range seek instead of a full scan
+            queryset.filter(completed=False, due_date__gte=start, due_date__lte=due_date)
+            .order_by("due_date", "time", "id")
+            .values(*NOTIFICATION_FIELDS)[:self.batch_size]
+        )
+
+    def next_caught_up_batch(self, kind, checkpoint, floor):
+        """
+        returns open ToDos changed since the last scan whose due time is
+        behind the checkpoint, and that were not notified for it yet;
+        delivered rows are recorded, so each call returns the next batch
+        """
+
+        delivered = ReminderDelivery.objects.using(self.using).filter(
+            todo=OuterRef("id"), kind=kind, due_date=OuterRef("due_date"), time=OuterRef("time"),
+        )
+        queryset = (
+            ToDo.objects.using(self.using)
+            .filter(completed=False, updated_at__gte=checkpoint.scanned_at)
+            .filter(until_position(checkpoint.due_date, checkpoint.time))
+            .exclude(Exists(delivered))
+        )
+        if floor is not None:
+            queryset = queryset.exclude(until_position(*floor))
+
+        return queryset.order_by("updated_at", "id").values(*NOTIFICATION_FIELDS)[:self.batch_size]
+
+    def deliver(self, kind, rows, executor):
+        """
+        sends the notifications of a batch, returning how many of them, in
+        order, were delivered before the first failure
+        """
+
+        def send(notification):
+            try:
+                self.sink.send(notification)
+            except Exception:
+                logger.exception("could not send %s", notification["key"])
+                return False
+            return True
+
+        results = list(executor.map(send, (build_notification(kind, row) for row in rows)))
+        return results.index(False) if False in results else len(results)
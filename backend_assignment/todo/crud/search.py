@@ -0,0 +1,83 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Func, Lookup, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models import ToDo, ToDoSearchEntry
+
+
+# longest search query accepted, and the most terms of it that are matched
+MAX_QUERY_LENGTH = 200
+MAX_TERMS = 16
+
+# text search configuration of the search_vector column, see migration 0009
+SEARCH_CONFIG = "english"
+
+# the search_vector column and its GIN index on PostgreSQL, the FTS5 table and
+# the triggers keeping it in sync on SQLite, see crud.checks
+SEARCH_VECTOR = "search_vector"
+SEARCH_INDEX = "crud_todo_search_idx"
+SEARCH_TABLE = ToDoSearchEntry._meta.db_table
+SEARCH_TRIGGERS = ["crud_todo_search_insert", "crud_todo_search_delete", "crud_todo_search_update"]
+
+
+@ToDoSearchEntry._meta.get_field("document").register_lookup
+class Match(Lookup):
+    """
+    an FTS5 full-text query, e.g. search_entry__document__match='"weekly" "report"'
+    """
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+def search_terms(query):
+    """
+    splits a search query into the words to match, dropping punctuation
+    and operators so user input can never be a malformed text query
+    """
+
+    return re.findall(r"\w+", query)[:MAX_TERMS]
+
+
+def search_todos(queryset, query):
+    """
+    narrows a ToDo queryset to the ToDos whose title or description match
+    every term of the query, with a "rank" where higher is a better match
+    and title matches weigh 2.5 times description matches
+
+    uses the search_vector GIN index on PostgreSQL and the crud_todo_search
+    FTS5 table on SQLite, both stemmed, and unranked substring matching on
+    other databases
+    """
+
+    terms = search_terms(query)
+    table = ToDo._meta.db_table
+    vendor = connections[queryset.db].vendor
+
+    if vendor == "postgresql":
+        # the column is generated by the database, so it is not a model field
+        text = " ".join(terms)
+        tsquery = f"plainto_tsquery('{SEARCH_CONFIG}', %s)"
+        matches = RawSQL(f"{table}.{SEARCH_VECTOR} @@ {tsquery}", [text], output_field=BooleanField())
+        rank = RawSQL(f"ts_rank({table}.{SEARCH_VECTOR}, {tsquery})", [text], output_field=FloatField())
+        return queryset.filter(matches).annotate(rank=rank)
+
+    if vendor == "sqlite":
+        # every term quoted, as \w+ terms cannot contain quotes, and implicitly ANDed
+        match = " ".join(f'"{term}"' for term in terms)
+        # without statistics SQLite would rather walk the user's ToDos and match each of
+        # them, the subquery has it look the matches up first, also for counts
+        matches = ToDoSearchEntry.objects.filter(document__match=match).values("todo_id")
+        # bm25 is lower for better matches
+        rank = Func(F("search_entry__document"), Value(2.5), Value(1.0), function="bm25", output_field=FloatField())
+        return queryset.filter(id__in=matches, search_entry__document__match=match).annotate(rank=-rank)
+
+    for term in terms:
+        queryset = queryset.filter(Q(title__icontains=term) | Q(description__icontains=term))
+    return queryset.annotate(rank=Value(0.0))
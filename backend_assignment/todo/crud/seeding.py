@@ -0,0 +1,82 @@
+import random
+from datetime import time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import router, transaction
+from django.utils import timezone
+
+from account.models import Account
+from .models import PriorityLevel, ToDo
+
+
+SEED_PASSWORD = "SeedPASS1!"
+
+WORDS = [
+    "review", "draft", "call", "email", "plan", "fix", "ship", "book", "pay", "clean",
+    "report", "invoice", "meeting", "groceries", "dentist", "backlog", "budget", "slides", "garden", "taxes",
+]
+
+
+def seed_email(index):
+    return f"seed.user{index}@example.com"
+
+
+def generate_todos(rng, user, count, today):
+    """
+    yields count ToDos of a user, with titles, priorities, due dates and
+    completion drawn from rng
+    """
+
+    priorities = PriorityLevel.values
+    for _ in range(count):
+        title = " ".join(rng.sample(WORDS, 3)).capitalize()
+        yield ToDo(
+            user=user,
+            title=title,
+            description=f"{title}." if rng.random() < 0.5 else None,
+            priority=rng.choice(priorities),
+            due_date=today + timedelta(days=rng.randint(-30, 90)),
+            time=time(rng.randint(8, 18), rng.choice((0, 15, 30, 45))),
+            completed=rng.random() < 0.3,
+        )
+
+
+def seed(users, todos_per_user, password=SEED_PASSWORD, seed=0, batch_size=5000, using=None):
+    """
+    creates users accounts, seed.user<i>@example.com, with todos_per_user
+    ToDos each, in bulk inserts of batch_size rows; the same seed generates
+    the same data, with due dates relative to today
+
+    the password is hashed once and shared by every account, so seeding does
+    not spend its time in the password hasher; returns the accounts
+    """
+
+    using = using or router.db_for_write(ToDo)
+    rng = random.Random(seed)
+    encoded = make_password(password)
+    today = timezone.localdate()
+
+    with transaction.atomic(using=using):
+        accounts = Account.objects.using(using).bulk_create(
+            (
+                Account(firstname="Seed", lastname="User", email=seed_email(index), password=encoded)
+                for index in range(users)
+            ),
+            batch_size=batch_size,
+        )
+        if accounts and accounts[0].pk is None:
+            # backends that cannot return the ids of bulk inserted rows
+            accounts = list(Account.objects.using(using).filter(email__startswith="seed.user").order_by("id"))
+
+        batch = []
+        for account in accounts:
+            for todo in generate_todos(rng, account, todos_per_user, today):
+                batch.append(todo)
+                if len(batch) >= batch_size:
+                    ToDo.objects.using(using).bulk_create(batch)
+                    batch = []
+
+        if batch:
+            ToDo.objects.using(using).bulk_create(batch)
+
+    return accounts
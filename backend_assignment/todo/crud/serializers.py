@@ -1,9 +1,19 @@
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.utils import timezone
 from .models import ToDo, PriorityLevel
+from .search import MAX_QUERY_LENGTH, search_terms
 from account.models import Account
 
 
+# fields written by ToDoSerializer.update
+UPDATABLE_FIELDS = ["title", "description", "priority", "due_date", "time", "updated_at"]
+
+# keys the ToDo list can be sorted on, each backed by a (user, key, id) index
+LIST_ORDERINGS = ["created_at", "-created_at", "due_date", "-due_date", "updated_at", "-updated_at"]
+
+
 class ToDoSerializer(serializers.ModelSerializer):
     """
     serializes the ToDo model
@@ -17,19 +27,19 @@ class ToDoSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_at", "updated_at"]
 
-    def get_user(self, instance):
-        return self.context["request"].user.id
-
-    def validate_user(self, value):
+    def __init__(self, *args, fields=None, **kwargs):
         """
-        validates the user field
+        fields optionally narrows the serialized fields to a sparse fieldset
         """
 
-        if not Account.objects.filter(id=value).exists():
-            raise serializers.ValidationError("User does not exist!")
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_user(self, instance):
+        return self.context["request"].user.id
 
-        return value
-    
     def validate_due_date(self, value):
         """
         validates the due_date field
@@ -65,17 +75,212 @@ class ToDoSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         return ToDo.objects.create(**validated_data)
     
-    def update(self, instance, validated_data):
+    def apply(self, instance, validated_data):
+        """
+        copies the updatable fields in validated_data onto the instance
+        without saving it, so batches can be written with bulk_update
+        """
+
         instance.title = validated_data.get("title", instance.title)
         instance.description = validated_data.get("description", instance.description)
         instance.priority = validated_data.get("priority", instance.priority)
         instance.due_date = validated_data.get("due_date", instance.due_date)
         instance.time = validated_data.get("time", instance.time)
         instance.updated_at = validated_data.get("updated_at", timezone.now())
+        return instance
+
+    def update(self, instance, validated_data):
+        self.apply(instance, validated_data)
         instance.save()
         return instance
     
+    def get_owner(self, instance):
+        """
+        returns the owner of the ToDo, reusing the request's user when it is
+        the owner so that rendering a list does not query the user per row
+        """
+
+        request = self.context.get("request")
+        if request is not None and request.user.id == instance.user_id:
+            return request.user
+
+        return instance.user
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        representation["user"] = f"{instance.user.firstname} {instance.user.lastname}"
-        return representation
\ No newline at end of file
+        if "user" in representation:
+            owner = self.get_owner(instance)
+            representation["user"] = f"{owner.firstname} {owner.lastname}"
+        return representation
+
+
+def date_converter(output_format):
+    """
+    returns a function formatting dates and times like DRF's DateField and
+    TimeField do for output_format
+    """
+
+    if output_format is None:
+        return None
+    if output_format.lower() == ISO_8601:
+        return lambda value: value.isoformat()
+    return lambda value: value.strftime(output_format)
+
+
+def datetime_converter(output_format):
+    """
+    returns a function formatting datetimes like DRF's DateTimeField does
+    for output_format, in the current timezone
+    """
+
+    if output_format is None:
+        return None
+
+    current_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def convert(value):
+        if current_timezone is not None:
+            value = value.astimezone(current_timezone) if timezone.is_aware(value) \
+                else timezone.make_aware(value, current_timezone)
+
+        if output_format.lower() != ISO_8601:
+            return value.strftime(output_format)
+
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    return convert
+
+
+class FastToDoSerializer:
+    """
+    read-only counterpart of ToDoSerializer for ToDo values() rows
+
+    instead of running each value through a DRF field, every field gets a
+    converter compiled once per serializer, which produces the same output
+    for a fraction of the CPU time of large list responses; build the
+    values() call with values_fields()
+    """
+
+    def __init__(self, instance=None, many=False, context=None, fields=None, native_temporal=False, **kwargs):
+        """
+        native_temporal leaves dates, times and datetimes unconverted, for
+        renderers that format them the way DRF does themselves
+        """
+
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+        self.native_temporal = native_temporal
+        self.fields = [field for field in ToDoSerializer.Meta.fields if fields is None or field in fields]
+        self.owners = {}
+        self.converters = [(field, *self.get_converter(field)) for field in self.fields]
+
+    @staticmethod
+    def values_fields(fields=None):
+        """
+        returns the values() fields the serializer reads for a sparse fieldset
+        """
+
+        return [
+            "user_id" if field == "user" else field
+            for field in ToDoSerializer.Meta.fields if fields is None or field in fields
+        ]
+
+    def get_converter(self, field):
+        """
+        returns the values() key of a field, and the function converting its
+        non-null values, or None when they are output as they are
+        """
+
+        if field == "user":
+            return "user_id", self.get_owner_name
+        if field == "priority":
+            choices = {str(value): value for value, _ in PriorityLevel.choices}
+            return field, lambda value: choices.get(str(value), value)
+        if field in ("due_date", "time", "created_at", "updated_at") and self.native_temporal:
+            return field, None
+        if field == "due_date":
+            return field, date_converter(api_settings.DATE_FORMAT)
+        if field == "time":
+            return field, date_converter(api_settings.TIME_FORMAT)
+        if field in ("created_at", "updated_at"):
+            return field, datetime_converter(api_settings.DATETIME_FORMAT)
+
+        return field, None
+
+    def get_owner_name(self, user_id):
+        """
+        returns the owner's name, from the request's user when it is the owner
+        so that a list of the user's own ToDos does not query accounts
+        """
+
+        if user_id not in self.owners:
+            request = self.context.get("request")
+            owner = request.user if request is not None and request.user.id == user_id \
+                else Account.objects.only("firstname", "lastname").get(id=user_id)
+            self.owners[user_id] = f"{owner.firstname} {owner.lastname}"
+
+        return self.owners[user_id]
+
+    def to_representation(self, row):
+        representation = {}
+        for field, key, convert in self.converters:
+            value = row[key]
+            representation[field] = value if value is None or convert is None else convert(value)
+        return representation
+
+    @property
+    def data(self):
+        if self.many:
+            return [self.to_representation(row) for row in self.instance]
+
+        return self.to_representation(self.instance)
+
+
+class ToDoListQuerySerializer(serializers.Serializer):
+    """
+    validates the filter, ordering and sparse fieldset query parameters of
+    the ToDo list, e.g. ?completed=false&priority=high,medium&fields=id,title
+    """
+
+    completed = serializers.BooleanField(required=False, allow_null=True, default=None)
+    priority = serializers.MultipleChoiceField(choices=PriorityLevel.choices, required=False)
+    due_after = serializers.DateField(required=False)
+    due_before = serializers.DateField(required=False)
+    ordering = serializers.ChoiceField(choices=LIST_ORDERINGS, default="-created_at")
+    fields = serializers.MultipleChoiceField(choices=ToDoSerializer.Meta.fields, required=False)
+
+    # parameters that take a comma separated list of values
+    list_params = ["priority", "fields"]
+
+    def __init__(self, query_params, **kwargs):
+        data = query_params.dict()
+        for name in self.list_params:
+            if name in data:
+                data[name] = [value for value in data[name].split(",") if value]
+
+        super().__init__(data=data, **kwargs)
+
+    def validate(self, attrs):
+        if "due_after" in attrs and "due_before" in attrs and attrs["due_after"] > attrs["due_before"]:
+            raise serializers.ValidationError({"due_before": "Due date range cannot end before it starts!"})
+
+        return attrs
+
+
+class ToDoSearchQuerySerializer(ToDoListQuerySerializer):
+    """
+    validates the query parameters of a ToDo search, the list filters and
+    fields plus the search query, e.g. ?q=weekly+report&completed=false;
+    results are ordered by rank
+    """
+
+    q = serializers.CharField(max_length=MAX_QUERY_LENGTH)
+    ordering = None
+
+    def validate_q(self, value):
+        if not search_terms(value):
+            raise serializers.ValidationError("Search query must contain a word!")
+
+        return value
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate
+from .models import ToDo
+
+
+@receiver(post_save, sender=ToDo)
+@receiver(post_delete, sender=ToDo)
+def invalidate_cached_todos(sender, instance, **kwargs):
+    """
+    drops the owner's cached ToDo responses whenever one of their ToDos is
+    saved or deleted; bulk_create(), bulk_update() and QuerySet.update() do
+    not send these signals, so the views invalidate after those themselves
+    """
+
+    invalidate(instance.user_id)
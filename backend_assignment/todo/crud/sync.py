@@ -0,0 +1,128 @@
+import binascii
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import timedelta
+from urllib import parse
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .conditional import EPOCH
+from .models import ToDo, ToDoTombstone
+from .serializers import ToDoSerializer
+
+
+def to_microseconds(value):
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+class ResyncRequired(Exception):
+    """
+    raised for watermarks older than the tombstones are kept, whose client
+    may have missed deletions
+    """
+
+
+def encode_watermark(position, synced_at):
+    """
+    encodes the (changed_at, changed_id, deleted_at, deleted_id) position of
+    a delta sync, and the time it is complete up to, into an opaque watermark
+    for the client to send back
+    """
+
+    changed_at, changed_id, deleted_at, deleted_id = position
+    tokens = {
+        "c": to_microseconds(changed_at), "i": changed_id,
+        "d": to_microseconds(deleted_at), "t": deleted_id,
+        "s": to_microseconds(synced_at),
+    }
+    querystring = parse.urlencode(tokens)
+    return urlsafe_b64encode(querystring.encode("ascii")).decode("ascii")
+
+
+def decode_watermark(watermark):
+    """
+    returns the position encoded in a watermark and the time it is complete
+    up to, or the position before the first change and None when the client
+    has not synced yet
+
+    raises ValueError when the watermark is malformed
+    """
+
+    if not watermark:
+        return (EPOCH, 0, EPOCH, 0), None
+
+    try:
+        querystring = urlsafe_b64decode(watermark.encode("ascii")).decode("ascii")
+        tokens = {key: int(values[0]) for key, values in parse.parse_qs(querystring).items()}
+        position = (
+            EPOCH + timedelta(microseconds=tokens["c"]), tokens["i"],
+            EPOCH + timedelta(microseconds=tokens["d"]), tokens["t"],
+        )
+        # watermarks handed out before they carried the time are complete up to their last change at least
+        synced_at = EPOCH + timedelta(microseconds=tokens["s"]) if "s" in tokens else max(position[0], position[2])
+        return position, synced_at
+    except (KeyError, OverflowError, UnicodeError, binascii.Error) as error:
+        raise ValueError("invalid watermark") from error
+
+
+def tombstone_cutoff(now=None):
+    """
+    returns the time before which tombstones are pruned, see TODO_TOMBSTONE_RETENTION_DAYS
+    """
+
+    return (now or timezone.now()) - timedelta(days=settings.TODO_TOMBSTONE_RETENTION_DAYS)
+
+
+def after(field, value, pk):
+    """
+    filters rows to those after the (field, id) keyset position
+    """
+
+    return Q(**{f"{field}__gt": value}) | Q(**{field: value, "id__gt": pk})
+
+
+def get_changes(request, watermark, limit):
+    """
+    returns the user's ToDos changed and deleted after a watermark, at most
+    limit of each, ordered so that the next watermark resumes right after them
+
+    rows written in the last TODO_SYNC_LAG seconds are left for the next sync,
+    so that a transaction committing late cannot land behind a watermark
+    that was already handed out
+
+    raises ResyncRequired when the deletions since the watermark may have
+    been pruned, the client then syncs again without one
+    """
+
+    (changed_at, changed_id, deleted_at, deleted_id), synced_at = decode_watermark(watermark)
+    now = timezone.now()
+    if synced_at is not None and synced_at < tombstone_cutoff(now):
+        raise ResyncRequired
+
+    horizon = now - timedelta(seconds=settings.TODO_SYNC_LAG)
+
+    changed = list(
+        ToDo.objects.filter(after("updated_at", changed_at, changed_id), user=request.user, updated_at__lte=horizon)
+        .order_by("updated_at", "id").only(*ToDoSerializer.Meta.fields)[:limit + 1]
+    )
+    deleted = list(
+        ToDoTombstone.objects.filter(after("deleted_at", deleted_at, deleted_id), user=request.user, deleted_at__lte=horizon)
+        .order_by("deleted_at", "id").values_list("id", "todo_id", "deleted_at")[:limit + 1]
+    )
+
+    more = len(changed) > limit or len(deleted) > limit
+    changed, deleted = changed[:limit], deleted[:limit]
+
+    if changed:
+        changed_at, changed_id = changed[-1].updated_at, changed[-1].id
+    if deleted:
+        deleted_id, _, deleted_at = deleted[-1]
+
+    return {
+        "changed": ToDoSerializer(changed, many=True, context={"request": request}).data,
+        "deleted": [todo_id for _, todo_id, _ in deleted],
+        "watermark": encode_watermark((changed_at, changed_id, deleted_at, deleted_id), horizon),
+        "more": more,
+    }
@@ -1,3 +1,1089 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import tracemalloc
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from account.models import Account
+from account.serializers import AccountLoginSerializer
+from todo.fast_json import FastJSONRenderer
+from .checks import check_response_cache_is_shared, check_search_index
+from .management.commands.loadtest import Command as LoadTestCommand, TestClientDriver
+from .models import ReminderCheckpoint, ReminderDelivery, ToDo, ToDoTombstone
+from .reminders import MemorySink, ReminderScanner
+from .search import SEARCH_INDEX, SEARCH_VECTOR, search_todos
+from .seeding import SEED_PASSWORD, seed, seed_email
+from .serializers import FastToDoSerializer, ToDoSerializer
+from .views import ExportToDoView, ImportToDoView, ToDoSyncView
+
+
+class ToDoTestCase(APITestCase):
+    """
+    creates an authenticated user to run the ToDo endpoints against
+    """
+
+    def setUp(self):
+        # ids are reused between tests, so responses cached by an earlier test must go
+        caches[settings.TODO_RESPONSE_CACHE].clear()
+        self.user = Account.objects.create_user("Jane", "Doe", "jane@example.com", "PassWORD1!")
+        self.client.force_authenticate(self.user)
+
+    def create_todos(self, count, user=None, **fields):
+        fields.setdefault("due_date", date.today() + timedelta(days=1))
+        fields.setdefault("time", time(9, 30))
+        return ToDo.objects.bulk_create(
+            ToDo(user=user or self.user, title=f"todo {i}", **fields) for i in range(count)
+        )
+
+
+class ToDoListPaginationTests(ToDoTestCase):
+
+    def test_pages_are_newest_first_and_cover_every_todo(self):
+        self.create_todos(7)
+        expected = list(ToDo.objects.filter(user=self.user).values_list("id", flat=True))
+
+        seen = []
+        url = reverse("list") + "?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [todo["id"] for todo in response.json()["results"]]
+            url = response.json()["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_the_preceding_page(self):
+        self.create_todos(5)
+
+        first = self.client.get(reverse("list") + "?page_size=2")
+        second = self.client.get(first.json()["next"])
+        previous = self.client.get(second.json()["previous"])
+
+        self.assertIsNone(first.json()["previous"])
+        self.assertEqual(previous.json()["results"], first.json()["results"])
+
+    def test_list_only_contains_the_users_todos(self):
+        other = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        self.create_todos(2, user=other)
+        self.create_todos(1)
+
+        response = self.client.get(reverse("list"))
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("list") + "?cursor=not-a-cursor")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ToDoListFilterTests(ToDoTestCase):
+
+    def ids(self, query):
+        response = self.client.get(reverse("list") + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [todo["id"] for todo in response.json()["results"]]
+
+    def test_filters_narrow_the_list(self):
+        today = date.today()
+        done = self.create_todos(1, completed=True, due_date=today)[0]
+        high = self.create_todos(1, priority="high", due_date=today + timedelta(days=3))[0]
+        medium = self.create_todos(1, priority="medium", due_date=today + timedelta(days=10))[0]
+
+        self.assertEqual(self.ids("?completed=true"), [done.id])
+        self.assertEqual(self.ids("?completed=false&priority=high,medium"), [medium.id, high.id])
+        self.assertEqual(self.ids(f"?due_after={today + timedelta(days=1)}&due_before={today + timedelta(days=5)}"), [high.id])
+
+    def test_list_can_be_sorted_and_paged_on_due_date(self):
+        today = date.today()
+        todos = [self.create_todos(1, due_date=today + timedelta(days=days))[0] for days in (3, 1, 2, 1)]
+        expected = [todo.id for todo in sorted(todos, key=lambda todo: (todo.due_date, todo.id))]
+
+        seen, url = [], reverse("list") + "?ordering=due_date&page_size=3"
+        while url:
+            response = self.client.get(url)
+            seen += [todo["id"] for todo in response.json()["results"]]
+            url = response.json()["next"]
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(self.ids("?ordering=-due_date"), expected[::-1])
+
+    def test_sparse_fieldset_narrows_the_query_and_the_output(self):
+        self.create_todos(2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("list") + "?fields=id,title")
+
+        self.assertEqual([set(todo) for todo in response.json()["results"]], [{"id", "title"}] * 2)
+        self.assertNotIn("description", queries[0]["sql"])
+
+    def test_invalid_parameters_are_rejected(self):
+        for query in ("?priority=extreme", "?ordering=title", "?fields=password", "?due_after=tomorrow"):
+            response = self.client.get(reverse("list") + query)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, query)
+
+
+class FastToDoSerializerTests(ToDoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        other = Account.objects.create_user("John", "Smith", "john@example.com", "PassWORD1!")
+        self.create_todos(2, priority="high", description="described", time=time(23, 59, 30, 123456))
+        self.create_todos(1, completed=True, description=None, due_date=date(2030, 12, 31))
+        self.create_todos(1, user=other)
+        self.request = mock.Mock(user=self.user)
+
+    def assertParity(self, fields=None):
+        todos = ToDo.objects.order_by("id")
+        expected = ToDoSerializer(todos, many=True, context={"request": self.request}, fields=fields).data
+        actual = FastToDoSerializer(
+            list(todos.values(*FastToDoSerializer.values_fields(fields))),
+            many=True, context={"request": self.request}, fields=fields,
+        ).data
+
+        # identical JSON, key order included
+        self.assertEqual(json.dumps(actual), json.dumps(expected))
+
+    def test_output_is_identical_to_the_model_serializer(self):
+        self.assertParity()
+
+    def test_sparse_fieldsets_are_identical_to_the_model_serializer(self):
+        self.assertParity(["id", "user", "due_date", "created_at"])
+
+    def test_native_output_rendered_by_the_fast_renderer_is_identical(self):
+        todos = ToDo.objects.order_by("id")
+        expected = JSONRenderer().render(ToDoSerializer(todos, many=True, context={"request": self.request}).data)
+        rows = FastToDoSerializer(
+            list(todos.values(*FastToDoSerializer.values_fields())),
+            many=True, context={"request": self.request}, native_temporal=True,
+        ).data
+
+        self.assertEqual(FastJSONRenderer().render(rows), expected)
+
+    def test_datetimes_follow_the_current_timezone(self):
+        with timezone.override("America/New_York"):
+            self.assertParity()
+
+
+class ToDoListQueryCountTests(ToDoTestCase):
+
+    def test_query_count_does_not_grow_with_the_list(self):
+        for count in (1, 25):
+            ToDo.objects.all().delete()
+            self.create_todos(count)
+
+            # a single query for the page, the owner comes from the request
+            with self.assertNumQueries(1):
+                response = self.client.get(reverse("list") + "?page_size=50")
+
+            self.assertEqual(len(response.json()["results"]), count)
+            self.assertEqual(response.json()["results"][0]["user"], "Jane Doe")
+
+
+class ToDoQueryPlanTests(ToDoTestCase):
+    """
+    checks that the ToDo access patterns are served by their indexes, so a
+    schema change cannot silently turn them back into full table scans
+    """
+
+    def explain(self, queryset):
+        if connection.vendor == "postgresql":
+            # the planner prefers sequential scans on tiny test tables
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+        elif connection.vendor != "sqlite":
+            self.skipTest(f"no query plan checks for {connection.vendor}")
+
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name, ordered=False):
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan)
+
+        if connection.vendor == "postgresql":
+            self.assertNotIn("Seq Scan", plan)
+            if ordered:
+                self.assertNotIn("Sort", plan)
+        else:
+            self.assertIn("SEARCH crud_todo USING INDEX", plan)
+            if ordered:
+                self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_list_page_uses_the_user_created_index(self):
+        queryset = ToDo.objects.filter(user=self.user).order_by("-created_at", "-id")
+        self.assertUsesIndex(queryset[:50], "crud_todo_user_created_idx", ordered=True)
+
+    def test_list_page_after_a_cursor_uses_the_user_created_index(self):
+        now = timezone.now()
+        queryset = ToDo.objects.filter(
+            Q(created_at__lt=now) | Q(created_at=now, id__lt=100), user=self.user
+        ).order_by("-created_at", "-id")
+        self.assertUsesIndex(queryset[:50], "crud_todo_user_created_idx", ordered=True)
+
+    def test_users_open_todos_by_due_date_use_the_partial_index(self):
+        queryset = ToDo.objects.filter(
+            user=self.user, completed=False, due_date__lte=date.today()
+        ).order_by("due_date", "time")
+        self.assertUsesIndex(queryset, "crud_todo_user_open_due_idx", ordered=True)
+
+    def test_delta_sync_uses_the_user_updated_index(self):
+        now = timezone.now()
+        queryset = ToDo.objects.filter(
+            Q(updated_at__gt=now) | Q(updated_at=now, id__gt=100), user=self.user, updated_at__lte=now
+        ).order_by("updated_at", "id")
+        self.assertUsesIndex(queryset[:500], "crud_todo_user_updated_idx", ordered=True)
+
+    def test_list_filtered_on_completion_uses_the_user_created_index(self):
+        for completed in (False, True):
+            queryset = ToDo.objects.filter(user=self.user, completed=completed).order_by("-created_at", "-id")
+            self.assertUsesIndex(queryset[:50], "crud_todo_user_created_idx", ordered=True)
+
+    def test_list_filtered_on_priority_uses_the_user_priority_index(self):
+        queryset = ToDo.objects.filter(user=self.user, priority="high").order_by("-created_at", "-id")
+        self.assertUsesIndex(queryset[:50], "crud_todo_user_priority_idx", ordered=True)
+
+    def test_list_sorted_on_due_date_seeks_to_the_users_todos(self):
+        queryset = ToDo.objects.filter(
+            user=self.user, due_date__gte=date.today(), due_date__lte=date.today() + timedelta(days=7)
+        ).order_by("due_date", "id")
+        # one of the indexes leading on the user, so that only the user's own rows are sorted
+        self.assertUsesIndex(queryset[:50], "crud_todo_user_")
+
+    def test_open_todos_due_soon_use_the_partial_index(self):
+        queryset = ToDo.objects.filter(completed=False, due_date__lte=date.today())
+        self.assertUsesIndex(queryset, "crud_todo_open_due_idx")
+
+    def test_reminder_scan_batches_use_the_open_due_index(self):
+        checkpoint = ReminderCheckpoint(kind="reminder", due_date=date.today(), time=time(9, 30), todo_id=100)
+        horizon = (date.today() + timedelta(days=1), time(12, 0))
+        floor = (date.today(), time(11, 30))
+        queryset = ReminderScanner(MemorySink()).next_batch(checkpoint, horizon, floor)
+        self.assertUsesIndex(queryset, "crud_todo_open_due_idx", ordered=True)
+
+    def test_reminder_catch_up_batches_use_the_open_updated_index(self):
+        checkpoint = ReminderCheckpoint(
+            kind="reminder", due_date=date.today(), time=time(9, 30), todo_id=100, scanned_at=timezone.now(),
+        )
+        floor = (date.today(), time(9, 0))
+        queryset = ReminderScanner(MemorySink()).next_caught_up_batch("reminder", checkpoint, floor)
+        self.assertUsesIndex(queryset, "crud_todo_open_updated_idx", ordered=True)
+
+
+class BulkToDoTests(ToDoTestCase):
+
+    def test_bulk_add_creates_valid_items_and_reports_invalid_ones(self):
+        due_date = (date.today() + timedelta(days=1)).isoformat()
+        items = [
+            {"title": "first", "due_date": due_date, "time": "09:00"},
+            {"title": "second", "due_date": "2000-01-01", "time": "09:00"},
+            {"title": "third", "due_date": due_date, "time": "10:00", "priority": "high"},
+        ]
+
+        response = self.client.post(reverse("bulk-add"), items, format="json")
+
+        statuses = [result["status"] for result in response.json()["results"]]
+        self.assertEqual(statuses, [201, 400, 201])
+        self.assertIn("due_date", response.json()["results"][1]["errors"])
+        self.assertEqual(ToDo.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_update_only_touches_the_users_todos(self):
+        mine = self.create_todos(2)
+        other = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        theirs = self.create_todos(1, user=other)[0]
+
+        items = [
+            {"id": mine[0].id, "title": "renamed"},
+            {"id": theirs.id, "title": "hijacked"},
+            {"id": mine[1].id, "priority": "urgent"},
+        ]
+        response = self.client.patch(reverse("bulk-update"), items, format="json")
+
+        statuses = [result["status"] for result in response.json()["results"]]
+        self.assertEqual(statuses, [200, 404, 400])
+        self.assertEqual(ToDo.objects.get(id=mine[0].id).title, "renamed")
+        self.assertEqual(ToDo.objects.get(id=theirs.id).title, "todo 0")
+
+    def test_bulk_complete_and_delete_use_one_ownership_query(self):
+        todos = self.create_todos(3)
+        ids = [todo.id for todo in todos] + [999999]
+
+        # ownership check + UPDATE, plus the savepoint pair around the batch
+        with self.assertNumQueries(4):
+            response = self.client.patch(reverse("bulk-complete"), {"ids": ids}, format="json")
+
+        self.assertEqual([result["status"] for result in response.json()["results"]], [200, 200, 200, 404])
+        self.assertFalse(ToDo.objects.filter(completed=False).exists())
+
+        response = self.client.delete(reverse("bulk-delete"), {"ids": ids[:2]}, format="json")
+        self.assertEqual([result["status"] for result in response.json()["results"]], [204, 204])
+        self.assertEqual(list(ToDo.objects.values_list("id", flat=True)), [ids[2]])
+
+    def test_oversized_batches_are_rejected(self):
+        response = self.client.patch(reverse("bulk-complete"), {"ids": list(range(501))}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalUpdateTests(ToDoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.todo = self.create_todos(1)[0]
+
+    def test_update_is_a_single_statement(self):
+        with self.assertNumQueries(1):
+            response = self.client.patch(
+                reverse("update", args=[self.todo.id]), {"title": "renamed"}, format="json"
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["title"], "renamed")
+        self.assertEqual(ToDo.objects.get(id=self.todo.id).title, "renamed")
+
+    def test_complete_returns_a_new_etag(self):
+        etag = self.client.get(reverse("retrieve", args=[self.todo.id]))["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.patch(reverse("complete", args=[self.todo.id]), HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data["completed"])
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_stale_etag_is_rejected(self):
+        etag = self.client.get(reverse("retrieve", args=[self.todo.id]))["ETag"]
+        self.client.patch(reverse("update", args=[self.todo.id]), {"title": "first"}, format="json")
+
+        response = self.client.patch(
+            reverse("update", args=[self.todo.id]), {"title": "second"}, format="json", HTTP_IF_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(ToDo.objects.get(id=self.todo.id).title, "first")
+
+    def test_other_users_todos_cannot_be_updated(self):
+        other = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        self.client.force_authenticate(other)
+
+        response = self.client.patch(reverse("complete", args=[self.todo.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(ToDo.objects.get(id=self.todo.id).completed)
+
+
+class ToDoResponseCacheTests(ToDoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.todo = self.create_todos(1)[0]
+        self.start = int(self.todo.created_at.timestamp()) + 10
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        for url in (reverse("list"), reverse("retrieve", args=[self.todo.id])):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                second = self.client.get(url)
+
+            self.assertEqual(second.status_code, status.HTTP_200_OK)
+            self.assertEqual(second.content, first.content)
+            self.assertEqual(second["ETag"], first["ETag"])
+
+    def clock(self, seconds):
+        # the clock the cached states are stamped with, from a whole second after the ToDo was created
+        return mock.patch("crud.cache.time.time", return_value=self.start + seconds)
+
+    def test_unchanged_polls_are_not_modified(self):
+        url = reverse("list")
+        with self.clock(0):
+            self.client.get(url)
+        with self.clock(1):
+            response = self.client.get(url)
+
+        with self.assertNumQueries(0), self.clock(2):
+            by_etag = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            by_date = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+
+        self.assertEqual(by_etag.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(by_date.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_polls_by_date_see_writes_made_in_the_same_second(self):
+        url = reverse("list")
+        with self.clock(0.1):
+            self.client.patch(reverse("update", args=[self.todo.id]), {"title": "first"}, format="json")
+        with self.clock(0.2):
+            response = self.client.get(url)
+        # the date is held back until the second is over, as a write could follow within it
+        self.assertNotIn("Last-Modified", response)
+
+        with self.clock(0.3):
+            self.client.patch(reverse("update", args=[self.todo.id]), {"title": "second"}, format="json")
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(self.start))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"][0]["title"], "second")
+
+    def test_process_local_response_caches_are_reported(self):
+        self.assertEqual([warning.id for warning in check_response_cache_is_shared()], ["crud.W002"])
+
+        with override_settings(DEBUG=True):
+            self.assertEqual(check_response_cache_is_shared(), [])
+        shared = {**settings.CACHES, "todo": {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache"}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_response_cache_is_shared(), [])
+
+    def test_retrieve_etag_matches_the_update_precondition(self):
+        etag = self.client.get(reverse("retrieve", args=[self.todo.id]))["ETag"]
+
+        response = self.client.patch(reverse("complete", args=[self.todo.id]), HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_writes_invalidate_the_cached_responses(self):
+        list_url, retrieve_url = reverse("list"), reverse("retrieve", args=[self.todo.id])
+        etag = self.client.get(list_url)["ETag"]
+        self.client.get(retrieve_url)
+
+        writes = [
+            lambda: self.client.patch(reverse("update", args=[self.todo.id]), {"title": "renamed"}, format="json"),
+            lambda: self.client.patch(reverse("bulk-complete"), {"ids": [self.todo.id]}, format="json"),
+            lambda: self.client.post(reverse("add"), {
+                "title": "new", "due_date": (date.today() + timedelta(days=1)).isoformat(), "time": "09:00"
+            }, format="json"),
+            lambda: self.client.delete(reverse("delete", args=[self.todo.id])),
+        ]
+        for write in writes:
+            write()
+            response = self.client.get(list_url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response["ETag"]
+
+        self.assertEqual(self.client.get(retrieve_url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual([todo["title"] for todo in self.client.get(list_url).json()["results"]], ["new"])
+
+    def test_other_users_todos_cannot_be_retrieved(self):
+        other = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        self.client.force_authenticate(other)
+
+        response = self.client.get(reverse("retrieve", args=[self.todo.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(TODO_SYNC_LAG=0)
+class ToDoSyncTests(ToDoTestCase):
+
+    def sync(self, watermark=None):
+        response = self.client.get(reverse("sync"), {"since": watermark} if watermark else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_sync_returns_only_changes_since_the_watermark(self):
+        todos = self.create_todos(3)
+
+        first = self.sync()
+        self.assertEqual([todo["id"] for todo in first["changed"]], [todo.id for todo in todos])
+        self.assertEqual(self.sync(first["watermark"])["changed"], [])
+
+        self.client.patch(reverse("update", args=[todos[1].id]), {"title": "renamed"}, format="json")
+        self.client.delete(reverse("delete", args=[todos[2].id]))
+
+        second = self.sync(first["watermark"])
+        self.assertEqual([todo["title"] for todo in second["changed"]], ["renamed"])
+        self.assertEqual(second["deleted"], [todos[2].id])
+
+        third = self.sync(second["watermark"])
+        self.assertEqual((third["changed"], third["deleted"]), ([], []))
+
+    def test_other_users_cannot_delete_a_todo(self):
+        todo = self.create_todos(1)[0]
+        other = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        self.client.force_authenticate(other)
+
+        response = self.client.delete(reverse("delete", args=[todo.id]))
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertTrue(ToDo.objects.filter(id=todo.id).exists())
+        self.assertFalse(ToDoTombstone.objects.exists())
+
+    def test_bulk_deletes_leave_tombstones(self):
+        todos = self.create_todos(2)
+        self.client.delete(reverse("bulk-delete"), {"ids": [todo.id for todo in todos]}, format="json")
+
+        self.assertEqual(sorted(self.sync()["deleted"]), [todo.id for todo in todos])
+        self.assertEqual(ToDoTombstone.objects.filter(user=self.user).count(), 2)
+
+    def test_large_syncs_are_split_into_pages(self):
+        todos = self.create_todos(5)
+
+        seen, watermark, more = [], None, True
+        with mock.patch.object(ToDoSyncView, "page_size", 2):
+            while more:
+                data = self.sync(watermark)
+                seen += [todo["id"] for todo in data["changed"]]
+                watermark, more = data["watermark"], data["more"]
+
+        self.assertEqual(seen, [todo.id for todo in todos])
+
+    def test_sync_only_contains_the_users_changes(self):
+        other = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        self.create_todos(1, user=other)
+
+        self.assertEqual(self.sync()["changed"], [])
+
+    @override_settings(TODO_SYNC_LAG=60)
+    def test_recent_writes_are_held_back(self):
+        self.create_todos(1)
+        self.assertEqual(self.sync()["changed"], [])
+
+    def test_invalid_watermark_is_rejected(self):
+        response = self.client.get(reverse("sync"), {"since": "not-a-watermark"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TODO_TOMBSTONE_RETENTION_DAYS=30)
+    def test_watermarks_older_than_the_tombstones_require_a_full_resync(self):
+        todos = self.create_todos(2)
+        watermark = self.sync()["watermark"]
+        self.client.delete(reverse("delete", args=[todos[0].id]))
+
+        with mock.patch("crud.sync.timezone.now", return_value=timezone.now() + timedelta(days=29)):
+            self.assertEqual(self.sync(watermark)["deleted"], [todos[0].id])
+        with mock.patch("crud.sync.timezone.now", return_value=timezone.now() + timedelta(days=31)):
+            response = self.client.get(reverse("sync"), {"since": watermark})
+            self.assertEqual(response.status_code, status.HTTP_410_GONE)
+            self.assertEqual(response.data, {"error": "Full resync required!"})
+            self.assertEqual([todo["id"] for todo in self.sync()["changed"]], [todos[1].id])
+
+    @override_settings(TODO_TOMBSTONE_RETENTION_DAYS=30)
+    def test_prune_command_removes_tombstones_older_than_the_retention(self):
+        todos = self.create_todos(2)
+        for todo in todos:
+            self.client.delete(reverse("delete", args=[todo.id]))
+        ToDoTombstone.objects.filter(todo_id=todos[0].id).update(deleted_at=timezone.now() - timedelta(days=31))
+
+        stdout = io.StringIO()
+        call_command("prune_tombstones", stdout=stdout)
+
+        self.assertEqual(stdout.getvalue().strip(), "Removed 1 tombstones.")
+        self.assertEqual(list(ToDoTombstone.objects.values_list("todo_id", flat=True)), [todos[1].id])
+
+
+class ToDoExportTests(ToDoTestCase):
+
+    def export(self, export_format):
+        response = self.client.get(reverse("export", args=[export_format]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b"".join(response.streaming_content).decode()
+
+    def test_ndjson_export_has_a_line_per_todo(self):
+        todos = self.create_todos(3)
+
+        rows = [json.loads(line) for line in self.export("ndjson").splitlines()]
+
+        self.assertEqual([row["id"] for row in rows], [todo.id for todo in todos])
+        self.assertEqual(rows[0]["due_date"], todos[0].due_date.isoformat())
+        self.assertNotIn("user", rows[0])
+
+    def test_csv_export_has_a_header_and_a_row_per_todo(self):
+        todos = self.create_todos(2, description="with, a comma")
+
+        rows = list(csv.reader(self.export("csv").splitlines()))
+
+        self.assertEqual(rows[0][:2], ["id", "title"])
+        self.assertEqual([int(row[0]) for row in rows[1:]], [todo.id for todo in todos])
+        self.assertEqual(rows[1][rows[0].index("description")], "with, a comma")
+
+    def test_export_only_contains_the_users_todos(self):
+        other = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        self.create_todos(2, user=other)
+
+        self.assertEqual(self.export("ndjson"), "")
+
+    def test_unknown_formats_are_rejected(self):
+        response = self.client.get(reverse("export", args=["xml"]), HTTP_ACCEPT="application/xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def peak_export_memory(self, count):
+        ToDo.objects.all().delete()
+        self.create_todos(count)
+
+        response = self.client.get(reverse("export", args=["ndjson"]))
+        tracemalloc.start()
+        try:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            return tracemalloc.get_traced_memory()[1], size
+        finally:
+            tracemalloc.stop()
+
+    def test_memory_stays_flat_as_the_export_grows(self):
+        with mock.patch.object(ExportToDoView, "chunk_size", 100):
+            small_peak, small_size = self.peak_export_memory(200)
+            large_peak, large_size = self.peak_export_memory(4000)
+
+        # twenty times the rows, but never more than a chunk of them in memory at once
+        self.assertGreater(large_size, small_size * 15)
+        self.assertLess(large_peak, small_peak * 2)
+
+
+class ToDoImportTests(ToDoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.due_date = (date.today() + timedelta(days=1)).isoformat()
+
+    def upload(self, import_format, body, content_type):
+        response = self.client.post(reverse("import", args=[import_format]), body, content_type=content_type)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_ndjson_import_creates_valid_rows_and_reports_the_rest(self):
+        lines = [
+            json.dumps({"title": "first", "due_date": self.due_date, "time": "09:00"}),
+            json.dumps({"title": "past", "due_date": "2000-01-01", "time": "09:00"}),
+            "{not json",
+            "",
+            json.dumps({"title": "urgent", "due_date": self.due_date, "time": "09:00", "priority": "urgent"}),
+            json.dumps({"title": "second", "due_date": self.due_date, "time": "10:00", "priority": "high"}),
+            json.dumps({"title": "third", "due_date": self.due_date, "time": "11:00"}),
+        ]
+
+        with mock.patch.object(ImportToDoView, "batch_size", 2):
+            report = self.upload("ndjson", "\n".join(lines), "application/x-ndjson")
+
+        self.assertEqual((report["created"], report["error_count"]), (3, 3))
+        self.assertEqual([error["row"] for error in report["errors"]], [2, 3, 5])
+        self.assertIn("due_date", report["errors"][0]["errors"])
+        self.assertIn("priority", report["errors"][2]["errors"])
+        self.assertEqual(
+            list(ToDo.objects.filter(user=self.user).order_by("id").values_list("title", "priority")),
+            [("first", "low"), ("second", "high"), ("third", "low")],
+        )
+
+    def test_csv_import_applies_the_defaults_to_empty_cells(self):
+        rows = io.StringIO()
+        writer = csv.writer(rows)
+        writer.writerow(["title", "description", "priority", "due_date", "time"])
+        writer.writerow(["quoted", "with, a comma\nand a line break", "", self.due_date, "09:00"])
+        writer.writerow(["", "", "", self.due_date, "09:00"])
+
+        report = self.upload("csv", rows.getvalue(), "text/csv")
+
+        self.assertEqual((report["created"], report["error_count"]), (1, 1))
+        self.assertIn("title", report["errors"][0]["errors"])
+        todo = ToDo.objects.get(user=self.user)
+        self.assertEqual((todo.description, todo.priority), ("with, a comma\nand a line break", "low"))
+
+    def test_lines_that_are_not_utf8_are_reported_as_row_errors(self):
+        todo = json.dumps({"title": "valid", "due_date": self.due_date, "time": "09:00"}).encode()
+        latin1 = json.dumps(
+            {"title": "caf\u00e9", "due_date": self.due_date, "time": "09:00"}, ensure_ascii=False
+        ).encode("latin-1")
+
+        report = self.upload("ndjson", b"\n".join([todo, latin1, todo]), "application/x-ndjson")
+        self.assertEqual((report["created"], report["error_count"]), (2, 1))
+        self.assertEqual(report["errors"], [{"row": 2, "errors": "Invalid UTF-8!"}])
+
+        header = f"title,due_date,time\nvalid,{self.due_date},09:00\n".encode()
+        report = self.upload("csv", header + f"caf\xe9,{self.due_date},09:00\n".encode("latin-1"), "text/csv")
+        self.assertEqual((report["created"], report["error_count"]), (1, 1))
+        self.assertEqual(report["errors"], [{"row": 2, "errors": "Invalid UTF-8!"}])
+
+    def test_import_command_reads_a_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "todos.ndjson")
+            with open(path, "w") as file:
+                file.write(json.dumps({"title": "imported", "due_date": self.due_date, "time": "09:00"}) + "\n")
+
+            stdout = io.StringIO()
+            call_command("import_todos", path, email=self.user.email, stdout=stdout)
+
+        self.assertEqual(json.loads(stdout.getvalue())["created"], 1)
+        self.assertTrue(ToDo.objects.filter(user=self.user, title="imported").exists())
+
+    def test_unknown_formats_are_rejected(self):
+        response = self.client.post(reverse("import", args=["xml"]), "<todos/>", content_type="application/xml")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(TODO_SYNC_LAG=0)
+class ReminderScannerTests(ToDoTestCase):
+
+    now = datetime(2030, 1, 1, 12, 0, tzinfo=dt_timezone.utc)
+
+    def create_due(self, minutes, **fields):
+        due = self.now + timedelta(minutes=minutes)
+        return ToDo.objects.create(user=self.user, title=f"due {minutes}", due_date=due.date(), time=due.time(), **fields)
+
+    def sent(self, sink):
+        return [(notification["kind"], notification["todo_id"]) for notification in sink.sent]
+
+    @override_settings(REMINDER_LEAD_MINUTES=30)
+    def test_todos_are_notified_once_when_they_come_due_and_become_overdue(self):
+        self.create_due(-10)
+        soon = self.create_due(10)
+        self.create_due(5, completed=True)
+        later = self.create_due(120)
+
+        sink = MemorySink()
+        report = ReminderScanner(sink).run(self.now)
+
+        # the first run starts at the current time, earlier ToDos are not notified
+        self.assertEqual(self.sent(sink), [("reminder", soon.id)])
+        self.assertEqual(report["reminder"], {"sent": 1, "failed": 0})
+        notification = sink.sent[0]
+        self.assertEqual(notification["key"], f"reminder:{soon.id}:2030-01-01T12:10:00")
+        self.assertEqual((notification["email"], notification["due"]), ("jane@example.com", "2030-01-01T12:10:00"))
+
+        # a restarted scanner resumes from the checkpoints
+        sink = MemorySink()
+        ReminderScanner(sink).run(self.now + timedelta(minutes=15))
+        self.assertEqual(self.sent(sink), [("overdue", soon.id)])
+
+        sink = MemorySink()
+        ReminderScanner(sink).run(self.now + timedelta(minutes=100))
+        self.assertEqual(self.sent(sink), [("reminder", later.id)])
+
+    def test_todos_are_scanned_in_batches_in_due_order(self):
+        todos = [self.create_due(minutes) for minutes in (25, 5, 15, 10, 20)]
+        todos.sort(key=lambda todo: (todo.due_date, todo.time))
+        ReminderScanner(MemorySink()).run(self.now - timedelta(minutes=1))
+
+        sink = MemorySink()
+        with CaptureQueriesContext(connection) as queries:
+            report = ReminderScanner(sink, batch_size=2, workers=2).run(self.now + timedelta(minutes=30))
+
+        self.assertEqual(self.sent(sink), [("overdue", todo.id) for todo in todos])
+        self.assertEqual(report["overdue"], {"sent": 5, "failed": 0})
+        batches = [query for query in queries if 'FROM "crud_todo"' in query["sql"] and "ORDER BY" in query["sql"]]
+        # the reminders went out on the first run, so one empty reminder batch, then three overdue
+        # ones, and one catch-up batch of each kind
+        self.assertEqual(len(batches), 1 + 3 + 2)
+
+    def test_failed_deliveries_are_retried_by_the_next_run(self):
+        todos = [self.create_due(minutes) for minutes in (1, 2, 3, 4)]
+        ReminderScanner(MemorySink()).run(self.now)
+
+        class FailingSink(MemorySink):
+            def send(self, notification):
+                if notification["todo_id"] == todos[2].id:
+                    raise ConnectionError("sink is down")
+                super().send(notification)
+
+        sink = FailingSink()
+        with self.assertLogs("crud.reminders", "ERROR"):
+            report = ReminderScanner(sink, batch_size=10).run(self.now + timedelta(minutes=5))
+        self.assertEqual(report["overdue"], {"sent": 2, "failed": 1})
+
+        sink = MemorySink()
+        ReminderScanner(sink).run(self.now + timedelta(minutes=5))
+        self.assertEqual(self.sent(sink), [("overdue", todos[2].id), ("overdue", todos[3].id)])
+
+    @override_settings(REMINDER_LEAD_MINUTES=30)
+    def test_todos_added_or_moved_behind_the_checkpoints_are_caught_up(self):
+        ReminderScanner(MemorySink()).run(self.now)
+        moved = self.create_due(40)
+        renamed = self.create_due(5)
+        ReminderScanner(MemorySink()).run(self.now + timedelta(minutes=20))
+
+        # behind the reminder and overdue checkpoints, which moved to the ToDos due in 40 and 5 minutes
+        added = self.create_due(25)
+        added_overdue = self.create_due(3)
+        due = self.now + timedelta(minutes=30)
+        moved.due_date, moved.time = due.date(), due.time()
+        moved.save()
+        # already notified for its due time
+        renamed.title = "renamed"
+        renamed.save()
+
+        sink = MemorySink()
+        ReminderScanner(sink).run(self.now + timedelta(minutes=22))
+
+        self.assertCountEqual(
+            self.sent(sink), [("reminder", added.id), ("reminder", moved.id), ("overdue", added_overdue.id)],
+        )
+
+    @override_settings(REMINDER_LEAD_MINUTES=30)
+    def test_todos_overdue_after_a_downtime_get_no_reminder(self):
+        ReminderScanner(MemorySink()).run(self.now)
+        missed = self.create_due(60)
+        soon = self.create_due(130)
+
+        sink = MemorySink()
+        ReminderScanner(sink).run(self.now + timedelta(minutes=120))
+
+        self.assertEqual(self.sent(sink), [("reminder", soon.id), ("overdue", missed.id)])
+
+    def test_todos_deleted_while_being_sent_are_not_recorded(self):
+        todos = [self.create_due(minutes) for minutes in (1, 2)]
+        ReminderScanner(MemorySink()).run(self.now)
+
+        class DeletingScanner(ReminderScanner):
+            def deliver(self, kind, rows, executor):
+                delivered = super().deliver(kind, rows, executor)
+                # deleted by its owner while the notifications were sent
+                ToDo.objects.filter(id=todos[0].id).delete()
+                return delivered
+
+        sink = MemorySink()
+        report = DeletingScanner(sink).run(self.now + timedelta(minutes=5))
+
+        self.assertEqual(self.sent(sink), [("overdue", todos[0].id), ("overdue", todos[1].id)])
+        self.assertEqual(report["overdue"], {"sent": 2, "failed": 0})
+        self.assertEqual(
+            list(ReminderDelivery.objects.filter(kind="overdue").values_list("todo_id", flat=True)), [todos[1].id],
+        )
+
+    def test_notifications_are_sent_outside_of_a_transaction(self):
+        self.create_due(5)
+        ReminderScanner(MemorySink()).run(self.now)
+        # the test itself runs in a transaction
+        depth = len(connection.atomic_blocks)
+        depths = []
+
+        class RecordingScanner(ReminderScanner):
+            def deliver(self, kind, rows, executor):
+                depths.append(len(connection.atomic_blocks))
+                return super().deliver(kind, rows, executor)
+
+        RecordingScanner(MemorySink()).run(self.now + timedelta(minutes=10))
+
+        self.assertEqual(depths, [depth])
+        self.assertEqual(ReminderCheckpoint.objects.get(kind="overdue").lease_owner, "")
+
+    def test_kinds_leased_by_another_scanner_are_skipped(self):
+        todo = self.create_due(5)
+        ReminderScanner(MemorySink()).run(self.now)
+        ReminderCheckpoint.objects.filter(kind="overdue").update(
+            lease_owner="other", leased_until=timezone.now() + timedelta(minutes=5),
+        )
+
+        sink = MemorySink()
+        ReminderScanner(sink).run(self.now + timedelta(minutes=10))
+        self.assertEqual(self.sent(sink), [])
+
+        # the lease of a scanner that died runs out
+        ReminderCheckpoint.objects.filter(kind="overdue").update(leased_until=timezone.now())
+        ReminderScanner(sink).run(self.now + timedelta(minutes=10))
+        self.assertEqual(self.sent(sink), [("overdue", todo.id)])
+
+    def test_command_uses_the_configured_sink(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "reminders.ndjson")
+            due = timezone.localtime() + timedelta(minutes=10)
+            ToDo.objects.create(user=self.user, title="soon", due_date=due.date(), time=due.time())
+
+            stdout = io.StringIO()
+            with override_settings(REMINDER_FILE=path):
+                call_command("send_reminders", sink="crud.reminders.FileSink", stdout=stdout)
+
+            with open(path) as file:
+                notifications = [json.loads(line) for line in file]
+
+        self.assertEqual(json.loads(stdout.getvalue())["reminder"], {"sent": 1, "failed": 0})
+        self.assertEqual([notification["title"] for notification in notifications], ["soon"])
+
+
+class ToDoSearchTests(ToDoTestCase):
+
+    def create(self, title, description=None, user=None):
+        return ToDo.objects.create(
+            user=user or self.user, title=title, description=description,
+            due_date=date.today() + timedelta(days=1), time=time(9, 30),
+        )
+
+    def search(self, query, **params):
+        response = self.client.get(reverse("search"), {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def titles(self, query, **params):
+        return [todo["title"] for todo in self.search(query, **params)["results"]]
+
+    def test_results_are_ranked_stemmed_and_scoped_to_the_user(self):
+        self.create("Pay the bills", "before the shopping trip")
+        self.create("Weekly shopping", "milk and eggs")
+        self.create("Call mum")
+        other = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        self.create("Shopping for John", user=other)
+
+        self.assertEqual(self.titles("shop"), ["Weekly shopping", "Pay the bills"])
+        self.assertEqual(self.titles("shopping milk"), ["Weekly shopping"])
+        self.assertEqual(self.titles("groceries"), [])
+
+    def test_the_index_follows_creates_updates_and_deletes(self):
+        response = self.client.post(reverse("add"), {
+            "title": "Renew passport", "due_date": date.today() + timedelta(days=1), "time": "09:00",
+        })
+        todo_id = response.json()["id"]
+        self.assertEqual(self.titles("passport"), ["Renew passport"])
+
+        self.client.patch(reverse("update", args=[todo_id]), {"title": "Renew driving licence"})
+        self.assertEqual(self.titles("passport"), [])
+        self.assertEqual(self.titles("licence"), ["Renew driving licence"])
+
+        self.client.patch(reverse("complete", args=[todo_id]))
+        self.assertEqual(self.titles("licence", completed="true"), ["Renew driving licence"])
+        self.assertEqual(self.titles("licence", completed="false"), [])
+
+        self.client.delete(reverse("delete", args=[todo_id]))
+        self.assertEqual(self.titles("licence"), [])
+
+    def test_results_are_paginated(self):
+        # bulk inserts are indexed too
+        ToDo.objects.bulk_create(
+            ToDo(user=self.user, title="report", due_date=date.today(), time=time(9, 30)) for _ in range(5)
+        )
+
+        page = self.search("report", page_size=2, page=3, fields="id,title")
+
+        self.assertEqual(page["count"], 5)
+        self.assertIsNone(page["next"])
+        self.assertEqual(page["results"], [{"id": ToDo.objects.order_by("id").first().id, "title": "report"}])
+
+    def test_queries_without_words_are_rejected(self):
+        for query in ("", '"*"'):
+            response = self.client.get(reverse("search"), {"q": query})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("q", response.json())
+
+    def test_search_uses_the_text_index(self):
+        queryset = search_todos(ToDo.objects.filter(user=self.user), "weekly report")
+        plan = queryset.explain()
+
+        if connection.vendor == "postgresql":
+            self.assertIn("crud_todo_search_idx", plan)
+        elif connection.vendor == "sqlite":
+            self.assertIn("LIST SUBQUERY", plan)
+            self.assertIn("SCAN crud_todo_search VIRTUAL TABLE", plan)
+            self.assertNotIn("SCAN crud_todo ", plan)
+        else:
+            self.skipTest(f"no text index on {connection.vendor}")
+
+    def test_the_text_index_is_complete(self):
+        self.assertEqual(check_search_index(databases=["default"]), [])
+
+        # DDL is transactional on both databases, so the test rolls it back
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(f"DROP INDEX {SEARCH_INDEX}")
+            elif connection.vendor == "sqlite":
+                cursor.execute("DROP TRIGGER crud_todo_search_update")
+            else:
+                self.skipTest(f"no text index on {connection.vendor}")
+
+        warnings = check_search_index(databases=["default"])
+        self.assertEqual([warning.id for warning in warnings], ["crud.W001"])
+
+    def test_the_search_vector_weighs_titles_over_descriptions(self):
+        if connection.vendor != "postgresql":
+            self.skipTest("the search_vector column only exists on PostgreSQL")
+
+        in_title = self.create("Quarterly report")
+        in_description = self.create("Quarterly", "the report")
+        rank = RawSQL(
+            f"ts_rank({ToDo._meta.db_table}.{SEARCH_VECTOR}, plainto_tsquery('english', %s))",
+            ["reports"], output_field=FloatField(),
+        )
+        ranks = dict(ToDo.objects.annotate(rank=rank).values_list("id", "rank"))
+
+        self.assertGreater(ranks[in_title.id], ranks[in_description.id])
+        self.assertEqual(self.titles("reports"), ["Quarterly report", "Quarterly"])
+
+
+class SeedingTests(APITestCase):
+
+    def todo_rows(self):
+        return list(ToDo.objects.order_by("id").values_list(
+            "user__email", "title", "description", "priority", "due_date", "time", "completed",
+        ))
+
+    def test_the_same_seed_generates_the_same_data(self):
+        accounts = seed(3, 4, seed=7, batch_size=5)
+        first = self.todo_rows()
+
+        self.assertEqual([account.email for account in accounts], [seed_email(index) for index in range(3)])
+        self.assertEqual(len(first), 12)
+        self.assertTrue(Account.objects.get(email=seed_email(2)).check_password(SEED_PASSWORD))
+
+        ToDo.objects.all().delete()
+        Account.objects.all().delete()
+        seed(3, 4, seed=7)
+
+        self.assertEqual(self.todo_rows(), first)
+
+    def test_loadtest_drives_every_endpoint(self):
+        seed(2, 5)
+        options = {"users": 2, "todos": 5, "operations": 2, "concurrency": 1, "seed": 0, "password": SEED_PASSWORD}
+
+        report = LoadTestCommand().run(TestClientDriver(), options)
+
+        self.assertEqual(report["total"]["errors"], 0)
+        counts = {endpoint: summary["count"] for endpoint, summary in report["endpoints"].items()}
+        self.assertEqual(counts, {
+            "register": 2, "login": 2, "add": 4, "list": 4, "update": 4, "complete": 4, "delete": 4,
+        })
+        self.assertEqual(ToDo.objects.count(), 10)
+
+
+class AsyncToDoViewTests(ToDoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        token = AccountLoginSerializer.get_token(self.user).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def test_add_list_complete_and_delete(self):
+        due_date = (date.today() + timedelta(days=1)).isoformat()
+        todo = {"title": "async", "due_date": due_date, "time": "09:00"}
+
+        response = await self.async_client.post(
+            reverse("async-todo:add"), todo, content_type="application/json", headers=self.headers
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        todo_id = response.json()["id"]
+
+        response = await self.async_client.get(reverse("async-todo:list"), headers=self.headers)
+        self.assertEqual([todo["id"] for todo in response.json()["results"]], [todo_id])
+        self.assertEqual(response.json()["results"][0]["user"], "Jane Doe")
+
+        response = await self.async_client.patch(reverse("async-todo:complete", args=[todo_id]), headers=self.headers)
+        self.assertTrue(response.json()["completed"])
+
+        response = await self.async_client.delete(reverse("async-todo:delete", args=[todo_id]), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await ToDo.objects.filter(id=todo_id).aexists())
+
+    def test_writes_need_no_csrf_token(self):
+        client = Client(enforce_csrf_checks=True, headers=self.headers)
+        due_date = (date.today() + timedelta(days=1)).isoformat()
+        todo = {"title": "async", "due_date": due_date, "time": "09:00"}
+
+        response = client.post(reverse("async-todo:add"), todo, content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        todo_id = response.json()["id"]
+
+        response = client.patch(reverse("async-todo:complete", args=[todo_id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = client.delete(reverse("async-todo:delete", args=[todo_id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    async def test_requests_without_a_token_are_rejected(self):
+        response = await self.async_client.get(reverse("async-todo:list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_profile_loads_the_account(self):
+        response = await self.async_client.get(reverse("async-account:profile"), headers=self.headers)
+        self.assertEqual(response.json()["email"], "jane@example.com")
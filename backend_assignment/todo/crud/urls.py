@@ -1,14 +1,24 @@
 from django.urls import path
 from .views import (
     AddToDoView, ToDoListView, RetrieveToDoView, 
-    MarkToDoAsCompletedView, UpdateToDoView, DeleteToDoView
+    MarkToDoAsCompletedView, UpdateToDoView, DeleteToDoView,
+    BulkAddToDoView, BulkUpdateToDoView, BulkMarkToDoAsCompletedView, BulkDeleteToDoView,
+    ToDoSyncView, ToDoSearchView, ExportToDoView, ImportToDoView
 )
 
 urlpatterns = [
     path("add/", AddToDoView.as_view(), name="add"),
     path("get/", ToDoListView.as_view(), name="list"),
     path("get/<int:todo_id>/", RetrieveToDoView.as_view(), name="retrieve"),
+    path("search/", ToDoSearchView.as_view(), name="search"),
     path("update/<int:todo_id>/", UpdateToDoView.as_view(), name="update"),
     path("complete/<int:todo_id>/", MarkToDoAsCompletedView.as_view(), name="complete"),
     path("delete/<int:todo_id>/", DeleteToDoView.as_view(), name="delete"),
+    path("sync/", ToDoSyncView.as_view(), name="sync"),
+    path("export/<str:export_format>/", ExportToDoView.as_view(), name="export"),
+    path("import/<str:import_format>/", ImportToDoView.as_view(), name="import"),
+    path("bulk/add/", BulkAddToDoView.as_view(), name="bulk-add"),
+    path("bulk/update/", BulkUpdateToDoView.as_view(), name="bulk-update"),
+    path("bulk/complete/", BulkMarkToDoAsCompletedView.as_view(), name="bulk-complete"),
+    path("bulk/delete/", BulkDeleteToDoView.as_view(), name="bulk-delete"),
 ]
\ No newline at end of file
@@ -1,10 +1,23 @@
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.negotiation import BaseContentNegotiation
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics
 from rest_framework.permissions import IsAuthenticated
 
+from .cache import CachedResponseMixin, invalidate
+from .conditional import get_etag, parse_if_match
 from .models import ToDo
-from .serializers import ToDoSerializer
+from .pagination import ToDoCursorPagination, ToDoSearchPagination
+from .search import search_todos
+from .serializers import (
+    FastToDoSerializer, ToDoSerializer, ToDoListQuerySerializer, ToDoSearchQuerySerializer, UPDATABLE_FIELDS
+)
+from .export import EXPORT_FORMATS, batched, export_rows
+from .importers import IMPORT_FORMATS, ToDoImporter
+from .sync import ResyncRequired, get_changes
 
 
 class AddToDoView(APIView):
@@ -23,33 +36,154 @@ class AddToDoView(APIView):
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
 
-class ToDoListView(generics.ListAPIView):
+class ToDoListView(CachedResponseMixin, generics.ListAPIView):
     """
-    list all ToDos for the authenticated user
+    list all ToDos for the authenticated user, one cursor page at a time,
+    optionally filtered, sorted and narrowed to a sparse fieldset
     """
 
     permission_classes = [IsAuthenticated]
-    serializer_class = ToDoSerializer
+    serializer_class = FastToDoSerializer
+    pagination_class = ToDoCursorPagination
+
+    def get(self, request, *args, **kwargs):
+        return self.cached(request, self.list, *args, **kwargs)
+
+    def get_params(self):
+        """
+        returns the validated filter, ordering and fields query parameters
+        """
+
+        if not hasattr(self, "params"):
+            serializer = ToDoListQuerySerializer(self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self.params = serializer.validated_data
+
+        return self.params
+
+    def get_ordering(self):
+        ordering = self.get_params()["ordering"]
+        return ordering, "-id" if ordering.startswith("-") else "id"
+
+    def get_fields(self):
+        fields = self.get_params().get("fields")
+        return list(fields) if fields else ToDoSerializer.Meta.fields
 
     def get_queryset(self):
-        return ToDo.objects.filter(user=self.request.user)
+        # plain values() rows for the fast serializer, with the keyset columns for the cursor
+        return self.filter_todos().values(
+            *FastToDoSerializer.values_fields(self.get_fields()), self.get_ordering()[0].lstrip("-"), "id"
+        )
+
+    def filter_todos(self):
+        """
+        returns the user's ToDos narrowed by the filter query parameters
+        """
+
+        params = self.get_params()
+        queryset = ToDo.objects.filter(user=self.request.user)
+
+        if params["completed"] is not None:
+            queryset = queryset.filter(completed=params["completed"])
+        if params.get("priority"):
+            queryset = queryset.filter(priority__in=params["priority"])
+        if "due_after" in params:
+            queryset = queryset.filter(due_date__gte=params["due_after"])
+        if "due_before" in params:
+            queryset = queryset.filter(due_date__lte=params["due_before"])
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        native_temporal = getattr(self.request.accepted_renderer, "formats_temporal_values", False)
+        return super().get_serializer(*args, fields=self.get_fields(), native_temporal=native_temporal, **kwargs)
     
 
-class RetrieveToDoView(APIView):
+class ToDoSearchView(ToDoListView):
+    """
+    search the authenticated user's ToDos by title and description, best
+    matches first, with the filters and fields of the ToDo list
+    """
+
+    pagination_class = ToDoSearchPagination
+
+    def get_params(self):
+        if not hasattr(self, "params"):
+            serializer = ToDoSearchQuerySerializer(self.request.query_params)
+            serializer.is_valid(raise_exception=True)
+            self.params = serializer.validated_data
+
+        return self.params
+
+    def get_queryset(self):
+        queryset = search_todos(self.filter_todos(), self.get_params()["q"])
+        return queryset.values(*FastToDoSerializer.values_fields(self.get_fields())).order_by("-rank", "-id")
+
+
+class RetrieveToDoView(CachedResponseMixin, APIView):
     """
     retrieve details of a ToDo object
     """
 
+    permission_classes = [IsAuthenticated]
+
     def get(self, request, todo_id):
+        return self.cached(request, self.retrieve, todo_id)
+
+    def retrieve(self, request, todo_id):
         try:
-            todo = ToDo.objects.get(id=todo_id)
+            # responses are cached per user, so only the owner may read a ToDo
+            todo = ToDo.objects.get(id=todo_id, user=request.user)
             serializer = ToDoSerializer(todo, context={"request": request})
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            response = Response(serializer.data, status=status.HTTP_200_OK)
+            response["ETag"] = get_etag(todo)
+            return response
         except ToDo.DoesNotExist:
             return Response({"error": "ToDo does not exist!"}, status=status.HTTP_404_NOT_FOUND)
+
+
+def conditional_update(request, todo_id, **values):
+    """
+    updates a user's ToDo with a single UPDATE ... WHERE id AND user
+    RETURNING statement, honouring an If-Match precondition on its ETag
+
+    returns the response status, body and the ToDo's new ETag
+    """
+
+    todos = ToDo.objects.filter(id=todo_id, user=request.user)
+    versions = parse_if_match(request, todo_id)
+    if versions is not None:
+        todos = todos.filter(updated_at__in=versions)
+
+    updated = todos.update_returning(updated_at=timezone.now(), **values)
+    if not updated:
+        # only a failed update pays for telling a stale ETag from a missing ToDo
+        if versions is not None and ToDo.objects.filter(id=todo_id, user=request.user).exists():
+            body = {"error": "ToDo was modified since it was last retrieved!"}
+            return status.HTTP_412_PRECONDITION_FAILED, body, None
+        return status.HTTP_404_NOT_FOUND, {"error": "ToDo does not exist!"}, None
+
+    # UPDATE ... RETURNING bypasses the post_save signal
+    invalidate(request.user.id)
+
+    todo = updated[0]
+    return status.HTTP_200_OK, ToDoSerializer(todo, context={"request": request}).data, get_etag(todo)
+
+
+class ConditionalUpdateMixin:
+    """
+    answers ToDo updates through conditional_update
+    """
+
+    def update_todo(self, request, todo_id, **values):
+        status_code, body, etag = conditional_update(request, todo_id, **values)
+        response = Response(body, status=status_code)
+        if etag:
+            response["ETag"] = etag
+        return response
         
 
-class UpdateToDoView(APIView):
+class UpdateToDoView(ConditionalUpdateMixin, APIView):
     """
     update a ToDo object
     """
@@ -57,19 +191,17 @@ class UpdateToDoView(APIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request, todo_id):
-        try:
-            todo = ToDo.objects.get(id=todo_id)
-            serializer = ToDoSerializer(todo, data=request.data, context={"request": request}, partial=True)
-            if serializer.is_valid():
-                serializer.save()
-                return Response(serializer.data, status=status.HTTP_200_OK)
-            else:
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-        except ToDo.DoesNotExist:
-            return Response({"error": "ToDo does not exist!"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = ToDoSerializer(data=request.data, context={"request": request}, partial=True)
+        if serializer.is_valid():
+            values = {
+                field: value for field, value in serializer.validated_data.items() if field in UPDATABLE_FIELDS
+            }
+            return self.update_todo(request, todo_id, **values)
+        else:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
 
-class MarkToDoAsCompletedView(APIView):
+class MarkToDoAsCompletedView(ConditionalUpdateMixin, APIView):
     """
     mark a ToDo as completed
     """
@@ -77,13 +209,7 @@ class MarkToDoAsCompletedView(APIView):
     permission_classes = [IsAuthenticated]
 
     def patch(self, request, todo_id):
-        try:
-            todo = ToDo.objects.get(id=todo_id)
-            todo.completed = True
-            todo.save()
-            return Response(ToDoSerializer(todo, context={"request": request}).data, status=status.HTTP_200_OK)
-        except ToDo.DoesNotExist:
-            return Response({"error": "ToDo does not exist!"}, status=status.HTTP_404_NOT_FOUND)
+        return self.update_todo(request, todo_id, completed=True)
 
 
 class DeleteToDoView(APIView):
@@ -94,9 +220,256 @@ class DeleteToDoView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, todo_id):
+        if not ToDo.objects.filter(id=todo_id, user=request.user).delete_with_tombstones():
+            return Response({"error": "ToDo does not exist!"}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class ToDoSyncView(APIView):
+    """
+    return the authenticated user's ToDos changed and deleted since the
+    watermark handed out by their previous sync, or 410 when the watermark is
+    older than the tombstones are kept and the client has to sync in full
+    """
+
+    permission_classes = [IsAuthenticated]
+    page_size = 500
+
+    def get(self, request):
         try:
-            todo = ToDo.objects.get(id=todo_id)
-            todo.delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
-        except ToDo.DoesNotExist:
-            return Response({"error": "ToDo does not exist!"}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            changes = get_changes(request, request.query_params.get("since"), self.page_size)
+        except ValueError:
+            return Response({"error": "Invalid watermark!"}, status=status.HTTP_400_BAD_REQUEST)
+        except ResyncRequired:
+            return Response({"error": "Full resync required!"}, status=status.HTTP_410_GONE)
+
+        return Response(changes, status=status.HTTP_200_OK)
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """
+    picks the first renderer whatever the Accept header says, for views that
+    stream their own content type and only render errors as JSON
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class ExportToDoView(APIView):
+    """
+    stream all of the authenticated user's ToDos as NDJSON or CSV, holding
+    only one chunk of rows in memory however many ToDos there are
+    """
+
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = IgnoreClientContentNegotiation
+    chunk_size = 2000
+
+    def get(self, request, export_format):
+        if export_format not in EXPORT_FORMATS:
+            return Response({"error": "Unsupported export format!"}, status=status.HTTP_400_BAD_REQUEST)
+
+        content_type, format_lines = EXPORT_FORMATS[export_format]
+        queryset = ToDo.objects.filter(user=request.user).order_by("created_at", "id")
+        lines = format_lines(export_rows(request, queryset, self.chunk_size))
+
+        response = StreamingHttpResponse(batched(lines, self.chunk_size), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="todos.{export_format}"'
+        return response
+
+
+class ImportToDoView(APIView):
+    """
+    import ToDos from an NDJSON or CSV upload, parsed as it streams in and
+    inserted in chunks, and report the rows that were rejected
+    """
+
+    permission_classes = [IsAuthenticated]
+    batch_size = 1000
+
+    def post(self, request, import_format):
+        if import_format not in IMPORT_FORMATS:
+            return Response({"error": "Unsupported import format!"}, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = IMPORT_FORMATS[import_format](request.stream or [])
+        report = ToDoImporter(request.user, batch_size=self.batch_size).run(rows)
+        return Response(report, status=status.HTTP_200_OK)
+
+
+class BulkToDoView(APIView):
+    """
+    base view for batch operations on the authenticated user's ToDos
+
+    every batch runs in a single transaction and reports a result per item,
+    so one bad item does not fail the rest of the batch
+    """
+
+    permission_classes = [IsAuthenticated]
+    max_items = 500
+
+    def get_items(self, request):
+        """
+        returns the list of items in the request body, or an error response
+        """
+
+        items = request.data
+        if isinstance(items, dict):
+            items = items.get("ids")
+
+        if not isinstance(items, list):
+            return None, Response({"error": "Expected a list of items!"}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(items) > self.max_items:
+            return None, Response(
+                {"error": f"A batch cannot contain more than {self.max_items} items!"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return items, None
+
+    def get_owned(self, request, ids):
+        """
+        returns the user's ToDos among ids, locked for the rest of the batch
+        """
+
+        return ToDo.objects.select_for_update().filter(user=request.user, id__in=ids).in_bulk()
+
+    @staticmethod
+    def get_id(item):
+        value = item.get("id") if isinstance(item, dict) else item
+        if isinstance(value, bool) or not isinstance(value, int):
+            return None
+
+        return value
+
+    @staticmethod
+    def result(index, status_code, **fields):
+        return {"index": index, "status": status_code, **fields}
+
+
+class BulkAddToDoView(BulkToDoView):
+    """
+    add a batch of ToDos with a single insert
+    """
+
+    def post(self, request):
+        items, error = self.get_items(request)
+        if error:
+            return error
+
+        results, todos = [], []
+        for index, item in enumerate(items):
+            serializer = ToDoSerializer(data=item, context={"request": request})
+            if serializer.is_valid():
+                todos.append((index, ToDo(user=request.user, **serializer.validated_data)))
+            else:
+                results.append(self.result(index, status.HTTP_400_BAD_REQUEST, errors=serializer.errors))
+
+        with transaction.atomic():
+            ToDo.objects.bulk_create([todo for _, todo in todos])
+            invalidate(request.user.id)
+
+        for index, todo in todos:
+            data = ToDoSerializer(todo, context={"request": request}).data
+            results.append(self.result(index, status.HTTP_201_CREATED, id=todo.id, todo=data))
+
+        results.sort(key=lambda result: result["index"])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class BulkUpdateToDoView(BulkToDoView):
+    """
+    update a batch of ToDos with a single ownership check and bulk_update
+    """
+
+    def patch(self, request):
+        items, error = self.get_items(request)
+        if error:
+            return error
+
+        results, updated = [], {}
+        with transaction.atomic():
+            owned = self.get_owned(request, [self.get_id(item) for item in items])
+
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    results.append(self.result(index, status.HTTP_400_BAD_REQUEST, error="Expected a ToDo object!"))
+                    continue
+
+                todo = owned.get(self.get_id(item))
+                if todo is None:
+                    results.append(self.result(
+                        index, status.HTTP_404_NOT_FOUND, id=item.get("id"), error="ToDo does not exist!"
+                    ))
+                    continue
+
+                fields = {key: value for key, value in item.items() if key != "id"}
+                serializer = ToDoSerializer(todo, data=fields, context={"request": request}, partial=True)
+                if serializer.is_valid():
+                    serializer.apply(todo, serializer.validated_data)
+                    updated[index] = todo
+                else:
+                    results.append(self.result(index, status.HTTP_400_BAD_REQUEST, id=todo.id, errors=serializer.errors))
+
+            ToDo.objects.bulk_update(set(updated.values()), UPDATABLE_FIELDS)
+            invalidate(request.user.id)
+
+        for index, todo in updated.items():
+            data = ToDoSerializer(todo, context={"request": request}).data
+            results.append(self.result(index, status.HTTP_200_OK, id=todo.id, todo=data))
+
+        results.sort(key=lambda result: result["index"])
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class BulkMarkToDoAsCompletedView(BulkToDoView):
+    """
+    mark a batch of ToDos as completed with a single UPDATE ... WHERE id IN
+    """
+
+    def patch(self, request):
+        items, error = self.get_items(request)
+        if error:
+            return error
+
+        ids = [self.get_id(item) for item in items]
+        with transaction.atomic():
+            owned = self.get_owned(request, ids)
+            ToDo.objects.filter(id__in=list(owned)).update(completed=True, updated_at=timezone.now())
+            invalidate(request.user.id)
+
+        results = [
+            self.result(index, status.HTTP_200_OK, id=todo_id) if todo_id in owned
+            else self.result(index, status.HTTP_404_NOT_FOUND, id=todo_id, error="ToDo does not exist!")
+            for index, todo_id in enumerate(ids)
+        ]
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class BulkDeleteToDoView(BulkToDoView):
+    """
+    delete a batch of ToDos with a single DELETE ... WHERE id IN, recording
+    a tombstone for each of them
+    """
+
+    def delete(self, request):
+        items, error = self.get_items(request)
+        if error:
+            return error
+
+        ids = [self.get_id(item) for item in items]
+        with transaction.atomic():
+            owned = self.get_owned(request, ids)
+            ToDo.objects.filter(id__in=list(owned)).delete_with_tombstones()
+
+        results = [
+            self.result(index, status.HTTP_204_NO_CONTENT, id=todo_id) if todo_id in owned
+            else self.result(index, status.HTTP_404_NOT_FOUND, id=todo_id, error="ToDo does not exist!")
+            for index, todo_id in enumerate(ids)
+        ]
+        return Response({"results": results}, status=status.HTTP_200_OK)
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        from .instrumentation import install_query_counter
+
+        connection_created.connect(install_query_counter, dispatch_uid="monitoring.install_query_counter")
+        # connections opened before the app was ready
+        for connection in connections.all(initialized_only=True):
+            install_query_counter(None, connection)
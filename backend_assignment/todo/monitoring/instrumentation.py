@@ -0,0 +1,53 @@
+import contextvars
+import time
+
+
+# query stats of the request being handled in this context; contextvars follow
+# the request into the threads sync_to_async runs database work in
+current_queries = contextvars.ContextVar("current_queries", default=None)
+
+# sql: [count, duration] of the queries of the request being profiled, if any
+current_statements = contextvars.ContextVar("current_statements", default=None)
+
+
+class QueryStats:
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    execute wrapper that adds every query to the stats of the current
+    request, if it is being instrumented or profiled
+    """
+
+    stats = current_queries.get()
+    statements = current_statements.get()
+    if stats is None and statements is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - start
+        if stats is not None:
+            stats.count += 1
+            stats.duration += duration
+        if statements is not None:
+            entry = statements.setdefault(sql, [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    connection_created receiver that wraps the queries of every database
+    connection, once, since reconnecting sends the signal again
+    """
+
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
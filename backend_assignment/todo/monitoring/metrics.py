@@ -0,0 +1,150 @@
+import bisect
+import threading
+
+
+# upper bounds of the histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in labels) + "}"
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    a monotonically increasing value per label set
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self):
+        for labels, value in self.values.items():
+            yield self.name, labels, value
+
+
+class Histogram:
+    """
+    counts observations per label set into cumulative buckets, the way
+    Prometheus histograms are exposed
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.values = {}
+
+    def observe(self, labels, value):
+        series = self.values.get(labels)
+        if series is None:
+            # one count per bucket, plus the +Inf bucket, then the sum
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0]
+
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + (("le", format_number(bound)),), cumulative
+            yield f"{self.name}_sum", labels, series[-1]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class Registry:
+    """
+    holds the metrics of this process; a single lock guards every update,
+    which is a handful of dict operations per request
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def clear(self):
+        with self.lock:
+            for metric in self.metrics:
+                metric.values.clear()
+
+    def render(self, extra=()):
+        """
+        returns the metrics in the Prometheus text exposition format, followed
+        by extra (name, kind, help, samples) gauges collected at scrape time
+        """
+
+        lines = []
+        with self.lock:
+            families = [
+                (metric.name, metric.kind, metric.help_text, list(metric.samples())) for metric in self.metrics
+            ]
+
+        for name, kind, help_text, samples in [*families, *extra]:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{format_labels(labels)} {format_number(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+requests_total = registry.register(Counter(
+    "http_requests_total", "Requests handled, by endpoint, method and status code.",
+))
+request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Time spent handling requests, by endpoint and method.", LATENCY_BUCKETS,
+))
+response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Size of non-streaming response bodies, by endpoint.", SIZE_BUCKETS,
+))
+db_queries = registry.register(Histogram(
+    "db_queries_per_request", "SQL queries issued per instrumented request, by endpoint.", QUERY_COUNT_BUCKETS,
+))
+db_query_duration = registry.register(Counter(
+    "db_query_duration_seconds_total", "Time spent in SQL queries of instrumented requests, by endpoint.",
+))
+
+
+def record(endpoint, method, status_code, duration, size=None, queries=None, query_time=None):
+    """
+    records one handled request
+    """
+
+    with registry.lock:
+        requests_total.inc((("endpoint", endpoint), ("method", method), ("status", status_code)))
+        request_duration.observe((("endpoint", endpoint), ("method", method)), duration)
+        if size is not None:
+            response_size.observe((("endpoint", endpoint),), size)
+        if queries is not None:
+            db_queries.observe((("endpoint", endpoint),), queries)
+            db_query_duration.inc((("endpoint", endpoint),), query_time)
@@ -0,0 +1,216 @@
+import cProfile
+import itertools
+import logging
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics
+from .instrumentation import QueryStats, current_queries, current_statements
+from .profiling import ProfileRing, profile_name, summarize_statements
+
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsMiddleware:
+    """
+    records the latency, response size and SQL queries of every request,
+    labelled by the name of the URL it resolved to, e.g. "list" or
+    "async-todo:list"
+
+    in low overhead mode (METRICS_LOW_OVERHEAD) only one request in
+    METRICS_QUERY_SAMPLE_EVERY has its queries counted and timed, the rest
+    only pay for a clock read and a few dict updates
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.sample_every = settings.METRICS_QUERY_SAMPLE_EVERY if settings.METRICS_LOW_OVERHEAD else 1
+        self.requests = itertools.count()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def start(self):
+        stats = QueryStats() if next(self.requests) % self.sample_every == 0 else None
+        return stats, current_queries.set(stats), time.perf_counter()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        stats, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_queries.reset(token)
+
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_queries.reset(token)
+
+        self.record(request, response, time.perf_counter() - start, stats)
+        return response
+
+    def record(self, request, response, duration, stats):
+        match = request.resolver_match
+        endpoint = match.view_name if match is not None else "unresolved"
+
+        # a streaming response is still being produced, so only the time to its headers is known
+        size = None
+        if not response.streaming:
+            length = response.get("Content-Length")
+            size = int(length) if length is not None else len(response.content)
+
+        metrics.record(
+            endpoint, request.method, response.status_code, duration, size,
+            stats.count if stats is not None else None,
+            stats.duration if stats is not None else None,
+        )
+
+
+def is_staff(request):
+    """
+    returns True when the request was authenticated as a staff account, by
+    the admin session or, once the view has run, by the DRF authentication
+    that sets the user of the request it wraps
+    """
+
+    user = getattr(request, "user", None)
+    # is_staff is not a token claim, so reading it loads it from the database
+    return user is not None and user.is_authenticated and user.is_staff
+
+
+class ProfilingMiddleware:
+    """
+    runs requests under cProfile and keeps the results in a ring of
+    PROFILING_MAX_FILES files in PROFILING_DIR, each next to a JSON sidecar
+    with the endpoint, status, timing and a summary of the SQL queries
+
+    staff profile a request by sending the X-Profile header or the profile
+    query parameter, and find its files by the X-Profile-Id response header.
+    such requests that carry credentials are profiled, and the profile kept
+    only if the view authenticated them as staff, so that the middleware
+    never authenticates a request itself;
+    PROFILING_SAMPLE_EVERY also profiles one in that many requests. one
+    request is profiled at a time per process, others go unprofiled
+
+    under ASGI the profile covers the event loop thread only, so it includes
+    whatever else ran on the loop meanwhile but not the work views hand to
+    sync_to_async threads
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    header = "X-Profile"
+    query_parameter = "profile"
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+
+        self.get_response = get_response
+        self.sample_every = settings.PROFILING_SAMPLE_EVERY
+        self.requests = itertools.count(1)
+        self.ring = ProfileRing(settings.PROFILING_DIR, settings.PROFILING_MAX_FILES)
+        self.lock = threading.Lock()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def is_requested(self, request):
+        if self.header not in request.headers and self.query_parameter not in request.GET:
+            return False
+        # anonymous requests cannot be from staff
+        return "Authorization" in request.headers or settings.SESSION_COOKIE_NAME in request.COOKIES
+
+    def is_sampled(self):
+        return self.sample_every > 0 and next(self.requests) % self.sample_every == 0
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        requested = self.is_requested(request)
+        if not (requested or self.is_sampled()) or not self.lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            profiler, token = cProfile.Profile(), current_statements.set({})
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+                statements = current_statements.get()
+                current_statements.reset(token)
+
+            if requested and not is_staff(request):
+                return response
+            return self.save(request, response, requested, profiler, statements, time.perf_counter() - start)
+        finally:
+            self.lock.release()
+
+    async def __acall__(self, request):
+        requested = self.is_requested(request)
+        if not (requested or self.is_sampled()) or not self.lock.acquire(blocking=False):
+            return await self.get_response(request)
+
+        try:
+            profiler, token = cProfile.Profile(), current_statements.set({})
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                response = await self.get_response(request)
+            finally:
+                profiler.disable()
+                statements = current_statements.get()
+                current_statements.reset(token)
+
+            duration = time.perf_counter() - start
+            if requested and not await sync_to_async(is_staff)(request):
+                return response
+            return await sync_to_async(self.save)(request, response, requested, profiler, statements, duration)
+        finally:
+            self.lock.release()
+
+    def save(self, request, response, requested, profiler, statements, duration):
+        match = request.resolver_match
+        endpoint = match.view_name if match is not None else "unresolved"
+        name = profile_name(endpoint)
+        metadata = {
+            "endpoint": endpoint,
+            "route": match.route if match is not None else None,
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "duration": duration,
+            "trigger": "request" if requested else "sample",
+            "queries": summarize_statements(statements, settings.PROFILING_SQL_STATEMENTS),
+        }
+
+        try:
+            self.ring.write(name, profiler, metadata)
+        except OSError:
+            logger.exception("could not write the profile of %s %s", request.method, request.path)
+            return response
+
+        if requested:
+            response["X-Profile-Id"] = name
+        return response
@@ -0,0 +1,70 @@
+import itertools
+import json
+import os
+import re
+import time
+from pathlib import Path
+
+
+# files of one profile: the pstats dump and its JSON sidecar
+PROFILE_SUFFIX = ".prof"
+SIDECAR_SUFFIX = ".json"
+
+_sequence = itertools.count()
+
+
+def profile_name(endpoint):
+    """
+    returns a unique file name for a profile of the endpoint, starting with
+    the time so that names sort from oldest to newest
+    """
+
+    now = time.time()
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now)) + f"{now % 1:.6f}"[1:]
+    label = re.sub(r"[^A-Za-z0-9_.-]+", "_", endpoint)
+    return f"{stamp}-{os.getpid()}-{next(_sequence)}-{label}"
+
+
+def summarize_statements(statements, limit):
+    """
+    summarizes the sql: [count, duration] of a profiled request, listing the
+    limit statements that took the longest in total
+    """
+
+    top = sorted(statements.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    return {
+        "count": sum(count for count, _ in statements.values()),
+        "duration": sum(duration for _, duration in statements.values()),
+        "statements": [{"sql": sql, "count": count, "duration": duration} for sql, (count, duration) in top],
+    }
+
+
+class ProfileRing:
+    """
+    keeps the latest max_files profiles in a directory, deleting the oldest
+    one whenever a new one is written
+    """
+
+    def __init__(self, directory, max_files):
+        self.directory = Path(directory)
+        self.max_files = max_files
+
+    def write(self, name, profiler, metadata):
+        """
+        dumps the profiler's stats as name.prof, which pstats, snakeviz and
+        gprof2dot read, with the metadata in name.json next to it
+        """
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / f"{name}{PROFILE_SUFFIX}")
+        with open(self.directory / f"{name}{SIDECAR_SUFFIX}", "w") as sidecar:
+            json.dump(metadata, sidecar, indent=2)
+
+        self.prune()
+
+    def prune(self):
+        profiles = sorted(self.directory.glob(f"*{PROFILE_SUFFIX}"))
+        for profile in profiles[:max(len(profiles) - self.max_files, 0)]:
+            # another process may be pruning the same ring
+            profile.unlink(missing_ok=True)
+            profile.with_suffix(SIDECAR_SUFFIX).unlink(missing_ok=True)
@@ -0,0 +1,249 @@
+import json
+import pstats
+import re
+import tempfile
+from datetime import date, time, timedelta
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from account.authentication import StatelessJWTAuthentication
+from account.models import Account
+from account.serializers import AccountLoginSerializer
+from crud.models import ToDo
+from . import metrics
+from .metrics import Counter, Histogram, Registry
+
+
+def sample(body, name, **labels):
+    """
+    returns the value of the sample with the name and labels in a metrics
+    body, or None when it is missing
+    """
+
+    for line in body.splitlines():
+        match = re.fullmatch(r"(\w+)(?:\{(.*)\})? (\S+)", line)
+        if match is None or match[1] != name:
+            continue
+        found = dict(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match[2] or ""))
+        if found == {key: str(value) for key, value in labels.items()}:
+            return float(match[3])
+
+    return None
+
+
+class RegistryTests(SimpleTestCase):
+
+    def test_histograms_are_rendered_with_cumulative_buckets(self):
+        registry = Registry()
+        histogram = registry.register(Histogram("latency_seconds", "Latency.", (0.1, 1.0)))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe((("endpoint", "list"),), value)
+
+        body = registry.render()
+
+        self.assertIn("# TYPE latency_seconds histogram", body)
+        self.assertEqual(sample(body, "latency_seconds_bucket", endpoint="list", le="0.1"), 2)
+        self.assertEqual(sample(body, "latency_seconds_bucket", endpoint="list", le="1.0"), 3)
+        self.assertEqual(sample(body, "latency_seconds_bucket", endpoint="list", le="+Inf"), 4)
+        self.assertEqual(sample(body, "latency_seconds_count", endpoint="list"), 4)
+        self.assertAlmostEqual(sample(body, "latency_seconds_sum", endpoint="list"), 3.65)
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        registry.register(Counter("hits_total", "Hits.")).inc((("path", 'a"b\\c\nd'),))
+
+        self.assertIn('hits_total{path="a\\"b\\\\c\\nd"} 1', registry.render())
+
+    def test_extra_families_are_rendered(self):
+        body = Registry().render([("db_pool_idle", "gauge", "Idle.", [("db_pool_idle", (("database", "todo@db"),), 3)])])
+
+        self.assertIn("# TYPE db_pool_idle gauge", body)
+        self.assertEqual(sample(body, "db_pool_idle", database="todo@db"), 3)
+
+
+@override_settings(METRICS_TOKEN="secret")
+class MetricsMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        metrics.registry.clear()
+        caches[settings.TODO_RESPONSE_CACHE].clear()
+        self.user = Account.objects.create_user("Jane", "Doe", "jane@example.com", "PassWORD1!")
+        ToDo.objects.create(user=self.user, title="todo", due_date=date.today() + timedelta(days=1), time=time(9, 30))
+        token = AccountLoginSerializer.get_token(self.user).access_token
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    def scrape(self, token="secret"):
+        response = self.client.get(reverse("metrics"), headers={"Authorization": f"Bearer {token}"} if token else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_url_name(self):
+        response = self.client.get(reverse("list"), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.get(reverse("retrieve", args=[0]), headers=self.headers)
+
+        body = self.scrape()
+
+        self.assertEqual(sample(body, "http_requests_total", endpoint="list", method="GET", status=200), 1)
+        self.assertEqual(sample(body, "http_requests_total", endpoint="retrieve", method="GET", status=404), 1)
+        self.assertEqual(sample(body, "http_request_duration_seconds_count", endpoint="list", method="GET"), 1)
+        self.assertEqual(sample(body, "db_queries_per_request_count", endpoint="list"), 1)
+        # the page of ToDos and the account status, the rest of the user is read from the token
+        self.assertEqual(sample(body, "db_queries_per_request_sum", endpoint="list"), 2)
+        self.assertGreater(sample(body, "db_query_duration_seconds_total", endpoint="list"), 0)
+        self.assertEqual(sample(body, "http_response_size_bytes_sum", endpoint="list"), len(response.content))
+
+    def test_unresolved_requests_share_one_label(self):
+        self.client.get("/no/such/page/")
+        self.client.get("/nor/this/one/")
+
+        body = self.scrape()
+
+        self.assertEqual(sample(body, "http_requests_total", endpoint="unresolved", method="GET", status=404), 2)
+
+    def test_streaming_responses_are_not_sized(self):
+        response = self.client.get(reverse("export", args=["ndjson"]), headers=self.headers)
+        b"".join(response.streaming_content)
+
+        body = self.scrape()
+
+        self.assertEqual(sample(body, "http_requests_total", endpoint="export", method="GET", status=200), 1)
+        self.assertIsNone(sample(body, "http_response_size_bytes_count", endpoint="export"))
+
+    @override_settings(METRICS_LOW_OVERHEAD=True, METRICS_QUERY_SAMPLE_EVERY=3)
+    def test_low_overhead_mode_samples_query_counts(self):
+        for _ in range(6):
+            self.client.get(reverse("list"), headers=self.headers)
+
+        body = self.scrape()
+
+        self.assertEqual(sample(body, "http_requests_total", endpoint="list", method="GET", status=200), 6)
+        self.assertEqual(sample(body, "db_queries_per_request_count", endpoint="list"), 2)
+
+    def test_metrics_token_is_required_when_set(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(reverse("metrics"), headers={"Authorization": "Bearer wrong"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.scrape("secret")
+
+    @override_settings(METRICS_TOKEN="")
+    def test_metrics_are_only_served_without_a_token_in_debug(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        with override_settings(DEBUG=True):
+            self.scrape(None)
+
+    async def test_async_requests_count_queries_run_in_threads(self):
+        response = await self.async_client.get(reverse("async-todo:list"), headers=self.headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        body = metrics.registry.render()
+
+        self.assertEqual(sample(body, "http_requests_total", endpoint="async-todo:list", method="GET", status=200), 1)
+        self.assertGreater(sample(body, "db_queries_per_request_sum", endpoint="async-todo:list"), 0)
+
+
+class ProfilingMiddlewareTests(APITestCase):
+
+    def setUp(self):
+        caches[settings.TODO_RESPONSE_CACHE].clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        settings_override = override_settings(PROFILING_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = Account.objects.create_user("Jane", "Doe", "jane@example.com", "PassWORD1!", is_staff=True)
+        self.user = Account.objects.create_user("John", "Doe", "john@example.com", "PassWORD1!")
+        ToDo.objects.create(user=self.staff, title="todo", due_date=date.today() + timedelta(days=1), time=time(9, 30))
+
+    def headers(self, user, **extra):
+        token = AccountLoginSerializer.get_token(user).access_token
+        return {"Authorization": f"Bearer {token}", **extra}
+
+    def profiles(self):
+        return sorted(path.stem for path in self.directory.glob("*.prof"))
+
+    def test_staff_can_profile_a_request(self):
+        response = self.client.get(reverse("list"), headers=self.headers(self.staff, **{"X-Profile": "1"}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        name = response["X-Profile-Id"]
+        self.assertEqual(self.profiles(), [name])
+
+        stats = pstats.Stats(str(self.directory / f"{name}.prof"))
+        self.assertTrue(any(function == "get" for _, _, function in stats.stats))
+
+        metadata = json.loads((self.directory / f"{name}.json").read_text())
+        self.assertEqual(
+            (metadata["endpoint"], metadata["route"], metadata["method"], metadata["status"], metadata["trigger"]),
+            ("list", "api/todo/get/", "GET", 200, "request"),
+        )
+        # the page of ToDos and the account status
+        self.assertEqual(metadata["queries"]["count"], 2)
+        self.assertTrue(any("crud_todo" in statement["sql"] for statement in metadata["queries"]["statements"]))
+
+    def test_query_parameter_triggers_a_profile(self):
+        response = self.client.get(reverse("list") + "?profile", headers=self.headers(self.staff))
+
+        self.assertEqual(self.profiles(), [response["X-Profile-Id"]])
+
+    def test_other_users_cannot_profile(self):
+        response = self.client.get(reverse("list"), headers=self.headers(self.user, **{"X-Profile": "1"}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("X-Profile-Id", response)
+
+        response = self.client.get(reverse("list"), headers={"X-Profile": "1"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertNotIn("X-Profile-Id", response)
+
+        self.assertEqual(self.profiles(), [])
+
+    def test_staff_is_checked_on_the_user_the_view_authenticated(self):
+        authenticate = StatelessJWTAuthentication.authenticate
+
+        with mock.patch.object(StatelessJWTAuthentication, "authenticate", autospec=True, side_effect=authenticate):
+            response = self.client.get(reverse("list"), headers=self.headers(self.staff, **{"X-Profile": "1"}))
+            self.assertIn("X-Profile-Id", response)
+            response = self.client.get(reverse("list"), headers=self.headers(self.user, **{"X-Profile": "1"}))
+            self.assertNotIn("X-Profile-Id", response)
+
+            # once per request, by the view
+            self.assertEqual(StatelessJWTAuthentication.authenticate.call_count, 2)
+
+        self.assertEqual(len(self.profiles()), 1)
+
+    async def test_async_requests_can_be_profiled(self):
+        headers = await sync_to_async(self.headers)(self.staff, **{"X-Profile": "1"})
+        response = await self.async_client.get(reverse("async-todo:list"), headers=headers)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metadata = json.loads((self.directory / f"{response['X-Profile-Id']}.json").read_text())
+        self.assertEqual(metadata["endpoint"], "async-todo:list")
+        self.assertGreater(metadata["queries"]["count"], 0)
+
+    @override_settings(PROFILING_SAMPLE_EVERY=2, PROFILING_MAX_FILES=2)
+    def test_sampled_profiles_are_kept_in_a_bounded_ring(self):
+        for _ in range(8):
+            response = self.client.get(reverse("list"), headers=self.headers(self.user))
+            self.assertNotIn("X-Profile-Id", response)
+
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertEqual(sorted(path.stem for path in self.directory.glob("*.json")), profiles)
+        metadata = json.loads((self.directory / f"{profiles[-1]}.json").read_text())
+        self.assertEqual(metadata["trigger"], "sample")
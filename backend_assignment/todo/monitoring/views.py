@@ -0,0 +1,54 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from . import metrics
+
+
+# stats of todo.pooled_postgresql that describe the pool right now, the rest count up
+POOL_GAUGES = {"size", "idle", "in_use", "max_size", "max_overflow"}
+
+
+def pool_metrics():
+    """
+    returns the stats of the connection pools of todo.pooled_postgresql as
+    (name, kind, help, samples) families, if any database uses it
+    """
+
+    if not any(database["ENGINE"] == "todo.pooled_postgresql" for database in settings.DATABASES.values()):
+        return []
+
+    from todo.pooled_postgresql.base import pool_stats
+
+    samples = {}
+    for database, stats in pool_stats().items():
+        for name, value in stats.items():
+            samples.setdefault(name, []).append((f"db_pool_{name}", (("database", database),), value))
+
+    return [
+        (f"db_pool_{name}", "gauge" if name in POOL_GAUGES else "counter", f"Connection pool {name.replace('_', ' ')}.", series)
+        for name, series in samples.items()
+    ]
+
+
+class MetricsView(View):
+    """
+    serves the metrics of this process in the Prometheus text format, to
+    scrapers presenting METRICS_TOKEN as a bearer token; without a token the
+    endpoint is only served in DEBUG
+    """
+
+    content_type = "text/plain; version=0.0.4; charset=utf-8"
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if not token and not settings.DEBUG:
+            raise Http404
+        if token:
+            expected = f"Bearer {token}"
+            if not hmac.compare_digest(request.headers.get("Authorization", ""), expected):
+                return HttpResponse("Invalid metrics token!\n", status=401, content_type="text/plain")
+
+        return HttpResponse(metrics.registry.render(pool_metrics()), content_type=self.content_type)
@@ -0,0 +1,78 @@
+"""
+Helpers shared by the project's benchmark management commands.
+"""
+
+import json
+import time
+from contextlib import contextmanager
+
+from django.test.utils import (
+    setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+)
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    runs the block against a throwaway test database, so that benchmarks
+    never read or write real data
+    """
+
+    setup_test_environment()
+    old_config = setup_databases(verbosity, interactive=False)
+    try:
+        yield
+    finally:
+        teardown_databases(old_config, verbosity)
+        teardown_test_environment()
+
+
+@contextmanager
+def stopwatch(samples):
+    """
+    appends the duration of the block, in seconds, to samples
+    """
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - start)
+
+
+def percentile(ordered, pct):
+    """
+    returns the nearest-rank percentile of an already sorted list
+    """
+
+    if not ordered:
+        return 0.0
+
+    rank = round(pct / 100 * (len(ordered) - 1))
+    return ordered[min(len(ordered) - 1, max(0, rank))]
+
+
+def summarize(samples, elapsed=None):
+    """
+    summarizes per-operation durations (in seconds) as throughput and
+    latency percentiles in milliseconds
+    """
+
+    ordered = sorted(samples)
+    elapsed = elapsed if elapsed is not None else sum(ordered)
+    return {
+        "count": len(ordered),
+        "throughput": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def write_report(stdout, report):
+    """
+    writes a benchmark report as JSON, so that runs can be diffed across commits
+    """
+
+    stdout.write(json.dumps(report, indent=2, sort_keys=True))
@@ -0,0 +1,170 @@
+"""
+JSON renderer and parser for the REST API that use orjson when it is
+installed, and fall back to the standard library json module otherwise.
+
+Both encoders write date, time and datetime values the way DRF's fields do,
+so serializers can hand them over unconverted.
+"""
+
+import codecs
+import datetime
+import json
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import ISO_8601, renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def format_temporal(value):
+    """
+    formats a date, time or datetime like DRF's DateField, TimeField and
+    DateTimeField do, or returns None for any other value
+    """
+
+    if isinstance(value, datetime.datetime):
+        output_format = api_settings.DATETIME_FORMAT
+        if output_format is None:
+            return value
+
+        if settings.USE_TZ:
+            current_timezone = timezone.get_current_timezone()
+            value = value.astimezone(current_timezone) if timezone.is_aware(value) \
+                else timezone.make_aware(value, current_timezone)
+
+        if output_format.lower() != ISO_8601:
+            return value.strftime(output_format)
+
+        value = value.isoformat()
+        return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+    for kind, output_format in ((datetime.date, api_settings.DATE_FORMAT), (datetime.time, api_settings.TIME_FORMAT)):
+        if isinstance(value, kind):
+            if output_format is None:
+                return value
+            if output_format.lower() == ISO_8601:
+                return value.isoformat()
+            return value.strftime(output_format)
+
+    return None
+
+
+class TemporalJSONEncoder(encoders.JSONEncoder):
+    """
+    DRF's JSON encoder, with dates and times formatted as DRF's fields do
+    """
+
+    def default(self, obj):
+        formatted = format_temporal(obj)
+        if formatted is not None:
+            return formatted
+
+        return super().default(obj)
+
+
+def native_datetimes():
+    """
+    returns True when orjson's own datetime output matches DRF's, i.e. ISO
+    8601 in UTC, so datetimes need not be passed back to Python; datetimes
+    read from the database are always in UTC
+    """
+
+    return (
+        settings.USE_TZ
+        and timezone.get_current_timezone_name() == "UTC"
+        and all(
+            output_format is not None and output_format.lower() == ISO_8601
+            for output_format in (api_settings.DATETIME_FORMAT, api_settings.DATE_FORMAT, api_settings.TIME_FORMAT)
+        )
+    )
+
+
+encoder = TemporalJSONEncoder()
+
+
+def orjson_default(obj):
+    formatted = format_temporal(obj)
+    if formatted is not None:
+        return formatted
+
+    # lazy translations, decimals, querysets and the rest of DRF's special cases
+    return encoder.default(obj)
+
+
+def dumps(data):
+    """
+    encodes data as compact JSON bytes
+    """
+
+    if orjson is None or not api_settings.UNICODE_JSON:
+        return json.dumps(
+            data, cls=TemporalJSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+            allow_nan=not api_settings.STRICT_JSON, separators=(",", ":"),
+        ).encode()
+
+    if native_datetimes():
+        # orjson writes naive datetimes as UTC and UTC offsets as Z, like DRF does
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+    else:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    return orjson.dumps(data, default=orjson_default, option=options)
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """
+    renders JSON with orjson when it is installed; indented output is left
+    to DRF's renderer
+    """
+
+    encoder_class = TemporalJSONEncoder
+
+    # serializers may skip their own date and time conversions for this renderer, which
+    # only pays off with orjson; the json module would call back into Python for each value
+    formats_temporal_values = orjson is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # like DRF, escape the separators that are valid JSON but not valid JavaScript;
+        # one scan for their shared lead bytes is much cheaper than copying the body twice
+        body = dumps(data)
+        if b"\xe2\x80" in body:
+            body = body.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return body
+
+
+class FastJSONParser(JSONParser):
+    """
+    parses JSON request bodies with orjson when it is installed
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        body = stream.read() if stream is not None else b""
+
+        try:
+            if codecs.lookup(encoding).name != "utf-8":
+                body = body.decode(encoding)
+            return orjson.loads(body)
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f"JSON parse error - {exc}")
@@ -0,0 +1,6 @@
+"""
+PostgreSQL database backend that borrows connections from an in-process pool.
+
+Enable it with ENGINE = 'todo.pooled_postgresql' and size it with the
+'POOL' entry of the database settings.
+"""
@@ -0,0 +1,123 @@
+import threading
+
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel, is_psycopg3
+
+from .pool import ConnectionPool
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(settings_dict):
+    """
+    returns the pool shared by every thread connecting with settings_dict
+    """
+
+    key = tuple(settings_dict.get(name) for name in ("HOST", "PORT", "NAME", "USER"))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            options = settings_dict.get("POOL", {})
+            pool = _pools[key] = ConnectionPool(
+                max_size=options.get("MAX_SIZE", 10),
+                max_overflow=options.get("MAX_OVERFLOW", 5),
+                timeout=options.get("TIMEOUT", 5.0),
+                health_check_interval=options.get("HEALTH_CHECK_INTERVAL", 30.0),
+                check=check_connection,
+                reset=reset_connection,
+            )
+
+    return pool
+
+
+def pool_stats():
+    """
+    returns the stats of every pool, keyed by database name
+    """
+
+    with _pools_lock:
+        pools = list(_pools.items())
+
+    return {f"{key[2]}@{key[0] or 'localhost'}": pool.stats() for key, pool in pools}
+
+
+def close_pools(database_name=None):
+    """
+    closes the idle connections of every pool, or of the pools of one database
+    """
+
+    with _pools_lock:
+        pools = [pool for key, pool in _pools.items() if database_name in (None, key[2])]
+
+    for pool in pools:
+        pool.close_idle()
+
+
+def check_connection(connection):
+    """
+    pings a connection that has been idle for a while
+    """
+
+    if connection.closed:
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+
+    return reset_connection(connection)
+
+
+def reset_connection(connection):
+    """
+    returns a connection to a clean state before it goes back to the pool
+    """
+
+    if connection.closed:
+        return False
+
+    if is_psycopg3:
+        idle = connection.info.transaction_status == connection.info.transaction_status.IDLE
+    else:
+        idle = connection.get_transaction_status() == 0  # TRANSACTION_STATUS_IDLE
+
+    if not idle:
+        connection.rollback()
+
+    return True
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # pooled connections would keep the test database from being dropped
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend that borrows connections from an in-process pool
+    instead of opening a new one for every request
+
+    Django closes the connection at the end of each request when
+    CONN_MAX_AGE is 0; closing here returns the connection to the pool
+    """
+
+    creation_class = DatabaseCreation
+
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.settings_dict)
+        connection = pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+
+        # the base class records the isolation level when it opens a connection,
+        # so connections reused from the pool must record it too
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        self.isolation_level = IsolationLevel(isolation_level) if isolation_level else IsolationLevel.READ_COMMITTED
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                get_pool(self.settings_dict).release(self.connection)
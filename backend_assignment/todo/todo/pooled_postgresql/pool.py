@@ -0,0 +1,181 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """
+    raised when no connection becomes available within the pool timeout
+    """
+
+
+class ConnectionPool:
+    """
+    a thread-safe pool of DB-API connections
+
+    keeps up to max_size connections open between uses and opens up to
+    max_overflow extra ones during bursts, which are closed as soon as they
+    are returned. once both are exhausted, callers wait up to timeout seconds
+    for a connection to be returned before PoolTimeout is raised
+
+    idle connections are health checked before being handed out again when
+    they have been idle for longer than health_check_interval seconds
+    """
+
+    def __init__(self, max_size=10, max_overflow=5, timeout=5.0, health_check_interval=30.0,
+                 check=None, reset=None):
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._check = check or (lambda connection: True)
+        self._reset = reset or (lambda connection: True)
+
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "connects": 0,
+            "overflow_checkouts": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "failed_health_checks": 0,
+            "discarded": 0,
+        }
+
+    def acquire(self, connect):
+        """
+        returns a pooled connection, opening one with connect() when the
+        pool has room and no idle connection is available
+        """
+
+        connection, idle_since = self._checkout()
+        if connection is None:
+            return self._open(connect)
+
+        if time.monotonic() - idle_since > self.health_check_interval and not self._healthy(connection):
+            with self._condition:
+                self._stats["failed_health_checks"] += 1
+
+            self._close(connection)
+            return self._open(connect)
+
+        return connection
+
+    def release(self, connection):
+        """
+        returns a connection to the pool, closing it when it is broken or
+        was opened as overflow
+        """
+
+        reusable = self._healthy(connection, self._reset)
+        with self._condition:
+            if reusable and self._size <= self.max_size:
+                self._idle.append((connection, time.monotonic()))
+                self._condition.notify()
+                return
+
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._condition.notify()
+
+        self._close(connection)
+
+    def close_idle(self):
+        """
+        closes every idle connection, e.g. before the database is dropped
+        """
+
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._condition.notify_all()
+
+        for connection, _ in idle:
+            self._close(connection)
+
+    def stats(self):
+        """
+        returns a snapshot of the pool's gauges and counters
+        """
+
+        with self._condition:
+            return {
+                **self._stats,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "max_size": self.max_size,
+                "max_overflow": self.max_overflow,
+            }
+
+    def _checkout(self):
+        """
+        reserves an idle connection, or a slot to open a new one in
+        """
+
+        with self._condition:
+            self._stats["checkouts"] += 1
+            waited_from = None
+            while True:
+                if self._idle:
+                    # the most recently used connection is the least likely to have gone stale
+                    connection, idle_since = self._idle.pop()
+                    break
+
+                if self._size < self.max_size + self.max_overflow:
+                    self._size += 1
+                    if self._size > self.max_size:
+                        self._stats["overflow_checkouts"] += 1
+                    connection, idle_since = None, None
+                    break
+
+                now = time.monotonic()
+                if waited_from is None:
+                    waited_from = now
+                    self._stats["waits"] += 1
+
+                remaining = waited_from + self.timeout - now
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    self._stats["wait_seconds"] += now - waited_from
+                    raise PoolTimeout(
+                        f"no database connection became available within {self.timeout} seconds"
+                    )
+
+                self._condition.wait(remaining)
+
+            if waited_from is not None:
+                self._stats["wait_seconds"] += time.monotonic() - waited_from
+
+        return connection, idle_since
+
+    def _open(self, connect):
+        try:
+            connection = connect()
+        except BaseException:
+            # give the reserved slot back so that waiters are not starved
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._stats["connects"] += 1
+
+        return connection
+
+    def _healthy(self, connection, check=None):
+        try:
+            return bool((check or self._check)(connection))
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -12,7 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
-import os, sys
+import os, sys, tempfile
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -47,9 +47,12 @@ INSTALLED_APPS = [
     'rest_framework',
     'account',
     'crud',
+    'monitoring',
 ]
 
 MIDDLEWARE = [
+    # first, so that it times the whole middleware stack
+    'monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,6 +60,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # last, so that profiles cover the view and little else
+    'monitoring.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'todo.urls'
@@ -83,19 +88,94 @@ WSGI_APPLICATION = 'todo.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# set DB_POOL=true to borrow connections from an in-process pool instead of
+# keeping one persistent connection per thread
+DB_POOL = os.getenv('DB_POOL', 'false').lower() in ('1', 'true', 'yes')
+
 DATABASES = {
     # postgres database
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'todo.pooled_postgresql' if DB_POOL else 'django.db.backends.postgresql',
         'NAME': os.getenv('DB_NAME'),
         'USER': os.getenv('DB_USER'),
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        # pooled connections go back to the pool at the end of every request
+        'CONN_MAX_AGE': 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+            'MAX_OVERFLOW': int(os.getenv('DB_POOL_MAX_OVERFLOW', 5)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 5)),
+            'HEALTH_CHECK_INTERVAL': float(os.getenv('DB_POOL_HEALTH_CHECK_INTERVAL', 30)),
+        },
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    # rendered ToDo responses, e.g. FileBasedCache or RedisCache to share them between processes
+    'todo': {
+        'BACKEND': os.getenv('TODO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('TODO_CACHE_LOCATION', 'todo'),
+        'TIMEOUT': int(os.getenv('TODO_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('TODO_CACHE_MAX_ENTRIES', 10000)),
+        },
+    },
+}
+
+# cache alias the ToDo list and retrieve responses are stored in
+TODO_RESPONSE_CACHE = 'todo'
+
+# seconds a ToDo write is held back from delta syncs, longer than any write transaction takes to commit
+TODO_SYNC_LAG = float(os.getenv('TODO_SYNC_LAG', 2))
+# days the tombstones of deleted ToDos are kept for delta syncs, older ones are removed by
+# prune_tombstones, and clients that last synced before then are told to sync again in full
+TODO_TOMBSTONE_RETENTION_DAYS = int(os.getenv('TODO_TOMBSTONE_RETENTION_DAYS', 30))
+
+# notifications of ToDos coming due, see crud/reminders.py
+REMINDER_SINK = os.getenv('REMINDER_SINK', 'crud.reminders.FileSink')
+REMINDER_FILE = os.getenv('REMINDER_FILE', os.path.join(tempfile.gettempdir(), 'todo-reminders.ndjson'))
+# minutes before a ToDo is due that its reminder is sent
+REMINDER_LEAD_MINUTES = int(os.getenv('REMINDER_LEAD_MINUTES', 30))
+
+# seconds a reminder scanner holds a kind without recording a batch before
+# another scanner may take over, e.g. after the first one died
+REMINDER_LEASE_SECONDS = int(os.getenv('REMINDER_LEASE_SECONDS', 300))
+
+# seconds an account's principal and active status are cached; a deactivated
+# account stays authenticated for at most this long in processes that did not
+# handle the deactivation
+ACCOUNT_PRINCIPAL_CACHE_TIMEOUT = int(os.getenv('ACCOUNT_PRINCIPAL_CACHE_TIMEOUT', 30))
+
+# request metrics served on /metrics/, see monitoring/middleware.py
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# count and time the SQL queries of only one request in METRICS_QUERY_SAMPLE_EVERY
+METRICS_LOW_OVERHEAD = os.getenv('METRICS_LOW_OVERHEAD', 'false').lower() in ('1', 'true', 'yes')
+METRICS_QUERY_SAMPLE_EVERY = int(os.getenv('METRICS_QUERY_SAMPLE_EVERY', 100))
+# bearer token scrapers must send, when unset the endpoint is only served in DEBUG
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# cProfile dumps of requests staff ask for with the X-Profile header, see monitoring/middleware.py
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# also profile one request in PROFILING_SAMPLE_EVERY, 0 to only profile on request
+PROFILING_SAMPLE_EVERY = int(os.getenv('PROFILING_SAMPLE_EVERY', 0))
+PROFILING_DIR = os.getenv('PROFILING_DIR', os.path.join(tempfile.gettempdir(), 'todo-profiles'))
+# profiles kept in PROFILING_DIR, older ones are deleted
+PROFILING_MAX_FILES = int(os.getenv('PROFILING_MAX_FILES', 100))
+# slowest SQL statements listed next to each profile
+PROFILING_SQL_STATEMENTS = int(os.getenv('PROFILING_SQL_STATEMENTS', 10))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -148,7 +228,17 @@ AUTH_USER_MODEL = 'account.Account'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'account.authentication.StatelessJWTAuthentication',
+    ],
+    # orjson backed when it is installed, see todo/fast_json.py
+    'DEFAULT_RENDERER_CLASSES': [
+        'todo.fast_json.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'todo.fast_json.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
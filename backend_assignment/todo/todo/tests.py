@@ -0,0 +1,128 @@
+import io
+import threading
+from datetime import datetime, time, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from . import fast_json
+from .fast_json import FastJSONParser, FastJSONRenderer
+from .pooled_postgresql.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def make_pool(self, **options):
+        options.setdefault("check", lambda connection: not connection.closed)
+        options.setdefault("reset", lambda connection: not connection.closed)
+        return ConnectionPool(**options)
+
+    def test_released_connections_are_reused(self):
+        pool = self.make_pool(max_size=2)
+
+        first = pool.acquire(FakeConnection)
+        pool.release(first)
+        second = pool.acquire(FakeConnection)
+
+        self.assertIs(first, second)
+        self.assertEqual(pool.stats()["connects"], 1)
+
+    def test_overflow_connections_are_closed_on_release(self):
+        pool = self.make_pool(max_size=1, max_overflow=1)
+
+        regular = pool.acquire(FakeConnection)
+        overflow = pool.acquire(FakeConnection)
+        pool.release(overflow)
+        pool.release(regular)
+
+        stats = pool.stats()
+        self.assertTrue(overflow.closed)
+        self.assertEqual((stats["size"], stats["idle"], stats["overflow_checkouts"]), (1, 1, 1))
+
+    def test_exhausted_pool_times_out(self):
+        pool = self.make_pool(max_size=1, max_overflow=0, timeout=0.05)
+        pool.acquire(FakeConnection)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(FakeConnection)
+
+        self.assertEqual(pool.stats()["timeouts"], 1)
+
+    def test_waiters_get_released_connections(self):
+        pool = self.make_pool(max_size=1, max_overflow=0, timeout=5)
+        connection = pool.acquire(FakeConnection)
+        threading.Timer(0.05, pool.release, [connection]).start()
+
+        self.assertIs(pool.acquire(FakeConnection), connection)
+        self.assertEqual(pool.stats()["waits"], 1)
+
+    def test_stale_connections_are_replaced(self):
+        pool = self.make_pool(max_size=1, health_check_interval=0)
+        connection = pool.acquire(FakeConnection)
+        pool.release(connection)
+        connection.closed = True
+
+        replacement = pool.acquire(FakeConnection)
+
+        self.assertIsNot(replacement, connection)
+        self.assertEqual(pool.stats()["failed_health_checks"], 1)
+        self.assertEqual(pool.stats()["size"], 1)
+
+
+class FastJSONTests(SimpleTestCase):
+
+    moment = datetime(2024, 2, 29, 23, 59, 30, 123456, tzinfo=dt_timezone.utc)
+
+    def render_both_ways(self, data):
+        """
+        returns the output of FastJSONRenderer with and without orjson
+        """
+
+        with mock.patch.object(fast_json, "orjson", None):
+            fallback = FastJSONRenderer().render(data)
+        return FastJSONRenderer().render(data), fallback
+
+    def test_output_matches_the_drf_renderer(self):
+        data = {
+            "text": "caf\u00e9 \u2028", "number": 1, "decimal": Decimal("1.50"), "lazy": gettext_lazy("high"),
+            "nested": [{"flag": True, "nothing": None}], 1: "non-string key",
+        }
+
+        for rendered in self.render_both_ways(data):
+            self.assertEqual(rendered, JSONRenderer().render(data))
+
+    def test_temporal_values_are_formatted_like_drf_fields(self):
+        data = {"datetime": self.moment, "date": self.moment.date(), "time": time(9, 30)}
+
+        for zone in ("UTC", "America/New_York"):
+            with timezone.override(zone):
+                expected = {
+                    "datetime": serializers.DateTimeField().to_representation(self.moment),
+                    "date": serializers.DateField().to_representation(self.moment.date()),
+                    "time": serializers.TimeField().to_representation(time(9, 30)),
+                }
+                for rendered in self.render_both_ways(data):
+                    self.assertEqual(rendered, JSONRenderer().render(expected), zone)
+
+    def test_parser_reads_json_and_rejects_invalid_bodies(self):
+        parser = FastJSONParser()
+
+        self.assertEqual(parser.parse(io.BytesIO(b'{"ids": [1, 2]}')), {"ids": [1, 2]})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b"{not json"))
+
@@ -22,4 +22,8 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/account/', include('account.urls'), name='account-api'),
     path('api/todo/', include('crud.urls'), name='crud-api'),
+    # async variants of the API, for deployments served through todo/asgi.py
+    path('api/async/account/', include('account.async_urls')),
+    path('api/async/todo/', include('crud.async_urls')),
+    path('metrics/', include('monitoring.urls')),
 ]
\ No newline at end of file
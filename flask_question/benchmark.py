@@ -0,0 +1,59 @@
+# compare create_user throughput with and without group commit
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import flask_question
+
+
+def run(requests, concurrency, group_commit):
+    flask_question.app.config["GROUP_COMMIT"] = group_commit
+    client = flask_question.app.test_client()
+    user = {"first_name": "Bench", "last_name": "User", "email": "bench@example.com"}
+
+    def create_user(_):
+        start = time.perf_counter()
+        response = client.post("/user/create", json=user)
+        assert response.status_code == 200, response.data
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(create_user, range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="compare create_user throughput with and without group commit")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+
+    # benchmark against a copy so the real users.db is left untouched
+    directory = tempfile.mkdtemp()
+    flask_question.DATABASE = os.path.join(directory, "users.db")
+    shutil.copy(os.path.join(os.path.dirname(__file__), "users.db"), flask_question.DATABASE)
+
+    try:
+        report = {
+            "per_request_commit": run(args.requests, args.concurrency, group_commit=False),
+            "group_commit": run(args.requests, args.concurrency, group_commit=True),
+        }
+    finally:
+        shutil.rmtree(directory)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
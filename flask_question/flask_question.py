@@ -1,17 +1,140 @@
 # import libraries
-from flask import Flask, jsonify, request
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from flask import Flask, g, jsonify, request
+import json
+import os
+import queue
 import sqlite3
+import threading
+import time
 
 # create the flask app
 app = Flask(__name__)
 
+# set GROUP_COMMIT=true to commit concurrent create_user inserts together
+app.config["GROUP_COMMIT"] = os.getenv("GROUP_COMMIT", "false").lower() in ("1", "true", "yes")
+app.config["GROUP_COMMIT_MAX_ROWS"] = int(os.getenv("GROUP_COMMIT_MAX_ROWS", 100))
+app.config["GROUP_COMMIT_MAX_DELAY_MS"] = float(os.getenv("GROUP_COMMIT_MAX_DELAY_MS", 5))
+# seconds a request waits for its insert to be committed before answering 503
+app.config["GROUP_COMMIT_TIMEOUT"] = float(os.getenv("GROUP_COMMIT_TIMEOUT", 10))
 
-# connect to db
-def db_connection():
-    conn = sqlite3.connect("users.db")
+# database settings
+DATABASE = "users.db"
+BUSY_TIMEOUT_MS = 5000
+
+# rows inserted per transaction by the bulk endpoint
+BULK_CHUNK_SIZE = 1000
+
+INSERT_QUERY = """INSERT INTO users (first_name, last_name, email) VALUES (?, ?, ?)"""
+
+# most connections kept open for requests, a request waits for one beyond that
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 8))
+POOL_TIMEOUT = 5
+
+
+# open a connection tuned for concurrent inserts
+def open_connection():
+    # pooled connections move between werkzeug's request threads
+    conn = sqlite3.connect(DATABASE, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+
+    # write-ahead logging lets readers and the writer work concurrently,
+    # and with synchronous=NORMAL a commit no longer waits for an fsync
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
     return conn
 
 
+# raised when no pooled connection frees up within the pool timeout
+class PoolExhausted(Exception):
+    pass
+
+
+# a bounded set of connections shared by the request threads, so that the
+# pragmas run once per connection instead of once per request thread
+class ConnectionPool:
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self.lock:
+            can_open = self.opened < self.size
+            if can_open:
+                self.opened += 1
+
+        if not can_open:
+            try:
+                return self.idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise PoolExhausted(f"no database connection became free within {self.timeout} seconds")
+
+        try:
+            return open_connection()
+        except Exception:
+            with self.lock:
+                self.opened -= 1
+            raise
+
+    # give a connection back, dropping whatever its request left uncommitted
+    def release(self, conn):
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self.lock:
+                self.opened -= 1
+            return
+
+        self.idle.put(conn)
+
+    # close the idle connections, e.g. before switching DATABASE
+    def close(self):
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                return
+            conn.close()
+            with self.lock:
+                self.opened -= 1
+
+
+pool = ConnectionPool(POOL_SIZE, POOL_TIMEOUT)
+
+
+# connect to db, one pooled connection per request
+def db_connection():
+    if "db" not in g:
+        g.db = pool.acquire()
+    return g.db
+
+
+# every pooled connection is busy, the client can retry later
+@app.errorhandler(PoolExhausted)
+def pool_exhausted(error):
+    return jsonify({"error": str(error)}), 503
+
+
+# return the request's connection to the pool, rolling back the inserts of a
+# request that failed before committing them
+@app.teardown_appcontext
+def release_db_connection(error):
+    conn = g.pop("db", None)
+    if conn is not None:
+        pool.release(conn)
+
+
 @app.route("/user/create", methods=["POST"])
 def create_user():
 
@@ -21,25 +144,248 @@ def create_user():
     lastname = data.get("last_name")
     email = data.get("email")
 
-    # establish database connection
+    # hand the insert to the group commit writer when it is enabled
+    if app.config["GROUP_COMMIT"]:
+        future = group_commit_writer().submit((firstname, lastname, email))
+        try:
+            user_id = future.result(timeout=app.config["GROUP_COMMIT_TIMEOUT"])
+        except FutureTimeoutError:
+            # the insert may still be committed once the writer catches up
+            return jsonify({"error": "timed out waiting for the insert to be committed"}), 503
+        except WriterUnavailable as error:
+            return jsonify({"error": str(error)}), 503
+        except sqlite3.Error as error:
+            return jsonify({"error": str(error)}), 500
+        return jsonify({"id": user_id})
+
+    # borrow a database connection from the pool
     connection = db_connection()
 
     # create the cursor for the db execution
     cursor = connection.cursor()
 
     # write the query
-    query = """INSERT INTO users (first_name, last_name, email) VALUES (?, ?, ?) RETURNING id"""
+    query = INSERT_QUERY + " RETURNING id"
     cursor.execute(query, (firstname, lastname, email))
     result = cursor.fetchone()
 
     # commit the change
     connection.commit()
 
-    # close the connection
-    connection.close()
-
     return jsonify({"id": result[0]})
 
 
+# marks NDJSON lines that could not be parsed
+INVALID_JSON = object()
+
+
+# read users from a JSON array or a newline delimited JSON stream
+def read_users(req):
+    if req.mimetype == "application/x-ndjson":
+        # parse the upload line by line instead of loading it all at once
+        for index, line in enumerate(req.stream):
+            if not line.strip():
+                continue
+            try:
+                yield index, json.loads(line)
+            except ValueError:
+                yield index, INVALID_JSON
+    else:
+        data = req.get_json(silent=True)
+        if not isinstance(data, list):
+            raise ValueError("expected a JSON array of users")
+        yield from enumerate(data)
+
+
+# insert a chunk of users in one transaction and return their ids
+def insert_users(connection, rows):
+    cursor = connection.cursor()
+    try:
+        with connection:
+            cursor.executemany(INSERT_QUERY, [values for _, values in rows])
+            last_id = cursor.execute("SELECT last_insert_rowid()").fetchone()[0]
+    except sqlite3.Error:
+        # retry row by row so that one bad row does not fail the whole chunk
+        return insert_users_one_by_one(connection, rows)
+
+    # the transaction holds the write lock, so the chunk's ids are consecutive
+    first_id = last_id - len(rows) + 1
+    return [(index, first_id + offset) for offset, (index, _) in enumerate(rows)], []
+
+
+def insert_users_one_by_one(connection, rows):
+    ids, errors = [], []
+    cursor = connection.cursor()
+    for index, values in rows:
+        try:
+            with connection:
+                cursor.execute(INSERT_QUERY + " RETURNING id", values)
+                ids.append((index, cursor.fetchone()[0]))
+        except sqlite3.Error as error:
+            errors.append({"index": index, "error": str(error)})
+
+    return ids, errors
+
+
+@app.route("/user/bulk-create", methods=["POST"])
+def bulk_create_users():
+    connection = db_connection()
+    ids, errors, chunk = {}, [], []
+
+    def flush():
+        chunk_ids, chunk_errors = insert_users(connection, chunk)
+        ids.update(chunk_ids)
+        errors.extend(chunk_errors)
+        chunk.clear()
+
+    try:
+        for index, data in read_users(request):
+            if data is INVALID_JSON:
+                errors.append({"index": index, "error": "invalid JSON"})
+                continue
+
+            if not isinstance(data, dict):
+                errors.append({"index": index, "error": "expected a JSON object"})
+                continue
+
+            chunk.append((index, (data.get("first_name"), data.get("last_name"), data.get("email"))))
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                flush()
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    if chunk:
+        flush()
+
+    errors.sort(key=lambda error: error["index"])
+    return jsonify({
+        "created": len(ids),
+        "ids": [{"index": index, "id": ids[index]} for index in sorted(ids)],
+        "errors": errors,
+    })
+
+
+# raised for inserts queued on a group commit writer that stopped
+class WriterUnavailable(Exception):
+    pass
+
+
+# a single writer thread that commits queued inserts in shared transactions
+class GroupCommitWriter:
+
+    def __init__(self, max_rows, max_delay_ms):
+        self.max_rows = max_rows
+        self.max_delay = max_delay_ms / 1000
+        self.queue = queue.Queue()
+        # set once the writer stopped, guarded by lock so no insert is queued after it
+        self.error = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.run, name="group-commit-writer", daemon=True)
+        self.thread.start()
+
+    # queue an insert, the future resolves to the new user's id once committed
+    def submit(self, values):
+        future = Future()
+        with self.lock:
+            if self.error is not None:
+                future.set_exception(self.error)
+            else:
+                self.queue.put((values, future))
+        return future
+
+    # stop taking inserts, the writer commits those already queued and exits
+    def stop(self):
+        with self.lock:
+            if self.error is None:
+                self.error = WriterUnavailable("the group commit writer stopped")
+                self.queue.put(None)
+
+    def run(self):
+        connection, batch = None, []
+        try:
+            # the writer outlives any request, so it keeps a connection of its own
+            connection = open_connection()
+            while True:
+                batch = self.next_batch()
+                if batch is None:
+                    return
+                self.flush(connection, batch)
+                batch = []
+        except Exception as error:
+            self.fail(batch, error)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    # wait for the first insert, then gather more for up to max_delay; None once stopped
+    def next_batch(self):
+        first = self.queue.get()
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+        while len(batch) < self.max_rows:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # commit this batch, then stop on the next call
+                self.queue.put(None)
+                break
+            batch.append(item)
+
+        return batch
+
+    def flush(self, connection, batch):
+        try:
+            ids, errors = insert_users(connection, [(index, values) for index, (values, _) in enumerate(batch)])
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            return
+
+        for index, user_id in ids:
+            batch[index][1].set_result(user_id)
+        for error in errors:
+            batch[error["index"]][1].set_exception(sqlite3.Error(error["error"]))
+
+    # the writer died: fail the inserts it held and every one queued, and refuse new ones
+    def fail(self, batch, error):
+        unavailable = WriterUnavailable(f"the group commit writer stopped: {error}")
+        with self.lock:
+            self.error = unavailable
+
+        pending = [future for _, future in batch]
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                pending.append(item[1])
+
+        for future in pending:
+            if not future.done():
+                future.set_exception(unavailable)
+
+
+writer = None
+writer_lock = threading.Lock()
+
+
+# start the group commit writer on first use, and again after it stopped
+def group_commit_writer():
+    global writer
+    with writer_lock:
+        if writer is None or writer.error is not None:
+            writer = GroupCommitWriter(app.config["GROUP_COMMIT_MAX_ROWS"], app.config["GROUP_COMMIT_MAX_DELAY_MS"])
+    return writer
+
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,235 @@
+# tests for the create_user endpoints and their pooled connections
+import json
+import os
+import shutil
+import tempfile
+import sqlite3
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import flask_question
+
+
+class DatabaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # run against a copy so the real users.db is left untouched
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        database = os.path.join(directory, "users.db")
+        shutil.copy(os.path.join(os.path.dirname(__file__), "users.db"), database)
+
+        self.original_database = flask_question.DATABASE
+        flask_question.DATABASE = database
+        flask_question.pool.close()
+        self.addCleanup(self.restore_database)
+
+        self.client = flask_question.app.test_client()
+        self.initial_users = self.count_users()
+        self.user = {"first_name": "Jane", "last_name": "Doe", "email": "jane@example.com"}
+
+    def restore_database(self):
+        flask_question.pool.close()
+        flask_question.DATABASE = self.original_database
+
+    def count_users(self):
+        with flask_question.app.app_context():
+            return flask_question.db_connection().execute("SELECT count(*) FROM users").fetchone()[0]
+
+
+class ConnectionPoolTests(DatabaseTestCase):
+
+    def test_requests_reuse_a_bounded_number_of_connections(self):
+        threads = flask_question.POOL_SIZE * 2
+        barrier = threading.Barrier(threads)
+
+        def create_user(_):
+            barrier.wait()
+            return self.client.post("/user/create", json=self.user).status_code
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            statuses = list(executor.map(create_user, range(threads * 5)))
+
+        self.assertEqual(statuses, [200] * threads * 5)
+        self.assertLessEqual(flask_question.pool.opened, flask_question.POOL_SIZE)
+        self.assertEqual(self.count_users(), self.initial_users + threads * 5)
+
+    def test_failed_requests_roll_back_and_return_their_connection(self):
+        with self.assertRaises(RuntimeError):
+            with flask_question.app.app_context():
+                connection = flask_question.db_connection()
+                connection.execute(flask_question.INSERT_QUERY, tuple(self.user.values()))
+                raise RuntimeError("handler failed")
+
+        self.assertFalse(connection.in_transaction)
+        self.assertEqual(self.count_users(), self.initial_users)
+        # the rolled back connection served the count
+        self.assertEqual(flask_question.pool.opened, 1)
+
+    def test_requests_are_refused_while_every_connection_is_busy(self):
+        pool = flask_question.ConnectionPool(1, 0.05)
+        self.addCleanup(pool.close)
+
+        with mock.patch.object(flask_question, "pool", pool):
+            busy = pool.acquire()
+            response = self.client.post("/user/create", json=self.user)
+            pool.release(busy)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("no database connection became free", response.json["error"])
+
+
+class BulkCreateTests(DatabaseTestCase):
+
+    def emails_by_id(self):
+        with flask_question.app.app_context():
+            return dict(flask_question.db_connection().execute("SELECT id, email FROM users").fetchall())
+
+    def test_arrays_are_inserted_in_chunks_with_their_ids_in_order(self):
+        users = [dict(self.user, email=f"user{i}@example.com") for i in range(7)]
+        with mock.patch.object(flask_question, "BULK_CHUNK_SIZE", 3):
+            response = self.client.post("/user/bulk-create", json=users)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["created"], 7)
+        self.assertEqual(response.json["errors"], [])
+        emails = self.emails_by_id()
+        self.assertEqual(
+            [(item["index"], emails[item["id"]]) for item in response.json["ids"]],
+            [(i, f"user{i}@example.com") for i in range(7)],
+        )
+
+    def test_ndjson_lines_that_are_not_users_are_reported_by_index(self):
+        lines = [json.dumps(self.user), "{not json", "", json.dumps([1]), json.dumps(dict(self.user, email="b@x.com"))]
+        response = self.client.post(
+            "/user/bulk-create", data="\n".join(lines) + "\n", content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(response.json["created"], 2)
+        self.assertEqual([item["index"] for item in response.json["ids"]], [0, 4])
+        self.assertEqual(response.json["errors"], [
+            {"index": 1, "error": "invalid JSON"},
+            {"index": 3, "error": "expected a JSON object"},
+        ])
+
+    def test_a_failing_chunk_is_retried_row_by_row(self):
+        with flask_question.app.app_context():
+            connection = flask_question.db_connection()
+            connection.execute(
+                "CREATE TRIGGER reject_user BEFORE INSERT ON users WHEN new.email = 'bad@example.com' "
+                "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+            )
+            connection.commit()
+
+        users = [dict(self.user, email=email) for email in ("a@example.com", "bad@example.com", "b@example.com")]
+        response = self.client.post("/user/bulk-create", json=users)
+
+        self.assertEqual(response.json["created"], 2)
+        self.assertEqual([item["index"] for item in response.json["ids"]], [0, 2])
+        self.assertEqual(response.json["errors"], [{"index": 1, "error": "rejected"}])
+        self.assertEqual(self.count_users(), self.initial_users + 2)
+
+    def test_bodies_that_are_not_arrays_are_rejected(self):
+        for body in ({"first_name": "Jane"}, "users"):
+            response = self.client.post("/user/bulk-create", json=body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json, {"error": "expected a JSON array of users"})
+
+
+
+class GroupCommitTests(DatabaseTestCase):
+
+    def setUp(self):
+        super().setUp()
+        config = flask_question.app.config
+        self.addCleanup(config.update, {key: config[key] for key in config if key.startswith("GROUP_COMMIT")})
+        config.update(GROUP_COMMIT=True, GROUP_COMMIT_MAX_DELAY_MS=200, GROUP_COMMIT_TIMEOUT=5)
+        self.addCleanup(self.stop_writer)
+
+    def stop_writer(self):
+        if flask_question.writer is not None:
+            flask_question.writer.stop()
+            flask_question.writer.thread.join()
+            flask_question.writer = None
+
+    def create_users(self, users):
+        barrier = threading.Barrier(len(users))
+
+        def create_user(user):
+            barrier.wait()
+            return self.client.post("/user/create", json=user)
+
+        with ThreadPoolExecutor(max_workers=len(users)) as executor:
+            return list(executor.map(create_user, users))
+
+    def test_concurrent_inserts_are_committed_together(self):
+        batches = []
+        real_insert_users = flask_question.insert_users
+
+        def recording_insert_users(connection, rows):
+            batches.append(len(rows))
+            return real_insert_users(connection, rows)
+
+        with mock.patch.object(flask_question, "insert_users", recording_insert_users):
+            responses = self.create_users([dict(self.user, email=f"user{i}@example.com") for i in range(10)])
+
+        self.assertEqual([response.status_code for response in responses], [200] * 10)
+        self.assertEqual(sum(batches), 10)
+        self.assertLess(len(batches), 10)
+        # every request gets the id of its own row
+        with flask_question.app.app_context():
+            emails = dict(flask_question.db_connection().execute("SELECT id, email FROM users").fetchall())
+        self.assertEqual(
+            sorted(emails[response.json["id"]] for response in responses),
+            sorted(f"user{i}@example.com" for i in range(10)),
+        )
+
+    def test_a_failed_insert_only_fails_its_own_request(self):
+        with flask_question.app.app_context():
+            connection = flask_question.db_connection()
+            connection.execute(
+                "CREATE TRIGGER reject_user BEFORE INSERT ON users WHEN new.email = 'bad@example.com' "
+                "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+            )
+            connection.commit()
+
+        users = [dict(self.user, email=email) for email in ("a@example.com", "bad@example.com", "b@example.com")]
+        responses = self.create_users(users)
+
+        self.assertEqual([response.status_code for response in responses], [200, 500, 200])
+        self.assertEqual(responses[1].json, {"error": "rejected"})
+        self.assertEqual(self.count_users(), self.initial_users + 2)
+
+    def test_requests_are_refused_while_the_writer_cannot_start(self):
+        database = flask_question.DATABASE
+        flask_question.DATABASE = os.path.join(database, "missing", "users.db")
+
+        for _ in range(2):
+            response = self.client.post("/user/create", json=self.user)
+            self.assertEqual(response.status_code, 503)
+            self.assertIn("unable to open database file", response.json["error"])
+
+        # the next request starts a new writer
+        flask_question.DATABASE = database
+        response = self.client.post("/user/create", json=self.user)
+        self.assertEqual(response.status_code, 200)
+
+    def test_requests_time_out_when_the_writer_stalls(self):
+        flask_question.app.config["GROUP_COMMIT_TIMEOUT"] = 0.05
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def stalled_insert_users(connection, rows):
+            release.wait()
+            return [], []
+
+        with mock.patch.object(flask_question, "insert_users", stalled_insert_users):
+            response = self.client.post("/user/create", json=self.user)
+
+        self.assertEqual(response.status_code, 503)
+
+
+if __name__ == "__main__":
+    unittest.main()